@@ -1,3 +1,74 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.urls import reverse
+from django.utils.html import format_html
+
+from .models import Assessment, JobPosition, JobRequirement, LLMBatch, RescreenRun
+from .services.rescreen_service import RescreenService
 
 # Register your models here.
+
+
+class JobRequirementInline(admin.TabularInline):
+    model = JobRequirement
+    extra = 1
+
+
+@admin.register(JobPosition)
+class JobPositionAdmin(admin.ModelAdmin):
+    list_display = ['title', 'slug', 'is_active', 'recruiter_notification', 'llm_backend', 'triage_backend',
+                    'batch_screening', 'updated_at', 'shortlist']
+    list_filter = ['is_active', 'recruiter_notification', 'batch_screening']
+    prepopulated_fields = {'slug': ['title']}
+    inlines = [JobRequirementInline]
+    actions = ['queue_rescreen']
+
+    @admin.display(description='Shortlist')
+    def shortlist(self, position):
+        return format_html('<a href="{}">Applicants</a>', reverse('Screener:recruiter_shortlist', args=[position.slug]))
+
+    @admin.action(description='Re-screen past applicants against the current requirements')
+    def queue_rescreen(self, request, queryset):
+        for position in queryset:
+            run = RescreenService.start(position)
+            self.message_user(request, f"Queued re-screen run {run.pk} of {run.total} applicants for {position}; "
+                                       f"it is processed by `manage.py rescreen_applicants --pending`.",
+                              messages.SUCCESS)
+
+
+@admin.register(Assessment)
+class AssessmentAdmin(admin.ModelAdmin):
+    list_display = ['resume', 'position', 'decision', 'rank_score', 'score', 'model_name', 'latency_ms', 'created_at']
+    list_filter = ['position', 'decision']
+    search_fields = ['email']
+    raw_id_fields = ['resume']
+    readonly_fields = ['created_at']
+
+
+@admin.register(RescreenRun)
+class RescreenRunAdmin(admin.ModelAdmin):
+    list_display = ['pk', 'position', 'status', 'percent_done', 'processed', 'total', 'reassessed', 'full', 'unchanged',
+                    'failed', 'decisions_changed', 'created_at']
+    list_filter = ['status', 'position']
+    readonly_fields = [field.name for field in RescreenRun._meta.fields]
+    actions = ['cancel']
+
+    def has_add_permission(self, request):
+        return False
+
+    @admin.action(description='Cancel selected re-screen runs')
+    def cancel(self, request, queryset):
+        cancelled = queryset.filter(status__in=[RescreenRun.STATUS_PENDING, RescreenRun.STATUS_RUNNING]).update(
+            status=RescreenRun.STATUS_CANCELLED)
+        self.message_user(request, f"Cancelled {cancelled} re-screen runs.")
+
+
+@admin.register(LLMBatch)
+class LLMBatchAdmin(admin.ModelAdmin):
+    list_display = ['pk', 'backend', 'provider_batch_id', 'status', 'provider_status', 'request_count', 'answered_count',
+                    'failed_count', 'created_at', 'finished_at']
+    list_filter = ['status', 'backend']
+    exclude = ['requests']
+    readonly_fields = [field.name for field in LLMBatch._meta.fields if field.name != 'requests']
+
+    def has_add_permission(self, request):
+        return False
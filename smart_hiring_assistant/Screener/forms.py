@@ -1,13 +1,18 @@
 from django import forms
-from .models import Resume
+from django.conf import settings
+from .models import Assessment, JobPosition, Resume
+from .services.assessment_schema import STATUS_MET, STATUSES
+from .services.shortlist_service import ShortlistService
 
 class ResumeUploadForm(forms.ModelForm):
     class Meta:
         model = Resume
-        fields = ['name', 'email', 'resume_file']
+        fields = ['name', 'email', 'position', 'resume_file']
 
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, upload_errors=None, **kwargs):
         super().__init__(*args, **kwargs)
+        # Reasons ResumeUploadHandler rejected files while the request streamed in.
+        self.upload_errors = upload_errors or {}
         self.fields['name'].widget.attrs.update({
             'class': 'form-control',
             'placeholder': 'Enter your full name'
@@ -16,6 +21,11 @@ class ResumeUploadForm(forms.ModelForm):
             'class': 'form-control',
             'placeholder': 'Enter your email address'
         })
+        self.fields['position'].queryset = JobPosition.objects.filter(is_active=True)
+        self.fields['position'].empty_label = None
+        self.fields['position'].widget.attrs.update({
+            'class': 'form-control'
+        })
         self.fields['resume_file'].widget.attrs.update({
             'class': 'form-control',
             'accept': '.pdf'
@@ -26,6 +36,46 @@ class ResumeUploadForm(forms.ModelForm):
         if resume_file:
             if not resume_file.name.endswith('.pdf'):
                 raise forms.ValidationError('Only PDF files are allowed.')
-            if resume_file.size > 2 * 1024 * 1024:  # 2MB limit
-                raise forms.ValidationError('File size must be under 2MB.')
-        return resume_file
\ No newline at end of file
+            max_bytes = getattr(settings, 'RESUME_UPLOAD_MAX_BYTES', 2 * 1024 * 1024)
+            if resume_file.size > max_bytes:
+                raise forms.ValidationError(f"File size must be under {max_bytes // (1024 * 1024)}MB.")
+        return resume_file
+
+    def clean(self):
+        cleaned_data = super().clean()
+        upload_error = self.upload_errors.get('resume_file')
+        if upload_error:
+            # A skipped file looks like a missing one; report why it was dropped instead.
+            self.errors.pop('resume_file', None)
+            self.add_error('resume_file', upload_error)
+        return cleaned_data
+
+class ShortlistFilterForm(forms.Form):
+    """Filters of the recruiter shortlist; an unbound or empty form lists qualified applicants, best first."""
+    decision = forms.ChoiceField(choices=Assessment.DECISION_CHOICES, required=False)
+    sort = forms.ChoiceField(choices=ShortlistService.SORT_CHOICES, required=False)
+    since = forms.DateField(required=False, widget=forms.DateInput(attrs={'type': 'date'}))
+    until = forms.DateField(required=False, widget=forms.DateInput(attrs={'type': 'date'}))
+    requirements = forms.MultipleChoiceField(required=False, widget=forms.CheckboxSelectMultiple,
+                                             help_text='Only applicants whose assessment gave these requirements '
+                                                       'the status below.')
+    requirement_status = forms.ChoiceField(choices=[(status, status.title()) for status in STATUSES], required=False)
+
+    def __init__(self, *args, position, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['requirements'].choices = [(name, name) for name in
+                                               position.requirements.values_list('name', flat=True)]
+        for name in ('decision', 'sort', 'since', 'until', 'requirement_status'):
+            self.fields[name].widget.attrs.update({'class': 'form-control'})
+
+    def filters(self):
+        """Keyword arguments for ShortlistService.page()."""
+        data = self.cleaned_data if self.is_valid() else {}
+        status = data.get('requirement_status') or STATUS_MET
+        return {
+            'decision': data.get('decision') or Assessment.DECISION_QUALIFIED,
+            'sort': data.get('sort') or ShortlistService.SORT_SCORE,
+            'since': data.get('since'),
+            'until': data.get('until'),
+            'requirements': {name: status for name in data.get('requirements') or []},
+        }
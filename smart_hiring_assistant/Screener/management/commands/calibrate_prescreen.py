@@ -0,0 +1,81 @@
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+
+from Screener.models import Assessment, JobPosition
+
+
+class Command(BaseCommand):
+    help = ('Suggest PRESCREEN_REJECT_THRESHOLD and PRESCREEN_STRONG_THRESHOLD from labelled data: the '
+            'pre-screen score and LLM decision of stored assessments. Collect the data with auto-reject '
+            'off, since screened-out applicants never get an LLM decision.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--position', action='append', default=[],
+                            help='Slug of a position to calibrate on (repeatable); defaults to all positions.')
+        parser.add_argument('--max-miss-rate', type=float, default=0.01,
+                            help='Largest share of qualified applicants the reject threshold may screen out '
+                                 '(default: 0.01).')
+        parser.add_argument('--min-precision', type=float, default=0.9,
+                            help='Share of applicants at or above the strong threshold that must be qualified '
+                                 '(default: 0.9).')
+        parser.add_argument('--min-samples', type=int, default=50,
+                            help='Labelled assessments of each decision needed before suggesting a threshold.')
+
+    def handle(self, *args, **options):
+        assessments = Assessment.objects.filter(
+            decision__in=[Assessment.DECISION_QUALIFIED, Assessment.DECISION_NOT_QUALIFIED], score__isnull=False,
+        )
+        if options['position']:
+            positions = JobPosition.objects.filter(slug__in=options['position'])
+            missing = set(options['position']) - set(positions.values_list('slug', flat=True))
+            if missing:
+                raise CommandError(f"Unknown positions: {', '.join(sorted(missing))}")
+            assessments = assessments.filter(position__in=positions)
+        rows = list(assessments.values_list('score', 'decision'))
+        scores = np.array([score for score, _ in rows], dtype=np.float64)
+        qualified = np.array([decision == Assessment.DECISION_QUALIFIED for _, decision in rows], dtype=bool)
+
+        self.stdout.write(f"{'decision':<16}{'count':>8}" + ''.join(f"{f'p{p}':>9}" for p in (1, 5, 50, 95, 99)))
+        for label, mask in (('qualified', qualified), ('not qualified', ~qualified)):
+            values = scores[mask]
+            percentiles = np.percentile(values, [1, 5, 50, 95, 99]) if values.size else [np.nan] * 5
+            self.stdout.write(f"{label:<16}{values.size:>8}" + ''.join(f"{value:>9.4f}" for value in percentiles))
+
+        if min(qualified.sum(), (~qualified).sum()) < options['min_samples']:
+            self.stdout.write(self.style.WARNING(
+                f"Fewer than {options['min_samples']} assessments of each decision; collect more before "
+                f"enabling either threshold."
+            ))
+            return
+        self._suggest_reject(scores, qualified, options['max_miss_rate'])
+        self._suggest_strong(scores, qualified, options['min_precision'])
+
+    def _suggest_reject(self, scores, qualified, max_miss_rate):
+        # Highest threshold that leaves at most max_miss_rate of the qualified scores below it.
+        ranked = np.sort(scores[qualified])
+        threshold = float(ranked[int(max_miss_rate * ranked.size)])
+        missed = int((ranked < threshold).sum())
+        saved = int((scores[~qualified] < threshold).sum())
+        self.stdout.write(
+            f"PRESCREEN_REJECT_THRESHOLD={threshold:.4f}: rejects {missed} of {ranked.size} qualified and "
+            f"{saved} of {int((~qualified).sum())} not qualified applicants without an LLM call"
+        )
+
+    def _suggest_strong(self, scores, qualified, min_precision):
+        # Lowest threshold whose applicants at or above it are qualified at least min_precision of the time.
+        order = np.argsort(-scores, kind='stable')
+        ranked = scores[order]
+        precision = np.cumsum(qualified[order]) / np.arange(1, order.size + 1)
+        # Only the last of equal scores is a possible cut: a threshold takes all of them or none.
+        last_of_score = np.append(ranked[1:] != ranked[:-1], True)
+        eligible = np.flatnonzero(last_of_score & (precision >= min_precision))
+        if not eligible.size:
+            self.stdout.write(f"PRESCREEN_STRONG_THRESHOLD: no score reaches a precision of {min_precision:.0%}; "
+                              f"leave it unset")
+            return
+        threshold = float(ranked[eligible[-1]])
+        flagged = scores >= threshold
+        self.stdout.write(
+            f"PRESCREEN_STRONG_THRESHOLD={threshold:.4f}: flags {int(flagged.sum())} applicants, "
+            f"{qualified[flagged].mean():.0%} of them qualified"
+        )
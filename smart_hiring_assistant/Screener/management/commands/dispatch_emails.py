@@ -0,0 +1,67 @@
+import logging
+import os
+import signal
+import socket
+import threading
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from Screener.services.digest_service import RecruiterDigestService
+from Screener.services.email_outbox_service import EmailOutboxService
+from Screener.services.metrics import start_metrics_server
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = ('Drain the email outbox: send queued rejections and recruiter forwards in batches '
+            '(one SendGrid request per batch and kind), queue recruiter digests as they fall due '
+            'and retry failures with backoff.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--poll-interval', type=float, default=5.0,
+                            help='Seconds to sleep when the outbox is empty.')
+        parser.add_argument('--once', action='store_true',
+                            help='Send everything currently due and exit instead of polling forever.')
+        parser.add_argument('--no-digests', action='store_true',
+                            help='Do not queue recruiter digests (run send_recruiter_digests separately).')
+        parser.add_argument('--metrics-port', type=int,
+                            help='Serve this process\'s Prometheus metrics on this port at /metrics.')
+
+    def handle(self, *args, **options):
+        self.stop_event = threading.Event()
+        signal.signal(signal.SIGINT, self._request_stop)
+        signal.signal(signal.SIGTERM, self._request_stop)
+
+        if options['metrics_port']:
+            start_metrics_server(options['metrics_port'])
+        worker_id = f"{socket.gethostname()}-{os.getpid()}"
+        outbox = EmailOutboxService()
+        digests = None if options['no_digests'] else RecruiterDigestService(outbox)
+        total = 0
+        self.stdout.write(f"Dispatching emails ({worker_id}, batches of {outbox.batch_size})")
+        try:
+            while not self.stop_event.is_set():
+                close_old_connections()
+                try:
+                    if digests is not None:
+                        digests.build_due()
+                    claimed, sent = outbox.dispatch(worker_id)
+                except Exception as e:
+                    logger.error(f"Email dispatch failed: {str(e)}")
+                    self.stop_event.wait(options['poll_interval'])
+                    continue
+                total += sent
+                if claimed:
+                    continue
+                if options['once']:
+                    break
+                self.stop_event.wait(options['poll_interval'])
+        finally:
+            outbox.sendgrid_service.backend.close()
+        self.stdout.write(self.style.SUCCESS(f"Sent {total} emails"))
+
+    def _request_stop(self, signum, frame):
+        self.stdout.write('Stop requested, finishing the current batch...')
+        self.stop_event.set()
@@ -0,0 +1,160 @@
+import logging
+import os
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from Screener.models import Resume
+from Screener.services.pdf_parser_service import PDFParserService
+from Screener.storage import TEXT_SUFFIX, ContentAddressedStorage, resume_storage
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = ('Delete content-addressed resume blobs that no Resume references, extracted-text sidecars of deleted '
+            'blobs or of an older extraction version, and temporary files of interrupted writes and uploads. '
+            'Files changed within --grace-seconds are kept, so uploads in flight are never collected.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Report what would be deleted without deleting.')
+        parser.add_argument('--grace-seconds', type=int, default=getattr(settings, 'RESUME_BLOB_GC_GRACE_SECONDS', 3600),
+                            help='Keep files modified more recently than this.')
+        parser.add_argument('--adopt-legacy', action='store_true',
+                            help='First move resume files stored under their upload names into the '
+                                 'content-addressed layout, sharing blobs between identical files.')
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Names looked up per database query.')
+
+    def handle(self, *args, **options):
+        self.storage = resume_storage()
+        if not isinstance(self.storage, ContentAddressedStorage):
+            raise CommandError("Resume storage is not content-addressed; configure STORAGES['resumes']")
+        self.dry_run = options['dry_run']
+        self.chunk_size = max(1, options['chunk_size'])
+        self.stats = Counter()
+        cutoff = time.time() - options['grace_seconds']
+        if options['adopt_legacy']:
+            self._adopt_legacy()
+        version = PDFParserService.text_version()
+        for files in self.storage.shards():
+            self._collect(files, cutoff, version)
+        self._collect_partial_uploads(cutoff)
+
+        verb = 'Would delete' if self.dry_run else 'Deleted'
+        if options['adopt_legacy']:
+            self.stdout.write(f"{'Would adopt' if self.dry_run else 'Adopted'} {self.stats['adopted']} legacy files "
+                              f"({self.stats['adopted_bytes'] / 1e6:.1f} MB), {self.stats['legacy_missing']} missing")
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {self.stats['blobs_deleted']} of {self.stats['blobs']} blobs "
+            f"({self.stats['blob_bytes_deleted'] / 1e6:.1f} MB), {self.stats['sidecars_deleted']} text sidecars "
+            f"({self.stats['sidecars_stale']} of an older version) and {self.stats['temporary_deleted']} temporary files"
+        ))
+
+    def _delete(self, path, size_key=None):
+        if size_key:
+            self.stats[size_key] += os.path.getsize(path)
+        if not self.dry_run:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def _delete_blob(self, name, path, cutoff):
+        """
+        Delete a blob found unreferenced, unless an upload reused it since it was listed:
+        ContentAddressedStorage saves identical bytes by refreshing the existing blob's mtime
+        and the resume pointing at it is committed after that. The blob is first renamed out of
+        the way, so later saves write it anew; then its mtime and references are checked again
+        and it is moved back if either changed. Returns whether it was deleted.
+        """
+        if self.dry_run:
+            logger.info(f"Deleting unreferenced resume blob {name}")
+            self._delete(path, 'blob_bytes_deleted')
+            return True
+        tombstone = os.path.join(os.path.dirname(path), f".gc.{os.path.basename(path)}")
+        try:
+            os.rename(path, tombstone)
+        except FileNotFoundError:
+            return False
+        if os.path.getmtime(tombstone) > cutoff or self._referenced([name]):
+            os.replace(tombstone, path)  # same bytes as any copy a save wrote after the rename
+            logger.info(f"Kept resume blob {name}, reused while it was being collected")
+            return False
+        logger.info(f"Deleting unreferenced resume blob {name}")
+        self._delete(tombstone, 'blob_bytes_deleted')
+        return True
+
+    def _referenced(self, names):
+        referenced = set()
+        for start in range(0, len(names), self.chunk_size):
+            referenced.update(Resume.objects.filter(resume_file__in=names[start:start + self.chunk_size])
+                              .values_list('resume_file', flat=True))
+        return referenced
+
+    def _collect(self, files, cutoff, version):
+        """Sweep one shard: unreferenced blobs, then sidecars without a kept blob or of another version."""
+        blobs = [(name, path, mtime) for name, path, mtime in files
+                 if not os.path.basename(name).startswith('.') and not name.endswith(TEXT_SUFFIX)]
+        referenced = self._referenced([name for name, _, _ in blobs])
+        kept = set()
+        for name, path, mtime in blobs:
+            self.stats['blobs'] += 1
+            if name in referenced or mtime > cutoff or not self._delete_blob(name, path, cutoff):
+                kept.add(self.storage.digest_of(name))
+                continue
+            self.stats['blobs_deleted'] += 1
+        for name, path, mtime in files:
+            if mtime > cutoff:
+                continue
+            if os.path.basename(name).startswith('.'):
+                self._delete(path)  # temporary file of an interrupted write
+                self.stats['temporary_deleted'] += 1
+            elif name.endswith(TEXT_SUFFIX):
+                stale = self.storage.text_version(path) != version
+                if stale or self.storage.digest_of(name) not in kept:
+                    self._delete(path)
+                    self.stats['sidecars_deleted'] += 1
+                    self.stats['sidecars_stale'] += stale
+
+    def _collect_partial_uploads(self, cutoff):
+        # Left in the upload directory by a process that died mid-upload; finished ones are moved out.
+        directory = getattr(settings, 'RESUME_UPLOAD_TEMP_DIR', None) or self.storage.path('resumes/.partial')
+        if not os.path.isdir(directory):
+            return
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_file() and entry.stat().st_mtime <= cutoff:
+                    self._delete(entry.path)
+                    self.stats['temporary_deleted'] += 1
+
+    def _adopt_legacy(self):
+        """Re-store files saved under their upload names as blobs and point their resumes at them."""
+        legacy = Resume.objects.exclude(resume_file='').exclude(resume_file__startswith=f"{self.storage.prefix}/")
+        last_pk = 0
+        while True:
+            rows = list(legacy.filter(pk__gt=last_pk).order_by('pk').values_list('pk', 'resume_file')[:self.chunk_size])
+            if not rows:
+                break
+            last_pk = rows[-1][0]
+            for name in dict.fromkeys(name for _, name in rows):
+                self._adopt(name)
+
+    def _adopt(self, name):
+        if not self.storage.exists(name):
+            self.stats['legacy_missing'] += 1
+            logger.warning(f"Legacy resume file {name} is missing")
+            return
+        self.stats['adopted'] += 1
+        self.stats['adopted_bytes'] += self.storage.size(name)
+        if self.dry_run:
+            return
+        with self.storage.open(name) as f:
+            blob = self.storage.save(name, f)
+        with transaction.atomic():
+            Resume.objects.filter(resume_file=name).update(resume_file=blob)
+            Resume.objects.filter(resume_file=blob, sha256='').update(sha256=self.storage.digest_of(blob))
+        self.storage.delete(name)
+        logger.info(f"Moved legacy resume file {name} to {blob}")
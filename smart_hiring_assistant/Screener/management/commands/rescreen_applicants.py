@@ -0,0 +1,132 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from Screener.models import JobPosition, RescreenRun
+from Screener.services.requirement_index import RequirementIndexService
+from Screener.services.rescreen_service import PLAN_REASSESS, PLAN_UNCHANGED, RescreenService
+from Screener.services.service_registry import ServiceRegistry
+from Screener.views import build_screening_result, update_assessment
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = ('Re-screen the stored applicants of a position after its requirements changed. Only changed and '
+            'added requirements are re-assessed by the LLM; statuses of unchanged requirements are reused. '
+            'Progress is kept on a RescreenRun row, so an interrupted run can be resumed with --run.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('position', nargs='?', help='Slug of the position to re-screen (starts a new run).')
+        parser.add_argument('--run', type=int, help='Resume this RescreenRun (e.g. after an interruption).')
+        parser.add_argument('--pending', action='store_true',
+                            help='Process the runs queued from the admin and exit.')
+        parser.add_argument('--rate', type=float,
+                            help='Maximum LLM re-assessments per minute (default: RESCREEN_RATE_PER_MINUTE, 0 for none).')
+        parser.add_argument('--concurrency', type=int, default=getattr(settings, 'RESCREEN_CONCURRENCY', 2),
+                            help='Maximum concurrent LLM re-assessments.')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Report how each applicant would be re-screened without calling the LLM.')
+
+    def handle(self, *args, **options):
+        self.rescreens = RescreenService(ServiceRegistry.get('rag'), rate_per_minute=options['rate'])
+        self.concurrency = max(1, options['concurrency'])
+        if options['dry_run']:
+            self._dry_run(self._position(options['position']))
+            return
+        if options['run']:
+            try:
+                runs = [RescreenRun.objects.select_related('position').get(pk=options['run'])]
+            except RescreenRun.DoesNotExist:
+                raise CommandError(f"Re-screen run {options['run']} does not exist")
+        elif options['pending']:
+            runs = list(RescreenRun.objects.filter(status=RescreenRun.STATUS_PENDING).select_related('position')
+                        .order_by('pk'))
+        else:
+            runs = [self.rescreens.start(self._position(options['position']))]
+        for run in runs:
+            self._execute(run)
+
+    @staticmethod
+    def _position(slug):
+        if not slug:
+            raise CommandError('Give a position slug, --run or --pending')
+        try:
+            return JobPosition.objects.get(slug=slug)
+        except JobPosition.DoesNotExist:
+            raise CommandError(f"Unknown position '{slug}'")
+
+    def _dry_run(self, position):
+        index = RequirementIndexService.for_position(position)
+        plans = {}
+        for assessment in self.rescreens.assessments(position).only('decision', 'requirement_scores', 'requirement_versions'):
+            plan, _ = self.rescreens.plan(assessment, index)
+            plans[plan] = plans.get(plan, 0) + 1
+        self.stdout.write(f"{position.slug}: " + ', '.join(f"{count} {plan}" for plan, count in sorted(plans.items()))
+                          if plans else f"{position.slug}: no assessments")
+
+    def _execute(self, run):
+        if not self.rescreens.claim(run):
+            self.stderr.write(f"Re-screen run {run.pk} is {run.status}, skipping")
+            return
+        self.stdout.write(f"Re-screening {run.total} applicants for {run.position.slug} (run {run.pk}, "
+                          f"{run.processed} already done)")
+        started, done_at_start = time.monotonic(), run.processed
+        try:
+            with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='rescreen') as pool:
+                while True:
+                    if self.rescreens.is_cancelled(run):
+                        self.stdout.write(self.style.WARNING(f"Re-screen run {run.pk} was cancelled"))
+                        return
+                    batch = self.rescreens.next_batch(run)
+                    if not batch:
+                        break
+                    self._process_batch(run, batch, pool)
+                    elapsed = time.monotonic() - started
+                    per_second = (run.processed - done_at_start) / elapsed if elapsed else 0
+                    remaining = max(run.total - run.processed, 0)
+                    eta = f", about {remaining / per_second / 60:.1f} min left" if per_second and remaining else ''
+                    self.stdout.write(
+                        f"{run.processed}/{run.total} ({run.percent_done}%): {run.reassessed} reassessed, "
+                        f"{run.full} full, {run.unchanged} unchanged, {run.failed} failed, "
+                        f"{run.decisions_changed} decisions changed, "
+                        f"{run.prompt_tokens + run.completion_tokens} tokens{eta}"
+                    )
+        except Exception as e:
+            self.rescreens.finish(run, RescreenRun.STATUS_FAILED, str(e))
+            raise CommandError(f"Re-screen run {run.pk} failed: {e}")
+        self.rescreens.finish(run)
+        self.stdout.write(self.style.SUCCESS(f"Re-screen run {run.pk} finished"))
+
+    def _process_batch(self, run, batch, pool):
+        # Fetched per batch so requirement edits made during the run are picked up.
+        index = RequirementIndexService.for_position(JobPosition.objects.get(pk=run.position_id))
+        counts = {'processed': len(batch), 'unchanged': 0, 'reassessed': 0, 'full': 0, 'failed': 0,
+                  'decisions_changed': 0, 'prompt_tokens': 0, 'completion_tokens': 0}
+        futures, last_error = {}, None
+        for assessment in batch:
+            plan, previous = self.rescreens.plan(assessment, index)
+            if plan == PLAN_UNCHANGED:
+                counts['unchanged'] += 1
+            else:
+                futures[pool.submit(self.rescreens.assess, assessment, index, plan, previous)] = (assessment, plan)
+        for future in as_completed(futures):
+            assessment, plan = futures[future]
+            try:
+                result = future.result()
+                if result.get('error'):
+                    raise ValueError(result['error'])
+                decision_changed = update_assessment(assessment, build_screening_result(result))
+            except Exception as e:
+                logger.error(f"Re-screening assessment {assessment.pk} failed: {str(e)}")
+                counts['failed'] += 1
+                last_error = f"Assessment {assessment.pk}: {e}"
+                continue
+            counts['reassessed' if plan == PLAN_REASSESS else 'full'] += 1
+            counts['decisions_changed'] += int(decision_changed)
+            for field in ('prompt_tokens', 'completion_tokens'):
+                counts[field] += (result.get('usage') or {}).get(field) or 0
+        self.rescreens.record_progress(run, batch[-1].pk, counts, last_error)
@@ -0,0 +1,145 @@
+import logging
+import os
+import signal
+import socket
+import threading
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from Screener.models import ScreeningJob
+from Screener.services.metrics import start_metrics_server
+from Screener.services.service_registry import ServiceRegistry
+from Screener.tracing import trace
+from Screener.views import (
+    build_applicant_data, build_screening_result, duplicate_screening_result, ensure_resume_text,
+    record_screening_metrics, record_screening_outcome,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = ('Screen batch-mode jobs (applicants of positions with batch_screening) through the LLM batch API. '
+            'Waiting jobs are submitted as JSONL batches once LLM_BATCH_MAX_REQUESTS are queued or the oldest has '
+            'waited LLM_BATCH_MAX_WAIT seconds; ended batches are turned into assessments and applicant emails.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--poll-interval', type=float, default=getattr(settings, 'LLM_BATCH_POLL_INTERVAL', 60),
+                            help='Seconds between checks of submitted batches and the queue.')
+        parser.add_argument('--submit-now', action='store_true',
+                            help='Submit waiting jobs right away instead of waiting for a full batch.')
+        parser.add_argument('--once', action='store_true',
+                            help='Check submitted batches and submit waiting jobs once, then exit.')
+        parser.add_argument('--until-idle', action='store_true',
+                            help='Exit once no batch-mode job is waiting and no batch is running, e.g. after '
+                                 'a backlog was queued.')
+        parser.add_argument('--metrics-port', type=int,
+                            help='Serve this process\'s Prometheus metrics on this port at /metrics.')
+
+    def handle(self, *args, **options):
+        self.stop_event = threading.Event()
+        signal.signal(signal.SIGINT, self._request_stop)
+        signal.signal(signal.SIGTERM, self._request_stop)
+        if options['metrics_port']:
+            start_metrics_server(options['metrics_port'])
+
+        self.worker_id = f"llm-batch-{socket.gethostname()}-{os.getpid()}"
+        self.job_queue = ServiceRegistry.get('job_queue')
+        self.email_outbox = ServiceRegistry.get('email_outbox')
+        self.rag_service = ServiceRegistry.get('rag')
+        self.batches = ServiceRegistry.get('llm_batches')
+        submit_now = options['submit_now'] or options['until_idle']
+        while not self.stop_event.is_set():
+            close_old_connections()
+            self._poll()
+            backlog = self._submit(submit_now)
+            if options['once'] or (options['until_idle'] and not backlog and not self.batches.active()):
+                break
+            self.stop_event.wait(options['poll_interval'])
+        self.stdout.write(self.style.SUCCESS('LLM batch runner stopped'))
+
+    def _request_stop(self, signum, frame):
+        self.stdout.write('Stop requested; submitted batches are picked up again on the next run')
+        self.stop_event.set()
+
+    def _poll(self):
+        """Finish the jobs of ended batches."""
+        for batch in self.batches.active():
+            try:
+                outcomes = self.batches.poll(batch)
+            except Exception as e:
+                logger.error(f"Checking LLM batch {batch.pk} failed: {str(e)}")
+                continue
+            if outcomes is None:
+                continue
+            for job, assessment_result in outcomes:
+                with trace(f"job-{job.pk}"):
+                    self._finish(job, assessment_result)
+            self.batches.close(batch, outcomes)
+            self.stdout.write(f"LLM batch {batch.pk} {batch.provider_status}: {batch.answered_count} assessed, "
+                              f"{batch.failed_count} failed")
+
+    def _submit(self, submit_now):
+        """Submit waiting jobs when a batch is due; returns how many jobs are left waiting."""
+        self.job_queue.expire_leases(ScreeningJob.MODE_BATCH)
+        backlog, oldest = self.job_queue.batch_backlog()
+        if not (backlog and (submit_now or self.batches.is_due(backlog, oldest))):
+            return backlog
+        while not self.stop_event.is_set():
+            jobs = self.job_queue.claim_batch(self.worker_id, self.batches.max_requests)
+            entries = {}
+            for job in jobs:
+                with trace(f"job-{job.pk}"):
+                    prepared = self._prepare(job)
+                if prepared is not None:
+                    entries.setdefault(prepared[0], []).append((job, prepared[1]))
+            for backend_name, backend_entries in entries.items():
+                try:
+                    batch = self.batches.submit(backend_name, backend_entries)
+                except Exception as e:
+                    logger.error(f"Submitting {len(backend_entries)} jobs to {backend_name} failed: {str(e)}")
+                    for job, _ in backend_entries:
+                        self.job_queue.fail(job, f"LLM batch submission failed: {e}")
+                    continue
+                self.stdout.write(f"Submitted LLM batch {batch.pk} with {batch.request_count} jobs to {backend_name}")
+            if len(jobs) < self.batches.max_requests:
+                break
+        return self.job_queue.batch_backlog()[0]
+
+    def _prepare(self, job):
+        """(backend name, batch request) for a claimed job, or None when it was settled without the batch API."""
+        try:
+            ensure_resume_text(job.resume)
+            duplicate_result = duplicate_screening_result(job.resume)
+            if duplicate_result is not None:
+                self.job_queue.complete(job, duplicate_result)
+                return None
+            index = self.rag_service.requirement_index(job.resume.position)
+            backend_name = self.rag_service.backend_name(index)
+            if not self.batches.supports_batches(backend_name):
+                logger.info(f"Backend {backend_name} has no batch API, screening job {job.pk} interactively")
+                self.job_queue.release(job, mode=ScreeningJob.MODE_INTERACTIVE)
+                return None
+            assessment_result, request = self.rag_service.prepare_batch_request(job.resume.resume_text, index)
+        except Exception as e:
+            self.job_queue.fail(job, e)
+            return None
+        if request is None:
+            # Screened out by the pre-screen or answered from the cache.
+            self._finish(job, assessment_result)
+            return None
+        return backend_name, request
+
+    def _finish(self, job, assessment_result):
+        record_screening_metrics(assessment_result)
+        if assessment_result.get('error'):
+            result = {'success': False, 'error': assessment_result['error'], 'assessment': None}
+        else:
+            result = build_screening_result(assessment_result)
+        try:
+            record_screening_outcome(job, build_applicant_data(job.resume), result, self.email_outbox, self.job_queue)
+        except Exception as e:
+            logger.error(f"Recording the outcome of screening job {job.pk} failed: {str(e)}")
+            self.job_queue.fail(job, e)
@@ -0,0 +1,91 @@
+import logging
+import os
+import signal
+import socket
+import threading
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection
+
+from Screener.services.metrics import start_metrics_server
+from Screener.services.service_registry import ServiceRegistry
+from Screener.tracing import trace
+from Screener.views import process_screening_job
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Run a pool of workers that claim, process and retry queued resume screening jobs.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4, help='Number of worker threads (default: 4).')
+        parser.add_argument('--poll-interval', type=float, default=2.0,
+                            help='Seconds an idle worker sleeps before polling the queue again.')
+        parser.add_argument('--once', action='store_true',
+                            help='Drain the currently available jobs and exit instead of polling forever.')
+        parser.add_argument('--metrics-port', type=int,
+                            help='Serve this process\'s Prometheus metrics on this port at /metrics.')
+
+    def handle(self, *args, **options):
+        self.stop_event = threading.Event()
+        signal.signal(signal.SIGINT, self._request_stop)
+        signal.signal(signal.SIGTERM, self._request_stop)
+
+        if options['metrics_port']:
+            start_metrics_server(options['metrics_port'])
+        prefix = f"{socket.gethostname()}-{os.getpid()}"
+        threads = [
+            threading.Thread(
+                target=self._worker_loop,
+                args=(f"{prefix}-{n}", options['poll_interval'], options['once']),
+                name=f"screener-worker-{n}",
+            )
+            for n in range(options['workers'])
+        ]
+        self.stdout.write(f"Starting {len(threads)} screening workers ({prefix})")
+        for thread in threads:
+            thread.start()
+        # Join with a timeout so the main thread keeps receiving signals.
+        while any(thread.is_alive() for thread in threads):
+            for thread in threads:
+                thread.join(timeout=0.5)
+        self.stdout.write(self.style.SUCCESS('Screening workers stopped'))
+
+    def _request_stop(self, signum, frame):
+        self.stdout.write('Stop requested, finishing in-flight jobs...')
+        self.stop_event.set()
+
+    def _worker_loop(self, worker_id, poll_interval, once):
+        # Shared by all worker threads; the services hold no per-job state.
+        try:
+            job_queue = ServiceRegistry.get('job_queue')
+            rag_service = ServiceRegistry.get('rag')
+            email_outbox = ServiceRegistry.get('email_outbox')
+        except Exception as e:
+            logger.error(f"Failed to initialize services for {worker_id}: {str(e)}")
+            self.stderr.write(f"{worker_id}: service initialization failed: {e}")
+            return
+        try:
+            while not self.stop_event.is_set():
+                close_old_connections()
+                try:
+                    job = job_queue.claim(worker_id)
+                except Exception as e:
+                    logger.error(f"Screening worker {worker_id} failed to claim a job: {str(e)}")
+                    self.stop_event.wait(poll_interval)
+                    continue
+                if job is None:
+                    if once:
+                        break
+                    try:
+                        job_queue.expire_leases()
+                    except Exception as e:
+                        logger.error(f"Screening worker {worker_id} failed to expire job leases: {str(e)}")
+                    self.stop_event.wait(poll_interval)
+                    continue
+                with trace(f"job-{job.pk}"):
+                    logger.info(f"{worker_id} processing screening job {job.pk} (attempt {job.attempts})")
+                    process_screening_job(job, rag_service, email_outbox, job_queue)
+        finally:
+            connection.close()
@@ -0,0 +1,257 @@
+import csv
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+
+from django.core.files import File
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from Screener.models import Assessment, JobPosition, Resume
+from Screener.services.pdf_parser_service import PDFParserService
+from Screener.services.requirement_index import RequirementIndexService
+from Screener.services.service_registry import ServiceRegistry
+from Screener.views import build_assessment, build_screening_result, screen_resume
+
+logger = logging.getLogger(__name__)
+
+REPORT_FIELDS = ['source', 'sha256', 'name', 'status', 'meets_requirements', 'matched_positions', 'prescreen_tier',
+                 'resume_id', 'error']
+
+
+class Command(BaseCommand):
+    help = ('Screen every PDF in a directory or ZIP archive. Extraction runs in the PDFParserService process pool, '
+            'LLM calls run with bounded concurrency, and progress is checkpointed so an '
+            'interrupted run can be resumed by re-running the same command.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('source', help='Directory (searched recursively) or .zip archive of PDF resumes.')
+        parser.add_argument('--report', help='Report path; .csv or .jsonl (default: <source>.screen_batch.csv).')
+        parser.add_argument('--checkpoint',
+                            help='Progress file used to resume interrupted runs (default: <report>.checkpoint.jsonl).')
+        parser.add_argument('--extract-workers', type=int, default=os.cpu_count() or 2,
+                            help='Processes used for PDF text extraction.')
+        parser.add_argument('--concurrency', type=int, default=4, help='Maximum concurrent LLM assessments.')
+        parser.add_argument('--batch-size', type=int, default=50, help='Resume rows written per transaction.')
+        parser.add_argument('--position', action='append', dest='positions', metavar='SLUG',
+                            help='Position to screen against; repeat to evaluate every resume against several '
+                                 'positions in one batched assessment (default: SCREENER_DEFAULT_POSITION).')
+        parser.add_argument('--retry-failed', action='store_true',
+                            help='Reprocess files that failed in a previous run instead of skipping them.')
+
+    def handle(self, *args, **options):
+        source = Path(options['source'])
+        if not source.exists():
+            raise CommandError(f"{source} does not exist")
+        report_path = Path(options['report'] or f"{source.with_suffix('')}.screen_batch.csv")
+        if report_path.suffix not in ('.csv', '.jsonl'):
+            raise CommandError('--report must end in .csv or .jsonl')
+        checkpoint_path = Path(options['checkpoint'] or f"{report_path}.checkpoint.jsonl")
+        self.batch_size = max(1, options['batch_size'])
+        self.positions = self._load_positions(options['positions'])
+
+        with tempfile.TemporaryDirectory(prefix='screen_batch_') as workdir:
+            documents = self._collect_documents(source, Path(workdir))
+            done = self._load_checkpoint(checkpoint_path, options['retry_failed'])
+            pending = [doc for doc in documents if doc['sha256'] not in done]
+            self.stdout.write(f"{len(documents)} PDFs found, {len(documents) - len(pending)} already screened, "
+                              f"{len(pending)} to process")
+
+            started = time.monotonic()
+            processed = 0
+            if pending:
+                with open(checkpoint_path, 'a', encoding='utf-8') as checkpoint:
+                    self.checkpoint = checkpoint
+                    processed = self._run(pending, options['extract_workers'], options['concurrency'])
+            elapsed = time.monotonic() - started
+
+        self._write_report(report_path, self._load_checkpoint(checkpoint_path, retry_failed=False))
+        rate = processed / (elapsed / 60) if elapsed > 0 else 0.0
+        self.stdout.write(self.style.SUCCESS(
+            f"Screened {processed} resumes in {elapsed:.1f}s ({rate:.1f} resumes/min). Report: {report_path}"
+        ))
+
+    def _load_positions(self, slugs):
+        if not slugs:
+            return [RequirementIndexService.default_position()]
+        positions = {position.slug: position for position in JobPosition.objects.filter(slug__in=slugs)}
+        missing = [slug for slug in slugs if slug not in positions]
+        if missing:
+            raise CommandError(f"Unknown position(s): {', '.join(missing)}")
+        return [positions[slug] for slug in dict.fromkeys(slugs)]
+
+    def _collect_documents(self, source, workdir):
+        """List PDFs with their content hash; ZIP members are extracted under workdir."""
+        documents = []
+        if source.is_dir():
+            for path in sorted(source.rglob('*')):
+                if path.is_file() and path.suffix.lower() == '.pdf':
+                    documents.append({'source': str(path.relative_to(source)), 'path': str(path)})
+        elif zipfile.is_zipfile(source):
+            with zipfile.ZipFile(source) as archive:
+                members = [m for m in archive.infolist() if not m.is_dir() and m.filename.lower().endswith('.pdf')]
+                for index, member in enumerate(sorted(members, key=lambda m: m.filename)):
+                    # Never trust member paths from the archive; write under a generated name.
+                    target = workdir / f"{index:06d}.pdf"
+                    with archive.open(member) as src, open(target, 'wb') as dst:
+                        shutil.copyfileobj(src, dst)
+                    documents.append({'source': member.filename, 'path': str(target)})
+        else:
+            raise CommandError(f"{source} is neither a directory nor a ZIP archive")
+        for doc in documents:
+            digest = hashlib.sha256()
+            with open(doc['path'], 'rb') as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                    digest.update(chunk)
+            doc['sha256'] = digest.hexdigest()
+            doc['name'] = Path(doc['source']).stem.replace('_', ' ').replace('-', ' ').strip() or 'Unknown'
+        return documents
+
+    def _load_checkpoint(self, checkpoint_path, retry_failed):
+        """Map sha256 -> latest checkpoint entry. Failed entries are dropped when retry_failed is set."""
+        entries = {}
+        if checkpoint_path.exists():
+            with open(checkpoint_path, encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # a line cut short by an interruption
+                    entries[entry['sha256']] = entry
+        if retry_failed:
+            entries = {key: entry for key, entry in entries.items() if entry['status'] == 'screened'}
+        return entries
+
+    def _run(self, pending, extract_workers, concurrency):
+        rag_service = ServiceRegistry.get('rag')
+        # Size the extraction process pool for this run; each dispatch thread drives one worker process.
+        PDFParserService.configure(max_workers=extract_workers)
+        buffer = []
+        processed = 0
+        with ThreadPoolExecutor(max_workers=extract_workers) as extract_pool, \
+                ThreadPoolExecutor(max_workers=concurrency) as llm_pool:
+            extracting = {extract_pool.submit(PDFParserService.extract_resume_text, doc['path'], doc['sha256']): doc
+                          for doc in pending}
+            screening = {}
+            while extracting or screening:
+                finished, _ = wait(list(extracting) + list(screening), return_when=FIRST_COMPLETED)
+                for future in finished:
+                    if future in extracting:
+                        doc = extracting.pop(future)
+                        try:
+                            doc['resume_text'] = future.result()
+                        except Exception as e:
+                            self._record(doc, 'extraction_failed', error=str(e))
+                            processed += 1
+                            continue
+                        screening[llm_pool.submit(self._screen, doc, rag_service)] = doc
+                    else:
+                        doc = screening.pop(future)
+                        doc['result'] = future.result()
+                        buffer.append(doc)
+                        processed += 1
+                        if len(buffer) >= self.batch_size:
+                            self._flush(buffer)
+                            buffer = []
+            self._flush(buffer)
+        return processed
+
+    def _screen(self, doc, rag_service):
+        if len(self.positions) == 1:
+            applicant_data = {
+                'name': doc['name'],
+                'email': '',
+                'resume_path': doc['path'],
+                'resume_text': doc['resume_text'],
+                'position': self.positions[0],
+            }
+            return screen_resume(applicant_data, rag_service, None)
+        try:
+            results = rag_service.process_resume_for_positions(doc['resume_text'], self.positions)
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+        position_results = {
+            position.slug: build_screening_result(results[position.slug])
+            for position in self.positions if not results[position.slug].get('error')
+        }
+        matched = [slug for slug, result in position_results.items() if result['meets_requirements']]
+        return {'success': True, 'meets_requirements': bool(matched), 'matched_positions': matched,
+                'position_results': position_results}
+
+    def _flush(self, docs):
+        """Store a batch of screened resumes in one transaction, then checkpoint them."""
+        if not docs:
+            return
+        resumes = []
+        duplicates = ServiceRegistry.get('duplicates')
+        for doc in docs:
+            resume = Resume(name=doc['name'], email='', resume_text=doc['resume_text'], position=self.positions[0])
+            # Fingerprint for near-duplicate detection of later uploads (and link to earlier ones).
+            duplicates.fingerprint(resume)
+            match = duplicates.find_duplicate(resume)
+            resume.duplicate_of = match[0] if match else None
+            resume.sha256 = doc['sha256']
+            with open(doc['path'], 'rb') as f:
+                stored = File(f)
+                stored.sha256 = doc['sha256']  # content-addressed storage need not hash it again
+                resume.resume_file.save(Path(doc['source']).name, stored, save=False)
+            resumes.append(resume)
+        positions = {position.slug: position for position in self.positions}
+        with transaction.atomic():
+            Resume.objects.bulk_create(resumes)
+            assessments = []
+            for doc, resume in zip(docs, resumes):
+                result = doc['result']
+                if not result.get('success', False):
+                    continue
+                for slug, position_result in (result.get('position_results') or {self.positions[0].slug: result}).items():
+                    assessments.append(build_assessment(resume, position_result, positions[slug]))
+            Assessment.objects.bulk_create(assessments)
+        for doc, resume in zip(docs, resumes):
+            result = doc['result']
+            if result.get('success', False):
+                prescreen = result.get('prescreen') or {}
+                matched = result.get('matched_positions')
+                if matched is None:
+                    matched = [self.positions[0].slug] if result['meets_requirements'] else []
+                self._record(doc, 'screened', meets_requirements=result['meets_requirements'], resume_id=resume.pk,
+                             prescreen_tier=prescreen.get('tier'), matched_positions=' '.join(matched))
+            else:
+                self._record(doc, 'screening_failed', resume_id=resume.pk, error=result.get('error'))
+        self.checkpoint.flush()
+        os.fsync(self.checkpoint.fileno())
+
+    def _record(self, doc, status, meets_requirements=None, resume_id=None, error=None, prescreen_tier=None,
+                matched_positions=''):
+        entry = {
+            'source': doc['source'],
+            'sha256': doc['sha256'],
+            'name': doc['name'],
+            'status': status,
+            'meets_requirements': meets_requirements,
+            'matched_positions': matched_positions,
+            'prescreen_tier': prescreen_tier,
+            'resume_id': resume_id,
+            'error': error,
+        }
+        self.checkpoint.write(json.dumps(entry) + '\n')
+        if status != 'screened':
+            logger.error(f"Batch screening {status} for {doc['source']}: {error}")
+
+    def _write_report(self, report_path, entries):
+        rows = sorted(entries.values(), key=lambda entry: entry['source'])
+        with open(report_path, 'w', encoding='utf-8', newline='') as f:
+            if report_path.suffix == '.jsonl':
+                for row in rows:
+                    f.write(json.dumps(row) + '\n')
+            else:
+                writer = csv.DictWriter(f, fieldnames=REPORT_FIELDS)
+                writer.writeheader()
+                writer.writerows(rows)
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from Screener.models import JobPosition
+from Screener.services.digest_service import RecruiterDigestService
+
+
+class Command(BaseCommand):
+    help = ('Queue recruiter digests (one ranked summary of new qualified applicants per position) '
+            'for positions whose digest window has elapsed. dispatch_emails sends them.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--position', action='append', default=[],
+                            help='Slug of a position to build a digest for (repeatable); defaults to all due positions.')
+        parser.add_argument('--force', action='store_true',
+                            help='Build the digest now even if the position\'s window has not elapsed.')
+
+    def handle(self, *args, **options):
+        digests = RecruiterDigestService()
+        if not options['position'] and not options['force']:
+            queued = digests.build_due()
+        else:
+            positions = JobPosition.objects.filter(recruiter_notification=JobPosition.NOTIFY_DIGEST)
+            if options['position']:
+                positions = positions.filter(slug__in=options['position'])
+                missing = set(options['position']) - set(positions.values_list('slug', flat=True))
+                if missing:
+                    raise CommandError(f"Unknown or non-digest positions: {', '.join(sorted(missing))}")
+            queued = sum(digests.build(position, force=options['force']) is not None for position in positions)
+        self.stdout.write(self.style.SUCCESS(f"Queued {queued} recruiter digests"))
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:43
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Screener', '0002_screeningjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AssessmentCacheEntry',
+            fields=[
+                ('key', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('detailed_assessment', models.TextField()),
+                ('meets_requirements', models.BooleanField()),
+                ('raw_response', models.TextField(blank=True)),
+                ('model_name', models.CharField(max_length=100)),
+                ('hit_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_hit_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+                ('expires_at', models.DateTimeField(db_index=True)),
+            ],
+        ),
+    ]
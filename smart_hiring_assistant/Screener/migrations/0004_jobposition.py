@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-18 21:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Screener', '0003_assessmentcacheentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobPosition',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=200)),
+                ('slug', models.SlugField(max_length=100, unique=True)),
+                ('description', models.TextField(blank=True)),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['title'],
+            },
+        ),
+        migrations.AddField(
+            model_name='resume',
+            name='position',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='resumes', to='Screener.jobposition'),
+        ),
+        migrations.CreateModel(
+            name='JobRequirement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('description', models.TextField()),
+                ('keywords', models.CharField(blank=True, help_text='Comma-separated terms a matching resume is expected to mention.', max_length=500)),
+                ('order', models.PositiveIntegerField(default=0)),
+                ('position', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='requirements', to='Screener.jobposition')),
+            ],
+            options={
+                'ordering': ['order', 'pk'],
+            },
+        ),
+    ]
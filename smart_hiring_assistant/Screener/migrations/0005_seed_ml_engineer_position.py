@@ -0,0 +1,58 @@
+from django.db import migrations
+
+# The requirements previously hardcoded in RAGService.
+ML_ENGINEER_REQUIREMENTS = [
+    ('Education',
+     "Bachelor's or Master's degree in computer science, engineering, mathematics, or related fields; "
+     "coursework in machine learning or data science is preferred.",
+     'computer science, engineering, mathematics, machine learning, data science'),
+    ('Programming',
+     '2+ years of experience with Python, R, or similar languages; proficiency in TensorFlow, PyTorch, '
+     'or other ML frameworks.',
+     'python, r, tensorflow, pytorch, scikit-learn'),
+    ('Machine Learning',
+     '2+ years of practical experience with ML algorithms, model deployment, and optimization.',
+     'machine learning, deployment, model, optimization'),
+    ('Software Engineering',
+     'Familiarity with Git, Agile methodologies, and collaborative tools; experience in software '
+     'development teams for at least 2-3 years.',
+     'git, agile, scrum, software development'),
+    ('Problem-Solving',
+     'Strong analytical skills, with a track record of solving complex problems using machine learning '
+     'techniques.',
+     'analytical, problem solving'),
+    ('Communication',
+     'Effective communicator across technical and non-technical audiences; experience working in '
+     'cross-functional teams.',
+     'communication, cross-functional, stakeholders'),
+    ('Portfolio',
+     'Demonstrated projects in machine learning through work experience, academic research, or personal '
+     'projects; contributions to open-source projects or participation in hackathons.',
+     'open-source, github, hackathon, research, projects'),
+]
+
+
+def seed_ml_engineer(apps, schema_editor):
+    JobPosition = apps.get_model('Screener', 'JobPosition')
+    JobRequirement = apps.get_model('Screener', 'JobRequirement')
+    position, created = JobPosition.objects.get_or_create(slug='ml-engineer', defaults={'title': 'ML Engineer'})
+    if created:
+        JobRequirement.objects.bulk_create([
+            JobRequirement(position=position, name=name, description=description, keywords=keywords, order=order)
+            for order, (name, description, keywords) in enumerate(ML_ENGINEER_REQUIREMENTS)
+        ])
+
+
+def remove_ml_engineer(apps, schema_editor):
+    apps.get_model('Screener', 'JobPosition').objects.filter(slug='ml-engineer').delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Screener', '0004_jobposition'),
+    ]
+
+    operations = [
+        migrations.RunPython(seed_ml_engineer, remove_ml_engineer),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-18 21:03
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Screener', '0005_seed_ml_engineer_position'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Assessment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('email', models.EmailField(blank=True, max_length=254)),
+                ('decision', models.CharField(choices=[('qualified', 'Qualified'), ('not_qualified', 'Not qualified'), ('screened_out', 'Screened out before LLM review')], max_length=16)),
+                ('detailed_assessment', models.TextField(blank=True)),
+                ('raw_response', models.TextField(blank=True)),
+                ('score', models.FloatField(blank=True, null=True)),
+                ('requirement_scores', models.JSONField(blank=True, default=dict)),
+                ('model_name', models.CharField(blank=True, max_length=100)),
+                ('prompt_version', models.CharField(blank=True, max_length=16)),
+                ('prompt_tokens', models.PositiveIntegerField(blank=True, null=True)),
+                ('completion_tokens', models.PositiveIntegerField(blank=True, null=True)),
+                ('latency_ms', models.PositiveIntegerField(blank=True, null=True)),
+                ('timings', models.JSONField(blank=True, default=dict)),
+                ('cached', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('position', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='assessments', to='Screener.jobposition')),
+                ('resume', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='assessments', to='Screener.resume')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['position', 'decision', 'created_at'], name='screener_assess_pos_dec_idx'), models.Index(fields=['email'], name='screener_assess_email_idx')],
+            },
+        ),
+    ]
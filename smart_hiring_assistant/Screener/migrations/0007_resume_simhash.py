@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-18 21:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Screener', '0006_assessment'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='resume',
+            name='duplicate_of',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='duplicates', to='Screener.resume'),
+        ),
+        migrations.AddField(
+            model_name='resume',
+            name='simhash',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='resume',
+            name='simhash_band0',
+            field=models.PositiveIntegerField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='resume',
+            name='simhash_band1',
+            field=models.PositiveIntegerField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='resume',
+            name='simhash_band2',
+            field=models.PositiveIntegerField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='resume',
+            name='simhash_band3',
+            field=models.PositiveIntegerField(blank=True, db_index=True, null=True),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-18 21:11
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Screener', '0008_emailoutbox'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jobposition',
+            name='digest_window_minutes',
+            field=models.PositiveIntegerField(default=60),
+        ),
+        migrations.AddField(
+            model_name='jobposition',
+            name='recruiter_email',
+            field=models.EmailField(blank=True, help_text='Defaults to the RECRUITER_EMAIL environment variable.', max_length=254),
+        ),
+        migrations.AddField(
+            model_name='jobposition',
+            name='recruiter_notification',
+            field=models.CharField(choices=[('immediate', 'One email per qualified applicant'), ('digest', 'Periodic digest of qualified applicants')], default='digest', max_length=16),
+        ),
+        migrations.AlterField(
+            model_name='emailoutbox',
+            name='kind',
+            field=models.CharField(choices=[('rejection', 'Rejection'), ('recruiter_forward', 'Recruiter forward'), ('recruiter_digest', 'Recruiter digest')], max_length=32),
+        ),
+        migrations.CreateModel(
+            name='RecruiterDigest',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_assessment_id', models.PositiveBigIntegerField(default=0)),
+                ('last_sent_at', models.DateTimeField(blank=True, null=True)),
+                ('next_due_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('position', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='digest', to='Screener.jobposition')),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 21:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Screener', '0009_recruiter_digest'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='assessment',
+            name='llm_score',
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
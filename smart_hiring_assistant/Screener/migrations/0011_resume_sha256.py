@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 21:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Screener', '0010_assessment_llm_score'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='resume',
+            name='sha256',
+            field=models.CharField(blank=True, db_index=True, max_length=64),
+        ),
+    ]
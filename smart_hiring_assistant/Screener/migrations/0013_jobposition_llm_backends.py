@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 21:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Screener', '0012_rescreen'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jobposition',
+            name='llm_backend',
+            field=models.CharField(blank=True, help_text='LLM_BACKENDS entry for the assessment; defaults to LLM_DEFAULT_BACKEND.', max_length=50),
+        ),
+        migrations.AddField(
+            model_name='jobposition',
+            name='triage_backend',
+            field=models.CharField(blank=True, help_text='LLM_BACKENDS entry for a cheaper first pass; only applicants it qualifies are assessed by the main backend. Defaults to LLM_STAGE_BACKENDS["triage"] (none if unset).', max_length=50),
+        ),
+    ]
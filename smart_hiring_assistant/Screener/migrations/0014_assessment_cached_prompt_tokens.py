@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 21:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Screener', '0013_jobposition_llm_backends'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='assessment',
+            name='cached_prompt_tokens',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='assessment',
+            name='tokens_estimated',
+            field=models.BooleanField(default=False),
+        ),
+    ]
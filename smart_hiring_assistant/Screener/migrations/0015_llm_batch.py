@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-18 21:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Screener', '0014_assessment_cached_prompt_tokens'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LLMBatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('backend', models.CharField(max_length=50)),
+                ('provider_batch_id', models.CharField(blank=True, max_length=100)),
+                ('provider_status', models.CharField(blank=True, max_length=32)),
+                ('status', models.CharField(choices=[('submitted', 'Submitted'), ('completed', 'Completed'), ('failed', 'Failed')], default='submitted', max_length=16)),
+                ('input_file', models.CharField(max_length=500)),
+                ('requests', models.JSONField(default=dict)),
+                ('request_count', models.PositiveIntegerField(default=0)),
+                ('answered_count', models.PositiveIntegerField(default=0)),
+                ('failed_count', models.PositiveIntegerField(default=0)),
+                ('prompt_tokens', models.PositiveBigIntegerField(default=0)),
+                ('completion_tokens', models.PositiveBigIntegerField(default=0)),
+                ('last_error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('checked_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='jobposition',
+            name='batch_screening',
+            field=models.BooleanField(default=False, help_text='Screen applicants through the LLM batch API (run_llm_batches): cheaper, with results within LLM_BATCH_COMPLETION_WINDOW instead of right away. For career fairs and other bulk intakes.'),
+        ),
+        migrations.AddField(
+            model_name='screeningjob',
+            name='mode',
+            field=models.CharField(choices=[('interactive', 'Interactive (run_screener_workers)'), ('batch', 'LLM batch (run_llm_batches)')], default='interactive', max_length=16),
+        ),
+    ]
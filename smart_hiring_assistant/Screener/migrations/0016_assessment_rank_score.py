@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 21:54
+
+from django.db import migrations, models
+from django.db.models import F, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_rank_score(apps, schema_editor):
+    # Assessment.rank_score_for in one UPDATE: the LLM fit, else the pre-screen similarity on 0-100.
+    Assessment = apps.get_model('Screener', 'Assessment')
+    Assessment.objects.update(rank_score=Coalesce(F('llm_score'), F('score') * 100, Value(0.0)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Screener', '0015_llm_batch'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='assessment',
+            name='rank_score',
+            field=models.FloatField(default=0.0),
+        ),
+        migrations.RunPython(backfill_rank_score, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='assessment',
+            index=models.Index(fields=['position', 'decision', '-rank_score', '-id'], name='screener_assess_rank_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 22:01
+
+import Screener.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Screener', '0016_assessment_rank_score'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='resume',
+            name='resume_file',
+            field=models.FileField(storage=Screener.storage.resume_storage, upload_to='resumes/'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:40
+
+from django.db import migrations, models
+
+
+def clear_similarity_ranks(apps, schema_editor):
+    # 0016 ranked assessments without an LLM score by the pre-screen similarity; they now rank as NULL.
+    Assessment = apps.get_model('Screener', 'Assessment')
+    Assessment.objects.filter(llm_score__isnull=True).update(rank_score=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Screener', '0017_resume_file_content_addressed'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='assessment',
+            name='rank_score',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.RunPython(clear_similarity_ranks, migrations.RunPython.noop),
+    ]
@@ -1,12 +1,373 @@
+import uuid
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
 from django.db import models
+from django.utils import timezone
+
+from .storage import resume_storage
 
 # Create your models here.
 
+class JobPosition(models.Model):
+    """An opening candidates are screened against; its requirements are JobRequirement rows."""
+    NOTIFY_IMMEDIATE = 'immediate'
+    NOTIFY_DIGEST = 'digest'
+    NOTIFY_CHOICES = [
+        (NOTIFY_IMMEDIATE, 'One email per qualified applicant'),
+        (NOTIFY_DIGEST, 'Periodic digest of qualified applicants'),
+    ]
+
+    title = models.CharField(max_length=200)
+    slug = models.SlugField(max_length=100, unique=True)
+    description = models.TextField(blank=True)
+    is_active = models.BooleanField(default=True)
+    recruiter_email = models.EmailField(blank=True, help_text='Defaults to the RECRUITER_EMAIL environment variable.')
+    recruiter_notification = models.CharField(max_length=16, choices=NOTIFY_CHOICES, default=NOTIFY_DIGEST)
+    digest_window_minutes = models.PositiveIntegerField(default=60)
+    llm_backend = models.CharField(max_length=50, blank=True,
+                                   help_text='LLM_BACKENDS entry for the assessment; defaults to LLM_DEFAULT_BACKEND.')
+    triage_backend = models.CharField(max_length=50, blank=True,
+                                      help_text='LLM_BACKENDS entry for a cheaper first pass; only applicants it '
+                                                'qualifies are assessed by the main backend. Defaults to '
+                                                'LLM_STAGE_BACKENDS["triage"] (none if unset).')
+    batch_screening = models.BooleanField(default=False,
+                                          help_text='Screen applicants through the LLM batch API (run_llm_batches): '
+                                                    'cheaper, with results within LLM_BATCH_COMPLETION_WINDOW instead '
+                                                    'of right away. For career fairs and other bulk intakes.')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['title']
+
+    def __str__(self):
+        return self.title
+
+    def clean(self):
+        backends = getattr(settings, 'LLM_BACKENDS', {})
+        errors = {field: f"Unknown LLM backend '{getattr(self, field)}'; choose one of {', '.join(backends)}."
+                  for field in ('llm_backend', 'triage_backend')
+                  if getattr(self, field) and getattr(self, field) not in backends}
+        if errors:
+            raise ValidationError(errors)
+
+    def requirements_text(self):
+        """The requirements as "Name: description" lines, the format the screening prompt expects."""
+        return '\n'.join(f"{requirement.name}: {requirement.description}" for requirement in self.requirements.all())
+
+
+class JobRequirement(models.Model):
+    position = models.ForeignKey(JobPosition, on_delete=models.CASCADE, related_name='requirements')
+    name = models.CharField(max_length=100)
+    description = models.TextField()
+    keywords = models.CharField(max_length=500, blank=True,
+                                help_text='Comma-separated terms a matching resume is expected to mention.')
+    order = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['order', 'pk']
+
+    def __str__(self):
+        return f"{self.position}: {self.name}"
+
+    def keyword_list(self):
+        return [keyword.strip().lower() for keyword in self.keywords.split(',') if keyword.strip()]
+
+
 class Resume(models.Model):
     name = models.CharField(max_length=255)
     email = models.EmailField()
-    resume_file = models.FileField(upload_to='resumes/')
+    resume_file = models.FileField(upload_to='resumes/', storage=resume_storage)  # content-addressed, see STORAGES
     resume_text = models.TextField()
+    # SHA-256 of the uploaded file, computed while it streams in; identical files reuse resume_text.
+    sha256 = models.CharField(max_length=64, blank=True, db_index=True)
+    position = models.ForeignKey(JobPosition, on_delete=models.SET_NULL, null=True, blank=True, related_name='resumes')
+    # 64-bit SimHash of resume_text (signed for the DB) and its four 16-bit bands; any resume
+    # within 3 bits shares at least one band, so near-duplicate lookups are indexed equality.
+    simhash = models.BigIntegerField(null=True, blank=True)
+    simhash_band0 = models.PositiveIntegerField(null=True, blank=True, db_index=True)
+    simhash_band1 = models.PositiveIntegerField(null=True, blank=True, db_index=True)
+    simhash_band2 = models.PositiveIntegerField(null=True, blank=True, db_index=True)
+    simhash_band3 = models.PositiveIntegerField(null=True, blank=True, db_index=True)
+    duplicate_of = models.ForeignKey('self', on_delete=models.SET_NULL, null=True, blank=True, related_name='duplicates')
     created_at = models.DateTimeField(auto_now_add=True)
     def __str__(self):
-        return f"{self.name} - {self.email}"
\ No newline at end of file
+        return f"{self.name} - {self.email}"
+
+
+class ScreeningJob(models.Model):
+    """
+    A durable unit of screening work, claimed and processed by run_screener_workers, or by
+    run_llm_batches for jobs in the batch mode (positions with batch_screening).
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+    MODE_INTERACTIVE = 'interactive'
+    MODE_BATCH = 'batch'
+    MODE_CHOICES = [
+        (MODE_INTERACTIVE, 'Interactive (run_screener_workers)'),
+        (MODE_BATCH, 'LLM batch (run_llm_batches)'),
+    ]
+
+    public_id = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+    resume = models.ForeignKey(Resume, on_delete=models.CASCADE, related_name='screening_jobs')
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    mode = models.CharField(max_length=16, choices=MODE_CHOICES, default=MODE_INTERACTIVE)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    available_at = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=64, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    result = models.JSONField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'available_at'], name='screener_job_claim_idx'),
+        ]
+
+    def __str__(self):
+        return f"ScreeningJob #{self.pk} ({self.status}) for {self.resume}"
+
+
+class LLMBatch(models.Model):
+    """
+    Screening jobs submitted together to a backend's batch API by run_llm_batches. requests
+    maps each request's custom_id to its job and the state RAGService.finish_batch_request
+    needs to turn the answer into an assessment once the batch has ended.
+    """
+    STATUS_SUBMITTED = 'submitted'
+    STATUS_COMPLETED = 'completed'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_SUBMITTED, 'Submitted'),
+        (STATUS_COMPLETED, 'Completed'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    backend = models.CharField(max_length=50)  # LLM_BACKENDS name
+    provider_batch_id = models.CharField(max_length=100, blank=True)
+    provider_status = models.CharField(max_length=32, blank=True)  # as last reported, e.g. in_progress, expired
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=STATUS_SUBMITTED)
+    input_file = models.CharField(max_length=500)
+    requests = models.JSONField(default=dict)
+    request_count = models.PositiveIntegerField(default=0)
+    answered_count = models.PositiveIntegerField(default=0)
+    failed_count = models.PositiveIntegerField(default=0)
+    prompt_tokens = models.PositiveBigIntegerField(default=0)
+    completion_tokens = models.PositiveBigIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    checked_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"LLMBatch #{self.pk} ({self.status}, {self.request_count} requests) on {self.backend}"
+
+
+class AssessmentCacheEntry(models.Model):
+    """Cached LLM assessment keyed by a hash of resume text, requirements, prompt and model."""
+    key = models.CharField(max_length=64, primary_key=True)
+    detailed_assessment = models.TextField()
+    meets_requirements = models.BooleanField()
+    raw_response = models.TextField(blank=True)
+    model_name = models.CharField(max_length=100)
+    hit_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_hit_at = models.DateTimeField(default=timezone.now, db_index=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"AssessmentCacheEntry {self.key[:12]} ({self.model_name})"
+
+
+class AssessmentQuerySet(models.QuerySet):
+    def for_position(self, position):
+        return self.filter(position=position)
+
+    def qualified(self):
+        return self.filter(decision=Assessment.DECISION_QUALIFIED)
+
+    def for_email(self, email):
+        return self.filter(email=email.lower())
+
+
+class Assessment(models.Model):
+    """Outcome of screening one resume against one position, with what it cost to produce."""
+    DECISION_QUALIFIED = 'qualified'
+    DECISION_NOT_QUALIFIED = 'not_qualified'
+    DECISION_SCREENED_OUT = 'screened_out'
+    DECISION_CHOICES = [
+        (DECISION_QUALIFIED, 'Qualified'),
+        (DECISION_NOT_QUALIFIED, 'Not qualified'),
+        (DECISION_SCREENED_OUT, 'Screened out before LLM review'),
+    ]
+
+    resume = models.ForeignKey(Resume, on_delete=models.CASCADE, related_name='assessments')
+    position = models.ForeignKey(JobPosition, on_delete=models.SET_NULL, null=True, blank=True,
+                                 related_name='assessments')
+    email = models.EmailField(blank=True)  # copied from the resume so lookups by candidate need no join
+    decision = models.CharField(max_length=16, choices=DECISION_CHOICES)
+    detailed_assessment = models.TextField(blank=True)
+    raw_response = models.TextField(blank=True)
+    score = models.FloatField(null=True, blank=True)  # pre-screen similarity
+    llm_score = models.FloatField(null=True, blank=True)  # 0-100 fit from a structured LLM assessment
+    # Shortlist order (rank_score_for), fixed when the assessment is stored so listing never computes it.
+    rank_score = models.FloatField(null=True, blank=True)
+    requirement_scores = models.JSONField(default=dict, blank=True)
+    # {requirement name: version} of the requirements assessed (RequirementIndex.requirement_versions)
+    requirement_versions = models.JSONField(default=dict, blank=True)
+    model_name = models.CharField(max_length=100, blank=True)
+    prompt_version = models.CharField(max_length=16, blank=True)
+    prompt_tokens = models.PositiveIntegerField(null=True, blank=True)
+    completion_tokens = models.PositiveIntegerField(null=True, blank=True)
+    # Prompt tokens the provider served from its prompt cache (the stable per-position prefix).
+    cached_prompt_tokens = models.PositiveIntegerField(null=True, blank=True)
+    # Counts are local estimates (PromptBuilder/TokenCounter): backends that report no usage.
+    tokens_estimated = models.BooleanField(default=False)
+    latency_ms = models.PositiveIntegerField(null=True, blank=True)
+    timings = models.JSONField(default=dict, blank=True)
+    cached = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    rescreened_at = models.DateTimeField(null=True, blank=True)
+
+    objects = AssessmentQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['position', 'decision', 'created_at'], name='screener_assess_pos_dec_idx'),
+            models.Index(fields=['email'], name='screener_assess_email_idx'),
+            # Keyset pages of the recruiter shortlist: best first within a position and decision.
+            models.Index(fields=['position', 'decision', '-rank_score', '-id'], name='screener_assess_rank_idx'),
+        ]
+
+    def __str__(self):
+        return f"Assessment #{self.pk} ({self.decision}) for {self.resume}"
+
+    @property
+    def meets_requirements(self):
+        return self.decision == self.DECISION_QUALIFIED
+
+    @staticmethod
+    def rank_score_for(llm_score):
+        """
+        0-100 ranking score: the LLM's fit, or None when it gave none (streamed and text-format
+        assessments). The pre-screen similarity is on another scale, so it is never used in its
+        place: unscored assessments rank after every scored one.
+        """
+        return float(llm_score) if llm_score is not None else None
+
+
+class EmailOutbox(models.Model):
+    """
+    A candidate or recruiter email waiting to be sent. Rows are written in the same
+    transaction as the screening outcome and drained in batches by dispatch_emails.
+    """
+    KIND_REJECTION = 'rejection'
+    KIND_RECRUITER_FORWARD = 'recruiter_forward'
+    KIND_RECRUITER_DIGEST = 'recruiter_digest'
+    KIND_CHOICES = [
+        (KIND_REJECTION, 'Rejection'),
+        (KIND_RECRUITER_FORWARD, 'Recruiter forward'),
+        (KIND_RECRUITER_DIGEST, 'Recruiter digest'),
+    ]
+    STATUS_PENDING = 'pending'
+    STATUS_SENDING = 'sending'
+    STATUS_SENT = 'sent'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_SENDING, 'Sending'),
+        (STATUS_SENT, 'Sent'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    idempotency_key = models.CharField(max_length=128, unique=True)
+    kind = models.CharField(max_length=32, choices=KIND_CHOICES)
+    to_email = models.EmailField()
+    to_name = models.CharField(max_length=255, blank=True)
+    context = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    available_at = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=64, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    batch_key = models.CharField(max_length=64, blank=True)
+    last_error = models.TextField(blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'available_at'], name='screener_outbox_claim_idx'),
+        ]
+
+    def __str__(self):
+        return f"EmailOutbox #{self.pk} ({self.kind}, {self.status}) to {self.to_email}"
+
+
+class RecruiterDigest(models.Model):
+    """Digest state for a position: the last assessment already included and when the next digest is due."""
+    position = models.OneToOneField(JobPosition, on_delete=models.CASCADE, related_name='digest')
+    last_assessment_id = models.PositiveBigIntegerField(default=0)
+    last_sent_at = models.DateTimeField(null=True, blank=True)
+    next_due_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"RecruiterDigest for {self.position} (after #{self.last_assessment_id})"
+
+
+class RescreenRun(models.Model):
+    """
+    Re-screening of a position's stored assessments after its requirements changed, run by
+    `manage.py rescreen_applicants`. Counters are updated after every batch, so the row
+    doubles as the run's progress report; last_assessment_id lets a stopped run resume.
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CANCELLED = 'cancelled'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed'),
+        (STATUS_CANCELLED, 'Cancelled'),
+    ]
+
+    position = models.ForeignKey(JobPosition, on_delete=models.CASCADE, related_name='rescreen_runs')
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    total = models.PositiveIntegerField(default=0)
+    processed = models.PositiveIntegerField(default=0)
+    unchanged = models.PositiveIntegerField(default=0)  # no requirement they were assessed on changed
+    reassessed = models.PositiveIntegerField(default=0)  # only changed and added requirements sent to the LLM
+    full = models.PositiveIntegerField(default=0)  # screened from scratch (no reusable statuses)
+    failed = models.PositiveIntegerField(default=0)
+    decisions_changed = models.PositiveIntegerField(default=0)
+    prompt_tokens = models.PositiveBigIntegerField(default=0)
+    completion_tokens = models.PositiveBigIntegerField(default=0)
+    last_assessment_id = models.PositiveBigIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"RescreenRun #{self.pk} ({self.status}) for {self.position}: {self.processed}/{self.total}"
+
+    @property
+    def percent_done(self):
+        return round(100 * self.processed / self.total, 1) if self.total else 100.0
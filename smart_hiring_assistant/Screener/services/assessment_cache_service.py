@@ -0,0 +1,104 @@
+import hashlib
+import logging
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F, Q
+from django.utils import timezone
+
+from Screener.models import AssessmentCacheEntry
+
+logger = logging.getLogger(__name__)
+
+
+class AssessmentCacheService:
+    """
+    Persistent cache of LLM assessments.
+    Entries expire after ASSESSMENT_CACHE_TTL seconds and the table is trimmed to
+    ASSESSMENT_CACHE_MAX_ENTRIES, evicting the least recently hit entries first. Eviction
+    runs once every ASSESSMENT_CACHE_EVICT_EVERY sets in a process, so the table can exceed
+    the limit by that many entries in between.
+    Hit/miss counters are process-wide.
+    """
+    _stats_lock = threading.Lock()
+    _stats = {'hits': 0, 'misses': 0, 'sets': 0, 'evictions': 0}
+
+    def __init__(self, ttl=None, max_entries=None, evict_every=None):
+        self.ttl = ttl if ttl is not None else getattr(settings, 'ASSESSMENT_CACHE_TTL', 30 * 24 * 3600)
+        self.max_entries = max_entries if max_entries is not None else getattr(settings, 'ASSESSMENT_CACHE_MAX_ENTRIES', 10000)
+        self.evict_every = max(1, evict_every if evict_every is not None
+                               else getattr(settings, 'ASSESSMENT_CACHE_EVICT_EVERY', 100))
+
+    @staticmethod
+    def make_key(resume_text, job_requirements, prompt_template, model_name):
+        """Hash the inputs that determine an assessment. Whitespace differences in the resume are ignored."""
+        digest = hashlib.sha256()
+        for part in (' '.join(resume_text.split()), job_requirements.strip(), prompt_template, model_name):
+            digest.update(part.encode('utf-8'))
+            digest.update(b'\x00')
+        return digest.hexdigest()
+
+    def get(self, key):
+        """Return the cached assessment dict for key, or None on a miss or expired entry."""
+        now = timezone.now()
+        entry = AssessmentCacheEntry.objects.filter(key=key, expires_at__gt=now).first()
+        if entry is None:
+            self._record('misses')
+            return None
+        AssessmentCacheEntry.objects.filter(key=key).update(hit_count=F('hit_count') + 1, last_hit_at=now)
+        self._record('hits')
+        return {
+            'detailed_assessment': entry.detailed_assessment,
+            'meets_requirements': entry.meets_requirements,
+            'raw_response': entry.raw_response,
+            'cached': True,
+        }
+
+    def set(self, key, assessment, model_name):
+        now = timezone.now()
+        AssessmentCacheEntry.objects.update_or_create(
+            key=key,
+            defaults={
+                'detailed_assessment': assessment['detailed_assessment'],
+                'meets_requirements': assessment['meets_requirements'],
+                'raw_response': assessment.get('raw_response', ''),
+                'model_name': model_name,
+                'last_hit_at': now,
+                'expires_at': now + timedelta(seconds=self.ttl),
+            },
+        )
+        if self._record('sets') % self.evict_every == 0:
+            self.evict(now)
+
+    def evict(self, now=None):
+        """Drop expired entries, then the least recently hit ones beyond max_entries."""
+        now = now or timezone.now()
+        evicted, _ = AssessmentCacheEntry.objects.filter(expires_at__lte=now).delete()
+        # The first entry past the limit in recency order, found on the last_hit_at index
+        # without counting the table; it and everything hit less recently are evicted.
+        boundary = (AssessmentCacheEntry.objects.order_by('-last_hit_at', '-key')
+                    .values_list('last_hit_at', 'key')[self.max_entries:self.max_entries + 1].first())
+        if boundary is not None:
+            last_hit_at, key = boundary
+            deleted, _ = AssessmentCacheEntry.objects.filter(
+                Q(last_hit_at__lt=last_hit_at) | Q(last_hit_at=last_hit_at, key__lte=key)
+            ).delete()
+            evicted += deleted
+        if evicted:
+            self._record('evictions', evicted)
+        return evicted
+
+    @classmethod
+    def _record(cls, counter, amount=1):
+        with cls._stats_lock:
+            cls._stats[counter] += amount
+            return cls._stats[counter]
+
+    @classmethod
+    def stats(cls):
+        with cls._stats_lock:
+            stats = dict(cls._stats)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+        return stats
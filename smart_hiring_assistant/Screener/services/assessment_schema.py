@@ -0,0 +1,128 @@
+import json
+
+# Structured assessment returned by the model as JSON (RAG_OUTPUT_FORMAT 'tool' or 'json_schema').
+STATUS_MET = 'met'
+STATUS_PARTIAL = 'partial'
+STATUS_UNMET = 'unmet'
+STATUSES = (STATUS_MET, STATUS_PARTIAL, STATUS_UNMET)
+DECISIONS = ('qualified', 'not_qualified')
+
+TOOL_NAME = 'record_assessment'
+
+# Completion budget: the JSON skeleton, decision and summary, plus one short evidence
+# sentence per requirement. Anything longer is the model drifting into prose.
+BASE_MAX_TOKENS = 200
+MAX_TOKENS_PER_REQUIREMENT = 80
+
+
+def assessment_schema(requirement_names):
+    """JSON schema of the assessment for a position with the given requirement names."""
+    name_schema = {'type': 'string'}
+    if requirement_names:
+        name_schema['enum'] = list(requirement_names)
+    return {
+        'type': 'object',
+        'properties': {
+            'requirements': {
+                'type': 'array',
+                'items': {
+                    'type': 'object',
+                    'properties': {
+                        'name': name_schema,
+                        'status': {'type': 'string', 'enum': list(STATUSES)},
+                        'evidence': {'type': 'string'},
+                    },
+                    'required': ['name', 'status', 'evidence'],
+                    'additionalProperties': False,
+                },
+            },
+            'score': {'type': 'number'},
+            'summary': {'type': 'string'},
+            'decision': {'type': 'string', 'enum': list(DECISIONS)},
+        },
+        'required': ['requirements', 'score', 'summary', 'decision'],
+        'additionalProperties': False,
+    }
+
+
+def max_tokens_for(requirement_names):
+    return BASE_MAX_TOKENS + MAX_TOKENS_PER_REQUIREMENT * max(len(requirement_names), 1)
+
+
+def request_options(output_format, schema, max_tokens):
+    """Chat completion keyword arguments that make the model answer with schema."""
+    if output_format == 'json_schema':
+        return {
+            'response_format': {
+                'type': 'json_schema',
+                'json_schema': {'name': TOOL_NAME, 'schema': schema, 'strict': True},
+            },
+            'max_tokens': max_tokens,
+        }
+    return {
+        'tools': [{
+            'type': 'function',
+            'function': {
+                'name': TOOL_NAME,
+                'description': 'Record the assessment of the candidate against every requirement.',
+                'parameters': schema,
+            },
+        }],
+        'tool_choice': {'type': 'function', 'function': {'name': TOOL_NAME}},
+        'max_tokens': max_tokens,
+    }
+
+
+def completion_text(message):
+    """The JSON arguments of the forced tool call, or the message content."""
+    tool_calls = getattr(message, 'tool_calls', None)
+    if tool_calls:
+        return tool_calls[0].function.arguments
+    return message.content or ''
+
+
+def parse_structured_assessment(text, requirement_names=()):
+    """
+    Parse and validate a structured assessment in one pass; raises ValueError if it is
+    not JSON or does not match the schema. Returns the process_resume result fields.
+    """
+    try:
+        data = json.loads(text)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Assessment is not JSON: {e}")
+    if not isinstance(data, dict):
+        raise ValueError('Assessment is not a JSON object')
+    decision = data.get('decision')
+    if decision not in DECISIONS:
+        raise ValueError(f"Invalid decision {decision!r}")
+    score = data.get('score')
+    if isinstance(score, bool) or not isinstance(score, (int, float)) or not 0 <= score <= 100:
+        raise ValueError(f"Invalid score {score!r}")
+    summary = data.get('summary')
+    if not isinstance(summary, str):
+        raise ValueError('Missing summary')
+    items = data.get('requirements')
+    if not isinstance(items, list):
+        raise ValueError('Missing requirements')
+    known = set(requirement_names)
+    requirements, lines = {}, []
+    for item in items:
+        if not isinstance(item, dict):
+            raise ValueError('Requirement entry is not an object')
+        name, status, evidence = item.get('name'), item.get('status'), item.get('evidence', '')
+        if not isinstance(name, str) or (known and name not in known):
+            raise ValueError(f"Unknown requirement {name!r}")
+        if status not in STATUSES:
+            raise ValueError(f"Invalid status {status!r} for {name}")
+        if not isinstance(evidence, str):
+            raise ValueError(f"Invalid evidence for {name}")
+        requirements[name] = {'status': status, 'evidence': evidence}
+        lines.append(f"{name}: {status}" + (f" - {evidence}" if evidence else ''))
+    lines += ['', summary.strip(), '', f"Score: {score:g}/100"]
+    return {
+        'detailed_assessment': '\n'.join(lines).strip(),
+        'meets_requirements': decision == 'qualified',
+        'raw_response': text,
+        'llm_score': float(score),
+        'requirements': requirements,
+    }
@@ -0,0 +1,139 @@
+import logging
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.html import escape
+from django.utils.text import Truncator
+
+from Screener.models import Assessment, EmailOutbox, JobPosition, RecruiterDigest
+from Screener.services.email_outbox_service import EmailOutboxService
+
+logger = logging.getLogger(__name__)
+
+
+class RecruiterDigestService:
+    """
+    Periodic recruiter digests for positions in digest mode.
+    Each position keeps a cursor (the last assessment already sent), so a digest reads only
+    qualified assessments created since the previous one, ranks them by rank_score and
+    queues one summary email through the outbox. The cursor moves in the same transaction
+    as the enqueue, and the outbox idempotency key is derived from it, so a digest is never
+    queued twice or skipped.
+    """
+    def __init__(self, email_outbox=None):
+        self.email_outbox = email_outbox or EmailOutboxService()
+        self.max_candidates = getattr(settings, 'RECRUITER_DIGEST_MAX_CANDIDATES', 50)
+        self.base_url = getattr(settings, 'SCREENER_BASE_URL', 'http://localhost:8000').rstrip('/')
+
+    def due_positions(self, now=None):
+        now = now or timezone.now()
+        return JobPosition.objects.filter(recruiter_notification=JobPosition.NOTIFY_DIGEST).filter(
+            Q(digest__isnull=True) | Q(digest__next_due_at__lte=now)
+        )
+
+    def build_due(self, now=None):
+        """Queue a digest for every position whose window has elapsed. Returns the number queued."""
+        now = now or timezone.now()
+        queued = 0
+        for position in self.due_positions(now):
+            try:
+                if self.build(position, now) is not None:
+                    queued += 1
+            except Exception as e:
+                logger.error(f"Building the recruiter digest for {position.slug} failed: {str(e)}")
+        return queued
+
+    def build(self, position, now=None, force=False):
+        """Queue the digest for one position; returns the outbox row, or None if nothing was due or new."""
+        now = now or timezone.now()
+        digest, _ = RecruiterDigest.objects.get_or_create(position=position, defaults={'next_due_at': now})
+        if not force and digest.next_due_at > now:
+            return None
+        next_due_at = now + timedelta(minutes=position.digest_window_minutes)
+        assessments = list(
+            Assessment.objects.for_position(position).qualified()
+            .filter(pk__gt=digest.last_assessment_id)
+            .select_related('resume')
+            .only('pk', 'rank_score', 'detailed_assessment', 'created_at',
+                  'resume__name', 'resume__email', 'resume__resume_file')
+            .order_by('pk')
+        )
+        if not assessments:
+            # Nothing new: start a fresh window so the next applicant is collected, not sent alone.
+            RecruiterDigest.objects.filter(pk=digest.pk, last_assessment_id=digest.last_assessment_id).update(
+                next_due_at=next_due_at,
+            )
+            return None
+        recipient = position.recruiter_email or os.getenv('RECRUITER_EMAIL')
+        if not recipient:
+            # Retry after another window rather than on every run; the applicants stay in the next digest.
+            RecruiterDigest.objects.filter(pk=digest.pk, last_assessment_id=digest.last_assessment_id).update(
+                next_due_at=next_due_at,
+            )
+            logger.error(f"No recruiter email for {position.slug}; digest of {len(assessments)} applicants kept "
+                         f"until {next_due_at:%Y-%m-%d %H:%M}")
+            return None
+
+        context = self.render(position, assessments, digest.last_sent_at, now)
+        with transaction.atomic():
+            advanced = RecruiterDigest.objects.filter(
+                pk=digest.pk, last_assessment_id=digest.last_assessment_id,
+            ).update(last_assessment_id=assessments[-1].pk, last_sent_at=now, next_due_at=next_due_at)
+            if not advanced:
+                logger.info(f"Recruiter digest for {position.slug} already built by another process")
+                return None
+            row = self.email_outbox.enqueue(
+                EmailOutbox.KIND_RECRUITER_DIGEST, recipient, '', context,
+                f"{EmailOutbox.KIND_RECRUITER_DIGEST}:position-{position.pk}:after-{digest.last_assessment_id}",
+            )
+        logger.info(f"Queued recruiter digest for {position.slug} with {len(assessments)} applicants")
+        return row
+
+    def render(self, position, assessments, since, now):
+        """Subject, plain and html bodies listing the applicants best first (as the shortlist does), with links."""
+        # Assessments without an LLM score (rank_score None) follow the scored ones.
+        ranked = sorted(assessments, key=lambda a: (a.rank_score is None, -(a.rank_score or 0.0), a.pk))
+        shown = ranked[:self.max_candidates]
+        period = f"since {since:%Y-%m-%d %H:%M}" if since else f"up to {now:%Y-%m-%d %H:%M}"
+        subject = f"{len(ranked)} qualified applicant{'s' if len(ranked) != 1 else ''} for {position.title}"
+
+        plain_lines = [f"Qualified applicants for {position.title} {period}, best fit first:", '']
+        html_rows = []
+        for rank, assessment in enumerate(shown, start=1):
+            resume = assessment.resume
+            score = f"{assessment.rank_score:.0f}" if assessment.rank_score is not None else 'n/a'
+            summary = Truncator(' '.join(assessment.detailed_assessment.split())).chars(300)
+            resume_url = self._url(resume.resume_file.url) if resume.resume_file else ''
+            assessment_url = self._url(reverse('admin:Screener_assessment_change', args=[assessment.pk]))
+            plain_lines += [
+                f"{rank}. {resume.name} <{resume.email}> (fit {score})",
+                f"   {summary}",
+                f"   Resume: {resume_url}",
+                f"   Assessment: {assessment_url}",
+                '',
+            ]
+            html_rows.append(
+                f"<tr><td>{rank}</td><td>{escape(resume.name)}<br>{escape(resume.email)}</td><td>{score}</td>"
+                f"<td>{escape(summary)}</td>"
+                f"<td><a href=\"{escape(resume_url)}\">Resume</a> | <a href=\"{escape(assessment_url)}\">Assessment</a></td></tr>"
+            )
+        if len(ranked) > len(shown):
+            more = f"...and {len(ranked) - len(shown)} more qualified applicants."
+            plain_lines.append(more)
+            html_rows.append(f"<tr><td colspan=\"5\">{more}</td></tr>")
+
+        html = (
+            f"<p>Qualified applicants for <strong>{escape(position.title)}</strong> {period}, "
+            f"best fit first:</p>"
+            f"<table><tr><th>#</th><th>Applicant</th><th>Fit</th><th>Summary</th><th>Links</th></tr>"
+            f"{''.join(html_rows)}</table>"
+        )
+        return {'subject': subject, 'plain': '\n'.join(plain_lines), 'html': html, 'count': len(ranked)}
+
+    def _url(self, path):
+        return f"{self.base_url}{path}"
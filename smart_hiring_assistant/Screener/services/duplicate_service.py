@@ -0,0 +1,108 @@
+import hashlib
+import logging
+import re
+
+import numpy as np
+from django.conf import settings
+from django.db.models import Q
+
+from Screener.models import Assessment, Resume
+
+logger = logging.getLogger(__name__)
+
+SIMHASH_BITS = 64
+BAND_BITS = 16
+BANDS = SIMHASH_BITS // BAND_BITS
+SHINGLE_SIZE = 3
+
+_WORD = re.compile(r'[a-z0-9]+')
+_BIT_SHIFTS = np.arange(SIMHASH_BITS, dtype=np.uint64)
+
+
+def simhash(text):
+    """64-bit SimHash over word 3-shingles; lightly edited copies differ in only a few bits."""
+    words = _WORD.findall(text.lower())
+    shingles = {' '.join(words[i:i + SHINGLE_SIZE]) for i in range(max(1, len(words) - SHINGLE_SIZE + 1))}
+    shingles.discard('')
+    if not shingles:
+        return 0
+    hashes = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(s.encode('utf-8'), digest_size=8).digest(), 'little') for s in shingles),
+        dtype=np.uint64, count=len(shingles),
+    )
+    bits = (hashes[:, None] >> _BIT_SHIFTS) & np.uint64(1)
+    votes = bits.sum(axis=0, dtype=np.int64) * 2 - len(shingles)
+    return sum(1 << bit for bit in np.flatnonzero(votes > 0).tolist())
+
+
+def bands(fingerprint):
+    return [(fingerprint >> (BAND_BITS * band)) & 0xFFFF for band in range(BANDS)]
+
+
+def to_signed(fingerprint):
+    return fingerprint - (1 << SIMHASH_BITS) if fingerprint >= 1 << (SIMHASH_BITS - 1) else fingerprint
+
+
+def to_unsigned(value):
+    return value & ((1 << SIMHASH_BITS) - 1)
+
+
+class DuplicateResumeService:
+    """
+    Near-duplicate detection for resumes applying to the same position.
+    Candidates are found through the indexed SimHash band columns (one equality lookup
+    per band) and confirmed by Hamming distance, so a check touches a handful of rows
+    whatever the table size. DUPLICATE_MAX_DISTANCE must stay below the number of bands
+    for the band lookup to find every match.
+    """
+    def __init__(self, max_distance=None):
+        max_distance = max_distance if max_distance is not None else getattr(settings, 'DUPLICATE_MAX_DISTANCE', 3)
+        self.max_distance = min(max_distance, BANDS - 1)
+
+    @staticmethod
+    def fingerprint(resume):
+        """Set the SimHash fields on resume from its resume_text (not saved)."""
+        fingerprint = simhash(resume.resume_text)
+        resume.simhash = to_signed(fingerprint)
+        resume.simhash_band0, resume.simhash_band1, resume.simhash_band2, resume.simhash_band3 = bands(fingerprint)
+        return fingerprint
+
+    def find_duplicate(self, resume):
+        """Earliest stored resume for the same position within max_distance bits, as (resume, distance), or None."""
+        if resume.simhash is None:
+            return None
+        fingerprint = to_unsigned(resume.simhash)
+        band_match = Q()
+        for band, value in enumerate(bands(fingerprint)):
+            band_match |= Q(**{f"simhash_band{band}": value})
+        # Filter only on the bands in SQL so the planner uses the band indexes (a position
+        # filter can make SQLite scan the position index instead); the rest is done here.
+        candidates = sorted(Resume.objects.filter(band_match).values_list('pk', 'simhash', 'duplicate_of', 'position'))
+        for pk, other, duplicate_of, position_id in candidates:
+            if pk == resume.pk or position_id != resume.position_id:
+                continue
+            distance = (fingerprint ^ to_unsigned(other)).bit_count()
+            if distance <= self.max_distance:
+                return Resume.objects.get(pk=duplicate_of or pk), distance
+        return None
+
+    def link(self, resume):
+        """Fingerprint resume, point duplicate_of at its original if it has one, and save. Returns the original."""
+        if not resume.resume_text:
+            return None
+        self.fingerprint(resume)
+        match = self.find_duplicate(resume)
+        resume.duplicate_of = match[0] if match else None
+        resume.save(update_fields=['simhash', 'simhash_band0', 'simhash_band1', 'simhash_band2', 'simhash_band3',
+                                   'duplicate_of'])
+        if match:
+            logger.info(f"Resume {resume.pk} is a near-duplicate of {match[0].pk} ({match[1]} bits apart)")
+        return resume.duplicate_of
+
+    @staticmethod
+    def previous_assessment(resume):
+        """Latest assessment of resume's original for the same position, if it has been screened."""
+        if resume.duplicate_of_id is None:
+            return None
+        return (Assessment.objects.filter(resume_id=resume.duplicate_of_id, position_id=resume.position_id)
+                .order_by('-created_at').first())
@@ -0,0 +1,108 @@
+import http.client
+import json
+import logging
+import os
+import threading
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+class EmailSendError(Exception):
+    def __init__(self, message, status_code=None, retryable=True):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retryable = retryable
+
+
+class SendGridHTTPBackend:
+    """
+    POSTs SendGrid v3 mail/send payloads over one persistent HTTPS connection.
+    The connection is kept open between calls and re-established once if the
+    server closed it; 429/5xx and connection errors raise a retryable EmailSendError.
+    """
+    def __init__(self, api_key=None, host=None, timeout=None):
+        self.api_key = api_key or os.getenv('SENDGRID_API_KEY')
+        self.host = host or getattr(settings, 'SENDGRID_API_HOST', 'api.sendgrid.com')
+        self.timeout = timeout or getattr(settings, 'SENDGRID_TIMEOUT', 30)
+        self._connection = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        if self.host.startswith('http://'):
+            return http.client.HTTPConnection(self.host[len('http://'):], timeout=self.timeout)
+        return http.client.HTTPSConnection(self.host.removeprefix('https://'), timeout=self.timeout)
+
+    def send(self, payload):
+        body = json.dumps(payload).encode('utf-8')
+        headers = {
+            'Authorization': f"Bearer {self.api_key}",
+            'Content-Type': 'application/json',
+        }
+        with self._lock:
+            for attempt in range(2):
+                if self._connection is None:
+                    self._connection = self._connect()
+                try:
+                    self._connection.request('POST', '/v3/mail/send', body=body, headers=headers)
+                    response = self._connection.getresponse()
+                    response_body = response.read()
+                    break
+                except (http.client.HTTPException, OSError) as e:
+                    self._close()
+                    if attempt:
+                        raise EmailSendError(f"SendGrid connection failed: {e}") from e
+                    # Probably a keep-alive connection the server already closed; retry once on a new one.
+        if response.status in (200, 202):
+            return response.status
+        message = f"SendGrid returned {response.status}: {response_body[:500].decode('utf-8', 'replace')}"
+        raise EmailSendError(message, status_code=response.status,
+                             retryable=response.status == 429 or response.status >= 500)
+
+    def _close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def close(self):
+        with self._lock:
+            self._close()
+
+
+class FakeEmailBackend:
+    """
+    Records payloads instead of sending them, for tests and local development.
+    Payloads are kept in memory (FakeEmailBackend.sent) and, if EMAIL_FAKE_OUTPUT is set,
+    appended to that file as JSON lines.
+    """
+    sent = []
+    _lock = threading.Lock()
+
+    def __init__(self, output_path=None):
+        self.output_path = output_path or getattr(settings, 'EMAIL_FAKE_OUTPUT', None)
+
+    def send(self, payload):
+        with self._lock:
+            self.sent.append(payload)
+            if self.output_path:
+                with open(self.output_path, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(payload) + '\n')
+        return 202
+
+    def close(self):
+        pass
+
+
+EMAIL_BACKENDS = {
+    'sendgrid': SendGridHTTPBackend,
+    'fake': FakeEmailBackend,
+}
+
+
+def get_email_backend(name=None):
+    name = name or getattr(settings, 'EMAIL_OUTBOX_BACKEND', 'sendgrid')
+    try:
+        return EMAIL_BACKENDS[name]()
+    except KeyError:
+        raise ValueError(f"Unknown EMAIL_OUTBOX_BACKEND '{name}'; expected one of {', '.join(EMAIL_BACKENDS)}")
@@ -0,0 +1,146 @@
+import hashlib
+import logging
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from Screener.models import EmailOutbox
+from Screener.services.email_backends import EmailSendError
+from Screener.services.sendgrid_service import (
+    MAX_PERSONALIZATIONS, PRERENDERED_KINDS, SendGridService, forward_substitutions,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class EmailOutboxService:
+    """
+    Transactional email outbox.
+    Screening writes rows with enqueue_* (inside its own transaction, so an email exists
+    if and only if the outcome was stored); dispatch() claims pending rows in batches
+    and sends each kind as one SendGrid request with a personalization per recipient.
+    Every row has a unique idempotency key, so retried screening jobs never queue the
+    same email twice, and sent rows are never claimed again.
+    """
+    def __init__(self, sendgrid_service=None):
+        self._sendgrid_service = sendgrid_service
+        self.batch_size = min(getattr(settings, 'EMAIL_OUTBOX_BATCH_SIZE', 500), MAX_PERSONALIZATIONS)
+        self.max_attempts = getattr(settings, 'EMAIL_OUTBOX_MAX_ATTEMPTS', 5)
+        self.retry_backoff = getattr(settings, 'EMAIL_OUTBOX_RETRY_BACKOFF', 60)
+        self.lease_seconds = getattr(settings, 'EMAIL_OUTBOX_LEASE_SECONDS', 300)
+
+    @property
+    def sendgrid_service(self):
+        # Built on first dispatch so enqueue-only callers never need email credentials.
+        if self._sendgrid_service is None:
+            self._sendgrid_service = SendGridService()
+        return self._sendgrid_service
+
+    def enqueue(self, kind, to_email, to_name, context, idempotency_key):
+        """Queue an email; returns the existing row if idempotency_key was already used."""
+        try:
+            with transaction.atomic():
+                return EmailOutbox.objects.create(
+                    idempotency_key=idempotency_key, kind=kind, to_email=to_email, to_name=to_name, context=context,
+                )
+        except IntegrityError:
+            existing = EmailOutbox.objects.filter(idempotency_key=idempotency_key).first()
+            if existing is None:
+                raise
+            logger.info(f"Email {idempotency_key} already queued")
+            return existing
+
+    def enqueue_rejection(self, applicant_data):
+        return self.enqueue(
+            EmailOutbox.KIND_REJECTION, applicant_data['email'], applicant_data['name'],
+            {'name': applicant_data['name']},
+            self._key(EmailOutbox.KIND_REJECTION, applicant_data),
+        )
+
+    def enqueue_recruiter_forward(self, recruiter_email, applicant_data, assessment):
+        return self.enqueue(
+            EmailOutbox.KIND_RECRUITER_FORWARD, recruiter_email, '',
+            forward_substitutions(applicant_data, assessment),
+            self._key(EmailOutbox.KIND_RECRUITER_FORWARD, applicant_data),
+        )
+
+    @staticmethod
+    def _key(kind, applicant_data):
+        resume_id = applicant_data.get('resume_id')
+        return f"{kind}:resume-{resume_id}" if resume_id else f"{kind}:{uuid.uuid4()}"
+
+    def _claimable(self, now):
+        stale_before = now - timedelta(seconds=self.lease_seconds)
+        return EmailOutbox.objects.filter(
+            Q(status=EmailOutbox.STATUS_PENDING, available_at__lte=now)
+            | Q(status=EmailOutbox.STATUS_SENDING, locked_at__lt=stale_before)
+        )
+
+    def claim_batch(self, worker_id):
+        """Lock up to batch_size sendable rows for this worker with one conditional UPDATE."""
+        now = timezone.now()
+        token = f"{worker_id}-{uuid.uuid4().hex[:8]}"
+        ids = list(self._claimable(now).order_by('available_at', 'pk').values_list('pk', flat=True)[:self.batch_size])
+        if not ids:
+            return []
+        self._claimable(now).filter(pk__in=ids).update(
+            status=EmailOutbox.STATUS_SENDING, locked_by=token, locked_at=now, attempts=F('attempts') + 1,
+        )
+        return list(EmailOutbox.objects.filter(locked_by=token, status=EmailOutbox.STATUS_SENDING).order_by('pk'))
+
+    def dispatch(self, worker_id='dispatcher'):
+        """Claim and send one batch. Returns (rows claimed, rows sent)."""
+        rows = self.claim_batch(worker_id)
+        by_kind = {}
+        for row in rows:
+            by_kind.setdefault(row.kind, []).append(row)
+        sent = 0
+        for kind, kind_rows in by_kind.items():
+            if kind in PRERENDERED_KINDS:
+                sent += sum(self._send(kind, [row]) for row in kind_rows)
+            else:
+                sent += self._send(kind, kind_rows)
+        return len(rows), sent
+
+    def _send(self, kind, rows):
+        batch_key = hashlib.sha256(','.join(str(row.pk) for row in rows).encode()).hexdigest()[:32]
+        recipients = [(row.to_email, row.to_name, row.context) for row in rows]
+        try:
+            self.sendgrid_service.send(kind, recipients, custom_args={'outbox_batch': batch_key})
+        except EmailSendError as e:
+            if not e.retryable and len(rows) > 1:
+                # One bad address can fail the whole request; isolate it by sending one by one.
+                logger.warning(f"Email batch {batch_key} rejected ({e}); sending {len(rows)} messages individually")
+                return sum(self._send(kind, [row]) for row in rows)
+            self._fail(rows, e)
+            return 0
+        except Exception as e:
+            self._fail(rows, e)
+            return 0
+        EmailOutbox.objects.filter(pk__in=[row.pk for row in rows]).update(
+            status=EmailOutbox.STATUS_SENT, sent_at=timezone.now(), batch_key=batch_key, locked_by='', last_error='',
+        )
+        logger.info(f"Sent {len(rows)} {kind} emails in batch {batch_key}")
+        return len(rows)
+
+    def _fail(self, rows, error):
+        retryable = getattr(error, 'retryable', True)
+        now = timezone.now()
+        for row in rows:
+            if retryable and row.attempts < self.max_attempts:
+                row.status = EmailOutbox.STATUS_PENDING
+                row.available_at = now + timedelta(seconds=self.retry_backoff * 2 ** (row.attempts - 1))
+            else:
+                row.status = EmailOutbox.STATUS_FAILED
+            row.last_error = str(error)
+            row.locked_by = ''
+            row.locked_at = None
+        EmailOutbox.objects.bulk_update(rows, ['status', 'available_at', 'last_error', 'locked_by', 'locked_at'])
+        logger.error(f"Failed to send {len(rows)} emails: {error}")
+
+    def pending_count(self):
+        return EmailOutbox.objects.filter(status__in=[EmailOutbox.STATUS_PENDING, EmailOutbox.STATUS_SENDING]).count()
@@ -0,0 +1,200 @@
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F, Q
+from django.utils import timezone
+
+from Screener.models import ScreeningJob
+
+logger = logging.getLogger(__name__)
+
+
+class JobQueueService:
+    """
+    Database-backed job queue for resume screening.
+    Claims are made with a conditional UPDATE so that several workers (threads or
+    processes) can share the table without a broker or row-level locks.
+    """
+    def __init__(self):
+        self.max_attempts = getattr(settings, 'SCREENER_JOB_MAX_ATTEMPTS', 3)
+        self.retry_backoff = getattr(settings, 'SCREENER_JOB_RETRY_BACKOFF', 30)
+        self.lease_seconds = getattr(settings, 'SCREENER_JOB_LEASE_SECONDS', 600)
+        # A batch-mode job stays claimed while its LLM batch runs (up to the completion window).
+        self.batch_lease_seconds = getattr(settings, 'LLM_BATCH_LEASE_SECONDS', 26 * 3600)
+
+    def enqueue(self, resume, delay=0):
+        """
+        Create a pending job; delay (seconds) holds it back from workers, e.g. for a streaming
+        client to claim. Resumes for positions with batch_screening go to the batch mode.
+        """
+        batch = resume.position is not None and resume.position.batch_screening
+        job = ScreeningJob.objects.create(
+            resume=resume,
+            mode=ScreeningJob.MODE_BATCH if batch else ScreeningJob.MODE_INTERACTIVE,
+            max_attempts=self.max_attempts,
+            available_at=timezone.now() + timedelta(seconds=0 if batch else delay),
+        )
+        logger.info(f"Enqueued {job.mode} screening job {job.pk} for resume {resume.pk}")
+        return job
+
+    def _stale(self, now, mode):
+        """Running jobs whose lease expired: the worker holding them died without completing or failing them."""
+        lease = self.batch_lease_seconds if mode == ScreeningJob.MODE_BATCH else self.lease_seconds
+        return Q(status=ScreeningJob.STATUS_RUNNING, locked_at__lt=now - timedelta(seconds=lease))
+
+    def _claimable(self, now, ignore_schedule=False, mode=ScreeningJob.MODE_INTERACTIVE):
+        # Pending jobs whose backoff has elapsed, plus stale running jobs with attempts left
+        # (expire_leases fails the others).
+        pending = Q(status=ScreeningJob.STATUS_PENDING)
+        if not ignore_schedule:
+            pending &= Q(available_at__lte=now)
+        return ScreeningJob.objects.filter(
+            pending | (self._stale(now, mode) & Q(attempts__lt=F('max_attempts'))), mode=mode
+        )
+
+    def expire_leases(self, mode=ScreeningJob.MODE_INTERACTIVE):
+        """
+        Permanently fail stale running jobs that have used all their attempts; they are never
+        claimed again. Returns how many were failed.
+        """
+        now = timezone.now()
+        stale = ScreeningJob.objects.filter(self._stale(now, mode), attempts__gte=F('max_attempts'), mode=mode)
+        expired = stale.update(
+            status=ScreeningJob.STATUS_FAILED,
+            last_error='The lease of the last attempt expired before the job completed',
+            locked_by='',
+            locked_at=None,
+            updated_at=now,
+        )
+        if expired:
+            logger.error(f"Failed {expired} {mode} screening jobs whose last attempt's lease expired")
+        return expired
+
+    def claim(self, worker_id, job_id=None):
+        """
+        Atomically claim the oldest available interactive job. Returns None if nothing is
+        claimable. A specific pending job can be claimed by job_id before its available_at.
+        """
+        now = timezone.now()
+        if job_id is not None:
+            candidates = self._claimable(now, ignore_schedule=True).filter(pk=job_id)
+        else:
+            candidates = self._claimable(now)
+        for candidate in candidates.order_by('available_at', 'pk').values('pk', 'status', 'locked_at')[:5]:
+            claimed = ScreeningJob.objects.filter(
+                pk=candidate['pk'], status=candidate['status'], locked_at=candidate['locked_at']
+            ).update(
+                status=ScreeningJob.STATUS_RUNNING,
+                attempts=F('attempts') + 1,
+                locked_by=worker_id,
+                locked_at=now,
+                updated_at=now,
+            )
+            if claimed:
+                return ScreeningJob.objects.select_related('resume', 'resume__position').get(pk=candidate['pk'])
+        return None
+
+    def claim_batch(self, worker_id, limit):
+        """
+        Claim up to limit available batch-mode jobs, oldest first, in one conditional UPDATE;
+        returns the jobs this worker got (another claimer may take some of the candidates).
+        """
+        now = timezone.now()
+        candidates = list(self._claimable(now, mode=ScreeningJob.MODE_BATCH)
+                          .order_by('available_at', 'pk').values_list('pk', flat=True)[:limit])
+        if not candidates:
+            return []
+        self._claimable(now, mode=ScreeningJob.MODE_BATCH).filter(pk__in=candidates).update(
+            status=ScreeningJob.STATUS_RUNNING,
+            attempts=F('attempts') + 1,
+            locked_by=worker_id,
+            locked_at=now,
+            updated_at=now,
+        )
+        return list(ScreeningJob.objects.filter(pk__in=candidates, status=ScreeningJob.STATUS_RUNNING,
+                                                locked_by=worker_id, locked_at=now)
+                    .select_related('resume', 'resume__position').order_by('pk'))
+
+    def batch_backlog(self):
+        """(number of batch-mode jobs ready to be submitted, when the oldest of them became available)."""
+        claimable = self._claimable(timezone.now(), mode=ScreeningJob.MODE_BATCH)
+        return claimable.count(), claimable.order_by('available_at').values_list('available_at', flat=True).first()
+
+    @staticmethod
+    def _held(job):
+        """
+        The job's row if it is still as the caller got it: same status, holder and lease. A
+        worker whose lease expired finds it taken over by another worker (or failed by
+        expire_leases), and its conditional UPDATE then matches nothing.
+        """
+        return ScreeningJob.objects.filter(pk=job.pk, status=job.status, locked_by=job.locked_by,
+                                           locked_at=job.locked_at)
+
+    def _lost(self, job, outcome):
+        logger.warning(f"Screening job {job.pk} is no longer held by {job.locked_by or 'its caller'}; "
+                       f"discarding its {outcome}")
+        return False
+
+    def complete(self, job, result):
+        """
+        Mark a claimed job done. Returns False, changing nothing, when the caller no longer
+        holds it; the caller must then discard the outcome (no assessment, no email).
+        """
+        now = timezone.now()
+        if not self._held(job).update(status=ScreeningJob.STATUS_DONE, result=result, last_error='', locked_by='',
+                                      locked_at=None, updated_at=now):
+            return self._lost(job, 'result')
+        job.status, job.result, job.last_error, job.locked_by, job.locked_at, job.updated_at = (
+            ScreeningJob.STATUS_DONE, result, '', '', None, now)
+        return True
+
+    def release(self, job, mode=None):
+        """
+        Hand a claimed job back to the queue without counting the attempt (e.g. client
+        disconnected), optionally moving it to another mode. Returns False if the caller no
+        longer held it, leaving the job (and its attempts) to whoever does.
+        """
+        now = timezone.now()
+        if not self._held(job).filter(status=ScreeningJob.STATUS_RUNNING).update(
+            status=ScreeningJob.STATUS_PENDING,
+            mode=mode or job.mode,
+            attempts=F('attempts') - 1,
+            available_at=now,
+            locked_by='',
+            locked_at=None,
+            updated_at=now,
+        ):
+            return self._lost(job, 'release')
+        return True
+
+    def fail(self, job, error, result=None):
+        """
+        Record a failed attempt; reschedule with exponential backoff until max_attempts is
+        reached. Returns False, changing nothing, when the caller no longer holds the job.
+        """
+        now = timezone.now()
+        if job.attempts < job.max_attempts:
+            status = ScreeningJob.STATUS_PENDING
+            available_at = now + timedelta(seconds=self.retry_backoff * 2 ** (job.attempts - 1))
+        else:
+            status, available_at = ScreeningJob.STATUS_FAILED, job.available_at
+        if not self._held(job).update(status=status, result=result, last_error=str(error), locked_by='',
+                                      locked_at=None, available_at=available_at, updated_at=now):
+            return self._lost(job, f"failure ({error})")
+        if status == ScreeningJob.STATUS_PENDING:
+            logger.warning(f"Screening job {job.pk} failed (attempt {job.attempts}), retrying at {available_at}: {error}")
+        else:
+            logger.error(f"Screening job {job.pk} failed permanently after {job.attempts} attempts: {error}")
+        job.status, job.result, job.last_error, job.locked_by, job.locked_at, job.available_at, job.updated_at = (
+            status, result, str(error), '', None, available_at, now)
+        return True
+
+    def queue_depth(self):
+        return ScreeningJob.objects.filter(
+            status__in=[ScreeningJob.STATUS_PENDING, ScreeningJob.STATUS_RUNNING]
+        ).count()
+
+    @staticmethod
+    def latest_for_resume(resume_id):
+        return ScreeningJob.objects.filter(resume_id=resume_id).order_by('-pk').first()
@@ -0,0 +1,368 @@
+"""
+Chat completion backends behind RAGService.
+
+A backend has a `model` name and the OpenAIService call interface:
+generate_chat_completion(messages, **kwargs), agenerate_chat_completion(messages, **kwargs)
+and astream_chat_completion(messages) (content deltas, then a final chunk with the usage if
+the backend reports it), returning OpenAI-shaped responses (choices[0].message.content /
+.tool_calls, usage). Backends are configured in LLM_BACKENDS
+like Django's CACHES:
+
+    LLM_BACKENDS = {
+        'openai': {'BACKEND': 'Screener.services.openai_service.OpenAIService'},
+        'local': {'BACKEND': 'Screener.services.llm_backends.LocalLLMBackend',
+                  'OPTIONS': {'BASE_URL': 'http://127.0.0.1:8080/v1', 'MODEL': 'qwen2.5-7b-instruct'}},
+    }
+
+and chosen per position (JobPosition.llm_backend / triage_backend) or per stage
+(LLM_STAGE_BACKENDS), falling back to LLM_DEFAULT_BACKEND.
+"""
+import asyncio
+import json
+import logging
+import re
+import shutil
+import threading
+import time
+import uuid
+import weakref
+from pathlib import Path
+from types import SimpleNamespace
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.module_loading import import_string
+
+from Screener.services.openai_service import OpenAIMetrics, OpenAIService
+from Screener.services.requirements import parse_requirement_sections
+
+logger = logging.getLogger(__name__)
+
+STAGE_TRIAGE = 'triage'  # optional first pass; only candidates it qualifies reach the assessment stage
+STAGE_ASSESSMENT = 'assessment'
+STAGES = (STAGE_TRIAGE, STAGE_ASSESSMENT)
+
+
+class LLMBackends:
+    """Process-wide instances of the backends named in LLM_BACKENDS, created on first use."""
+    _lock = threading.RLock()  # reentrant: a backend may wrap another (FileBatchBackend)
+    _instances = {}
+
+    @classmethod
+    def get(cls, name):
+        with cls._lock:
+            backend = cls._instances.get(name)
+            if backend is None:
+                config = getattr(settings, 'LLM_BACKENDS', {}).get(name)
+                if config is None:
+                    raise ImproperlyConfigured(f"Unknown LLM backend '{name}'; configure it in LLM_BACKENDS")
+                options = {key.lower(): value for key, value in config.get('OPTIONS', {}).items()}
+                backend = cls._instances[name] = import_string(config['BACKEND'])(**options)
+                logger.info(f"Created LLM backend {name} ({type(backend).__name__}, model {backend.model})")
+            return backend
+
+    @classmethod
+    def default(cls):
+        return cls.get(getattr(settings, 'LLM_DEFAULT_BACKEND', 'openai'))
+
+    @staticmethod
+    def names():
+        return list(getattr(settings, 'LLM_BACKENDS', {}))
+
+    @classmethod
+    def reset(cls):
+        with cls._lock:
+            cls._instances.clear()
+
+
+class LocalLLMBackend(OpenAIService):
+    """
+    A local OpenAI-compatible server, e.g. llama.cpp's llama-server or a vLLM/Ollama
+    endpoint running a small instruct model on the same box. It gets its own client and a
+    small concurrency limit (CPU inference serves few requests at a time), no rate limit,
+    and short retries. Servers without tool calling get forced tool calls rewritten as a
+    json_schema response_format, which llama-server turns into a grammar. There is no batch
+    API, so batch-mode jobs for a position on this backend are screened interactively.
+    """
+    supports_batches = False
+
+    def __init__(self, base_url, model='local', api_key='local', timeout=120.0, max_concurrency=2, max_retries=2,
+                 supports_tools=False):
+        self.model = model
+        self.metrics = OpenAIMetrics()  # per configured backend, not shared with OpenAIService
+        self.max_retries = max_retries
+        self.retry_base_delay = 0.5
+        self.retry_max_delay = 5.0
+        self.supports_tools = supports_tools
+        self._options = {'api_key': api_key, 'base_url': base_url, 'timeout': timeout, 'max_retries': 0}
+        self._max_concurrency = max_concurrency
+        self._lock = threading.Lock()
+        self._client = None
+        self._semaphore = threading.BoundedSemaphore(max_concurrency)
+        self._rate_limiter = None
+        self._async_clients = weakref.WeakKeyDictionary()
+        self._async_semaphores = weakref.WeakKeyDictionary()
+        self.client = self.shared_client()
+
+    def shared_client(self):
+        from openai import OpenAI
+
+        with self._lock:
+            if self._client is None:
+                self._client = OpenAI(**self._options)
+            return self._client
+
+    def shared_async_client(self):
+        from openai import AsyncOpenAI
+
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if loop not in self._async_clients:
+                self._async_clients[loop] = AsyncOpenAI(**self._options)
+                self._async_semaphores[loop] = asyncio.Semaphore(self._max_concurrency)
+            return self._async_clients[loop], self._async_semaphores[loop]
+
+    def _adapt(self, kwargs):
+        if self.supports_tools or 'tools' not in kwargs:
+            return kwargs
+        kwargs = dict(kwargs)
+        function = kwargs.pop('tools')[0]['function']
+        kwargs.pop('tool_choice', None)
+        kwargs['response_format'] = {
+            'type': 'json_schema',
+            'json_schema': {'name': function['name'], 'schema': function['parameters'], 'strict': True},
+        }
+        return kwargs
+
+    def generate_chat_completion(self, messages, **kwargs):
+        return super().generate_chat_completion(messages, **self._adapt(kwargs))
+
+    async def agenerate_chat_completion(self, messages, **kwargs):
+        return await super().agenerate_chat_completion(messages, **self._adapt(kwargs))
+
+
+_TERM = re.compile(r'[a-z][a-z0-9+#]{3,}')
+_RESUME_MARKER = re.compile(r"applicant's resume:", re.IGNORECASE)
+_POSITION_ENTRY = re.compile(r'POSITION (\S+) \(')
+_STATUS_VALUE = {'met': 1.0, 'partial': 0.5, 'unmet': 0.0}
+
+
+def _terms(text):
+    return set(_TERM.findall(text.lower()))
+
+
+class StubLLMBackend:
+    """
+    Deterministic offline backend for tests, demos and air-gapped installs. A requirement is
+    met when the resume mentions at least a third of the distinctive words of its
+    description (partial for any overlap); the score is the average and 60 or more is
+    qualified. Answers in whichever format the request asks for: forced tool call,
+    json_schema, the OVERALL_DECISION text format or the multi-position format.
+    """
+    def __init__(self, model='stub', latency=0.0):
+        self.model = model
+        self.latency = latency
+        self.metrics = OpenAIMetrics()
+
+    @staticmethod
+    def _split(messages):
+        """(prompt text before the resume, resume text)."""
+        text = '\n'.join(str(message.get('content') or '') for message in messages)
+        parts = _RESUME_MARKER.split(text)
+        return parts[0], parts[-1] if len(parts) > 1 else ''
+
+    @staticmethod
+    def _assess(requirements, resume_terms):
+        """{name: status} for [(name, description), ...]."""
+        statuses = {}
+        for name, description in requirements:
+            wanted = _terms(description)
+            overlap = len(wanted & resume_terms) / len(wanted) if wanted else 1.0
+            statuses[name] = 'met' if overlap >= 1 / 3 else 'partial' if overlap > 0 else 'unmet'
+        return statuses
+
+    @staticmethod
+    def _score(statuses):
+        return round(100 * sum(_STATUS_VALUE[status] for status in statuses.values()) / len(statuses)) if statuses else 0
+
+    def _answer(self, messages, kwargs):
+        prompt, resume = self._split(messages)
+        resume_terms = _terms(resume)
+        schema = None
+        if kwargs.get('tools'):
+            schema = kwargs['tools'][0]['function']['parameters']
+        elif (kwargs.get('response_format') or {}).get('type') == 'json_schema':
+            schema = kwargs['response_format']['json_schema']['schema']
+        if schema is not None:
+            names = (schema['properties']['requirements']['items']['properties']['name'].get('enum') or [])
+            requirements = []
+            for name in names:
+                match = re.search(rf'^\s*{re.escape(name)}\s*:\s*(.+)$', prompt, re.MULTILINE)
+                requirements.append((name, match.group(1) if match else name))
+            statuses = self._assess(requirements, resume_terms)
+            score = self._score(statuses)
+            return json.dumps({
+                'requirements': [{'name': name, 'status': status, 'evidence': 'Keyword overlap with the resume.'}
+                                 for name, status in statuses.items()],
+                'score': score,
+                'summary': f"Offline keyword assessment: {score}/100.",
+                'decision': 'qualified' if score >= 60 else 'not_qualified',
+            })
+        entries = _POSITION_ENTRY.split(prompt)
+        if len(entries) > 1:
+            lines = []
+            for key, block in zip(entries[1::2], entries[2::2]):
+                statuses = self._assess(parse_requirement_sections(block.split(':', 1)[-1]), resume_terms)
+                decision = 'qualified' if self._score(statuses) >= 60 else 'not_qualified'
+                lines += [f"POSITION {key}", *(f"- {name}: {status}" for name, status in statuses.items()),
+                          f"OVERALL_DECISION[{key}]: {decision}", '']
+            return '\n'.join(lines)
+        block = re.split(r'job requirements:', prompt, flags=re.IGNORECASE)[-1]
+        statuses = self._assess(parse_requirement_sections(block), resume_terms)
+        decision = 'qualified' if self._score(statuses) >= 60 else 'not_qualified'
+        return '\n'.join([*(f"- {name}: {status}" for name, status in statuses.items()),
+                          f"OVERALL_DECISION: {decision}"])
+
+    def _response(self, messages, kwargs, text):
+        message = SimpleNamespace(role='assistant', content=text, tool_calls=None)
+        if kwargs.get('tools'):
+            function = SimpleNamespace(name=kwargs['tools'][0]['function']['name'], arguments=text)
+            message.content, message.tool_calls = None, [SimpleNamespace(id='call_stub', type='function', function=function)]
+        prompt_tokens = sum(len(str(m.get('content') or '')) for m in messages) // 4
+        usage = SimpleNamespace(prompt_tokens=prompt_tokens, completion_tokens=len(text) // 4,
+                                total_tokens=prompt_tokens + len(text) // 4)
+        return SimpleNamespace(model=self.model, usage=usage,
+                               choices=[SimpleNamespace(index=0, message=message, finish_reason='stop')])
+
+    def generate_chat_completion(self, messages, **kwargs):
+        started = time.perf_counter()
+        if self.latency:
+            time.sleep(self.latency)
+        response = self._response(messages, kwargs, self._answer(messages, kwargs))
+        self.metrics.record_success(time.perf_counter() - started, response.usage, self.model)
+        return response
+
+    async def agenerate_chat_completion(self, messages, **kwargs):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        response = self._response(messages, kwargs, self._answer(messages, kwargs))
+        self.metrics.record_success(self.latency, response.usage, self.model)
+        return response
+
+    async def astream_chat_completion(self, messages, **kwargs):
+        response = await self.agenerate_chat_completion(messages, **kwargs)
+        text = response.choices[0].message.content or ''
+        for start in range(0, len(text), 16):
+            yield text[start:start + 16]
+        yield SimpleNamespace(model=self.model, usage=response.usage, choices=[])
+
+
+def _as_json(value):
+    """A chat completion (openai model or SimpleNamespace) as plain JSON data, as the Batch API returns it."""
+    if hasattr(value, 'model_dump'):
+        return value.model_dump(mode='json')
+    if isinstance(value, SimpleNamespace):
+        return {key: _as_json(item) for key, item in vars(value).items()}
+    if isinstance(value, (list, tuple)):
+        return [_as_json(item) for item in value]
+    return value
+
+
+class FileBatchBackend:
+    """
+    Local stand-in for a provider's batch API, for tests, demos and offline installs.
+    Submitted JSONL files are copied to a directory and, once DELAY seconds have passed, the
+    next retrieve_batch answers every request with another LLM_BACKENDS entry (BACKEND, the
+    stub by default) and writes output and error files in the OpenAI Batch API's format.
+    Interactive calls go straight to that backend, so a position can use this entry for
+    both modes.
+    """
+    supports_batches = True
+
+    def __init__(self, directory=None, backend='stub', delay=0.0):
+        self.directory = Path(directory or Path(getattr(settings, 'LLM_BATCH_DIR', 'llm_batches')) / 'file-backend')
+        self.backend_name = backend
+        self.delay = delay
+        self._lock = threading.Lock()
+
+    @property
+    def backend(self):
+        return LLMBackends.get(self.backend_name)
+
+    @property
+    def model(self):
+        return self.backend.model
+
+    @property
+    def metrics(self):
+        return self.backend.metrics
+
+    def generate_chat_completion(self, messages, **kwargs):
+        return self.backend.generate_chat_completion(messages, **kwargs)
+
+    async def agenerate_chat_completion(self, messages, **kwargs):
+        return await self.backend.agenerate_chat_completion(messages, **kwargs)
+
+    async def astream_chat_completion(self, messages, **kwargs):
+        async for delta in self.backend.astream_chat_completion(messages, **kwargs):
+            yield delta
+
+    def _state_path(self, batch_id):
+        return self.directory / f"{batch_id}.json"
+
+    def _save_state(self, batch_id, state):
+        path = self._state_path(batch_id)
+        path.with_suffix('.tmp').write_text(json.dumps(state), encoding='utf-8')
+        path.with_suffix('.tmp').replace(path)
+
+    def submit_batch(self, path, metadata=None):
+        batch_id = f"filebatch_{uuid.uuid4().hex}"
+        self.directory.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(path, self.directory / f"{batch_id}.input.jsonl")
+        self._save_state(batch_id, {'status': 'in_progress', 'submitted_at': time.time(), 'metadata': metadata or {}})
+        logger.info(f"Submitted batch {batch_id} ({path}) to the file batch backend")
+        return batch_id
+
+    def retrieve_batch(self, batch_id):
+        with self._lock:
+            state = json.loads(self._state_path(batch_id).read_text(encoding='utf-8'))
+            if state['status'] == 'in_progress' and time.time() - state['submitted_at'] >= self.delay:
+                state = self._answer(batch_id, state)
+        return {'status': state['status'], 'output_file_id': state.get('output_file_id'),
+                'error_file_id': state.get('error_file_id')}
+
+    def _answer(self, batch_id, state):
+        outputs, errors = [], []
+        with open(self.directory / f"{batch_id}.input.jsonl", encoding='utf-8') as f:
+            for n, line in enumerate(f):
+                request = json.loads(line)
+                body = dict(request['body'])
+                messages = body.pop('messages')
+                body.pop('model', None)
+                entry = {'id': f"batch_req_{batch_id}_{n}", 'custom_id': request['custom_id'], 'response': None,
+                         'error': None}
+                try:
+                    response = self.backend.generate_chat_completion(messages, **body)
+                except Exception as e:
+                    errors.append(dict(entry, error={'code': type(e).__name__, 'message': str(e)}))
+                    continue
+                outputs.append(dict(entry, response={'status_code': 200, 'request_id': f"req_{batch_id}_{n}",
+                                                     'body': _as_json(response)}))
+        for kind, entries in (('output', outputs), ('error', errors)):
+            if entries:
+                file_id = f"{batch_id}.{kind}.jsonl"
+                (self.directory / file_id).write_text(''.join(json.dumps(entry) + '\n' for entry in entries),
+                                                      encoding='utf-8')
+                state[f"{kind}_file_id"] = file_id
+        state.update(status='completed', completed_at=time.time())
+        self._save_state(batch_id, state)
+        return state
+
+    def batch_output(self, file_id):
+        return (self.directory / file_id).read_text(encoding='utf-8').splitlines()
+
+    def cancel_batch(self, batch_id):
+        with self._lock:
+            state = json.loads(self._state_path(batch_id).read_text(encoding='utf-8'))
+            if state['status'] == 'in_progress':
+                self._save_state(batch_id, dict(state, status='cancelled'))
@@ -0,0 +1,172 @@
+import json
+import logging
+from datetime import timedelta
+from pathlib import Path
+from types import SimpleNamespace
+
+from django.conf import settings
+from django.utils import timezone
+
+from Screener.models import LLMBatch, ScreeningJob
+from Screener.services import metrics as prometheus
+from Screener.services.llm_backends import LLMBackends
+from Screener.services.service_registry import ServiceRegistry
+
+logger = logging.getLogger(__name__)
+
+# Provider batch statuses after which no more answers will arrive.
+ENDED_STATUSES = ('completed', 'expired', 'cancelled', 'failed')
+
+
+def _namespace(value):
+    """JSON data from a batch output file with the attribute access of a chat completion response."""
+    if isinstance(value, dict):
+        return SimpleNamespace(**{key: _namespace(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return [_namespace(item) for item in value]
+    return value
+
+
+class LLMBatchService:
+    """
+    Screening through a backend's batch API (OpenAI's Batch API answers within
+    LLM_BATCH_COMPLETION_WINDOW at half the price of interactive calls), for jobs in the
+    batch mode, i.e. applicants of positions with batch_screening. run_llm_batches drives it:
+
+    - submit(): the jobs' chat completion requests (RAGService.prepare_batch_request) are
+      written one per line to a JSONL file under LLM_BATCH_DIR and submitted as one
+      LLMBatch per backend, once LLM_BATCH_MAX_REQUESTS jobs are waiting or the oldest has
+      waited LLM_BATCH_MAX_WAIT seconds (is_due);
+    - poll(): once a batch has ended, every answer goes through the same parsing, validation
+      and caching as an interactive assessment (RAGService.finish_batch_request); requests
+      without an answer come back as errors, so their jobs are retried in a later batch.
+    """
+    def __init__(self, rag_service=None):
+        self.rag_service = rag_service or ServiceRegistry.get('rag')
+        self.max_requests = getattr(settings, 'LLM_BATCH_MAX_REQUESTS', 1000)
+        self.max_wait = getattr(settings, 'LLM_BATCH_MAX_WAIT', 900)
+        self.directory = Path(getattr(settings, 'LLM_BATCH_DIR', 'llm_batches'))
+
+    def is_due(self, backlog, oldest):
+        """Whether to submit now, given job_queue.batch_backlog(): a full batch, or the oldest job waited long enough."""
+        if not backlog:
+            return False
+        return backlog >= self.max_requests or oldest <= timezone.now() - timedelta(seconds=self.max_wait)
+
+    @staticmethod
+    def supports_batches(backend_name):
+        return getattr(LLMBackends.get(backend_name), 'supports_batches', False)
+
+    @staticmethod
+    def worker_id(batch):
+        """ScreeningJob.locked_by of the jobs in batch."""
+        return f"llm-batch-{batch.pk}"
+
+    def submit(self, backend_name, entries):
+        """
+        Write entries, [(claimed job, prepare_batch_request request)], to a JSONL file and
+        submit it to backend_name's batch API. Returns the LLMBatch; raises if the backend
+        rejected it (the batch is then marked failed).
+        """
+        batch = LLMBatch.objects.create(backend=backend_name, request_count=len(entries))
+        self.directory.mkdir(parents=True, exist_ok=True)
+        batch.input_file = str(self.directory / f"batch-{batch.pk}.jsonl")
+        with open(batch.input_file, 'w', encoding='utf-8') as f:
+            for job, request in entries:
+                custom_id = f"job-{job.pk}"
+                f.write(json.dumps({'custom_id': custom_id, 'method': 'POST', 'url': '/v1/chat/completions',
+                                    'body': request['body']}) + '\n')
+                batch.requests[custom_id] = {'job': job.pk, 'context': request['context']}
+        ScreeningJob.objects.filter(pk__in=[job.pk for job, _ in entries]).update(locked_by=self.worker_id(batch))
+        for job, _ in entries:
+            job.locked_by = self.worker_id(batch)  # so the caller can still fail them if the submission fails
+        try:
+            batch.provider_batch_id = LLMBackends.get(backend_name).submit_batch(
+                batch.input_file, metadata={'llm_batch': str(batch.pk)})
+        except Exception as e:
+            batch.status = LLMBatch.STATUS_FAILED
+            batch.last_error = str(e)
+            batch.finished_at = timezone.now()
+            batch.save()
+            prometheus.ERRORS.inc(component='llm_batch')
+            raise
+        batch.save()
+        prometheus.LLM_BATCH_REQUESTS.inc(len(entries), outcome='submitted')
+        logger.info(f"Submitted LLM batch {batch.pk} ({batch.provider_batch_id}) with {len(entries)} requests "
+                    f"to {backend_name}")
+        return batch
+
+    @staticmethod
+    def active():
+        return list(LLMBatch.objects.filter(status=LLMBatch.STATUS_SUBMITTED).order_by('pk'))
+
+    def poll(self, batch):
+        """
+        Check a submitted batch. None while it runs; once it has ended, [(job, result)] with
+        the process_resume result of every request whose job is still held by the batch
+        (a job whose lease expired may have been claimed again since).
+        """
+        backend = LLMBackends.get(batch.backend)
+        state = backend.retrieve_batch(batch.provider_batch_id)
+        batch.provider_status = state['status']
+        batch.checked_at = timezone.now()
+        batch.save(update_fields=['provider_status', 'checked_at'])
+        if state['status'] not in ENDED_STATUSES:
+            return None
+        answers = {}
+        for file_id in (state.get('output_file_id'), state.get('error_file_id')):
+            if file_id:
+                for line in backend.batch_output(file_id):
+                    if line.strip():
+                        entry = json.loads(line)
+                        answers[entry['custom_id']] = entry
+        jobs = ScreeningJob.objects.filter(
+            pk__in=[request['job'] for request in batch.requests.values()],
+            status=ScreeningJob.STATUS_RUNNING, locked_by=self.worker_id(batch),
+        ).select_related('resume', 'resume__position').in_bulk()
+        waited = round((timezone.now() - batch.created_at).total_seconds(), 3)
+        outcomes = []
+        for custom_id, request in batch.requests.items():
+            job = jobs.get(request['job'])
+            if job is None:
+                continue
+            entry = answers.get(custom_id) or {}
+            response = entry.get('response') or {}
+            if response.get('status_code') == 200:
+                result = self.rag_service.finish_batch_request(job.resume.resume_text, job.resume.position,
+                                                               _namespace(response['body']), request['context'])
+            else:
+                error = ((entry.get('error') or {}).get('message')
+                         or ((response.get('body') or {}).get('error') or {}).get('message')
+                         or f"No answer in LLM batch {batch.pk} ({state['status']})")
+                result = {
+                    'detailed_assessment': 'Unable to complete resume assessment due to an error.',
+                    'meets_requirements': False,
+                    'raw_response': error,
+                    'error': error
+                }
+            result['timings'] = dict(result.get('timings') or {}, llm_batch=waited)
+            outcomes.append((job, result))
+        return outcomes
+
+    @staticmethod
+    def close(batch, outcomes):
+        """Record how an ended batch went, after its jobs were completed or failed."""
+        answered = [result for _, result in outcomes if not result.get('error')]
+        batch.answered_count = len(answered)
+        batch.failed_count = len(outcomes) - len(answered)
+        for field in ('prompt_tokens', 'completion_tokens'):
+            setattr(batch, field, sum((result.get('usage') or {}).get(field) or 0 for result in answered))
+        batch.status = LLMBatch.STATUS_COMPLETED if batch.provider_status == 'completed' else LLMBatch.STATUS_FAILED
+        if batch.status == LLMBatch.STATUS_FAILED:
+            batch.last_error = f"Batch ended as {batch.provider_status}"
+        batch.finished_at = timezone.now()
+        batch.save()
+        prometheus.LLM_BATCH_REQUESTS.inc(batch.answered_count, outcome='answered')
+        prometheus.LLM_BATCH_REQUESTS.inc(batch.failed_count, outcome='failed')
+        for result in answered:
+            usage, model = result.get('usage') or {}, result.get('model') or 'unknown'
+            prometheus.LLM_TOKENS.inc(usage.get('prompt_tokens') or 0, model=model, kind='batch_prompt')
+            prometheus.LLM_TOKENS.inc(usage.get('completion_tokens') or 0, model=model, kind='batch_completion')
+        logger.info(f"LLM batch {batch.pk} {batch.provider_status}: {batch.answered_count}/{batch.request_count} "
+                    f"answered, {batch.failed_count} failed, {batch.prompt_tokens + batch.completion_tokens} tokens")
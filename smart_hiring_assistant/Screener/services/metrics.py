@@ -0,0 +1,272 @@
+import bisect
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+# Seconds; covers sub-millisecond parsing up to slow LLM calls.
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _label_text(labelnames, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)]
+    pairs += [f'{name}="{_escape(value)}"' for name, value in extra]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = 'untyped'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def header(self):
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values = {}
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        return [f"{self.name}{_label_text(self.labelnames, key)} {_number(value)}" for key, value in sorted(values.items())]
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._values = {}  # label values -> [bucket counts..., +Inf count, sum]
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            state[index] += 1
+            state[-1] += value
+
+    def count(self, **labels):
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            return sum(state[:-1]) if state else 0
+
+    def samples(self):
+        with self._lock:
+            values = {key: list(state) for key, state in self._values.items()}
+        lines = []
+        for key, state in sorted(values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), state[:-1]):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_label_text(self.labelnames, key, [('le', _number(bound))])} "
+                             f"{cumulative}")
+            labels = _label_text(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_number(state[-1])}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class GaugeCallback(_Metric):
+    """A gauge computed at scrape time: func returns a number or {label value tuple: number}."""
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, func, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self.func = func
+
+    def samples(self):
+        values = self.func()
+        if not isinstance(values, dict):
+            values = {(): values}
+        return [f"{self.name}{_label_text(self.labelnames, key)} {_number(value)}" for key, value in sorted(values.items())]
+
+
+class MetricsRegistry:
+    """
+    Process-wide metrics in the Prometheus text format, without external dependencies.
+    Recording is a dict update under a lock, cheap enough to leave on; gauges backed by
+    callbacks (queue depth, existing service stats) only run when /metrics is scraped.
+    """
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def gauge_callback(self, name, documentation, func, labelnames=()):
+        return self.register(GaugeCallback(name, documentation, func, labelnames))
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            try:
+                samples = metric.samples()
+            except Exception as e:
+                logger.error(f"Collecting metric {metric.name} failed: {str(e)}")
+                continue
+            lines += metric.header() + samples
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = MetricsRegistry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    'screener_stage_seconds', 'Time spent in each screening stage.', ['stage'])
+SCREENINGS = REGISTRY.counter(
+    'screener_screenings_total', 'Resumes screened, by outcome.', ['outcome'])
+ERRORS = REGISTRY.counter(
+    'screener_errors_total', 'Errors by component.', ['component'])
+LLM_REQUEST_SECONDS = REGISTRY.histogram(
+    'screener_llm_request_seconds', 'Chat completion round trip time, per successful request.', ['model'])
+LLM_TOKENS = REGISTRY.counter(
+    'screener_llm_tokens_total', 'Tokens used by chat completions.', ['model', 'kind'])
+LLM_RETRIES = REGISTRY.counter(
+    'screener_llm_retries_total', 'Chat completion requests retried after a transient error.', ['model'])
+LLM_BATCH_REQUESTS = REGISTRY.counter(
+    'screener_llm_batch_requests_total', 'Assessments sent through LLM batch APIs, by outcome.', ['outcome'])
+PDF_PAGES_TRUNCATED = REGISTRY.counter(
+    'screener_pdf_pages_truncated_total', 'PDFs with more pages than PDF_EXTRACTION_MAX_PAGES, extracted only in part.')
+RESUME_TEXT_CACHE = REGISTRY.counter(
+    'screener_resume_text_cache_total', 'Lookups of extracted text cached beside resume blobs, by result.', ['result'])
+EMAIL_SEND_SECONDS = REGISTRY.histogram(
+    'screener_email_send_seconds', 'SendGrid request time per batch.', ['kind'])
+EMAILS_SENT = REGISTRY.counter(
+    'screener_emails_sent_total', 'Emails accepted by the email backend.', ['kind'])
+
+
+def observe_stages(timings, prefix=''):
+    """Record a {stage: seconds} dict such as the timings returned by RAGService.process_resume."""
+    for stage, seconds in (timings or {}).items():
+        if isinstance(seconds, (int, float)):
+            STAGE_SECONDS.observe(seconds, stage=f"{prefix}{stage}")
+
+
+def _cache_stats():
+    from Screener.services.assessment_cache_service import AssessmentCacheService
+    stats = AssessmentCacheService.stats()
+    return {(name,): stats[name] for name in ('hits', 'misses', 'sets', 'evictions')}
+
+
+def _prescreen_stats():
+    from Screener.services.prescreen_service import PreScreenService
+    stats = PreScreenService.stats()
+    return {(tier,): stats[tier] for tier in (PreScreenService.TIER_REJECT, PreScreenService.TIER_BORDERLINE,
+                                              PreScreenService.TIER_STRONG)}
+
+
+def _screening_queue():
+    from django.db.models import Count
+
+    from Screener.models import ScreeningJob
+    statuses = [ScreeningJob.STATUS_PENDING, ScreeningJob.STATUS_RUNNING]
+    counts = dict(ScreeningJob.objects.filter(status__in=statuses).values_list('status').annotate(n=Count('pk'))
+                  .order_by())
+    return {(status,): counts.get(status, 0) for status in statuses}
+
+
+def _email_queue():
+    from django.db.models import Count
+
+    from Screener.models import EmailOutbox
+    statuses = [EmailOutbox.STATUS_PENDING, EmailOutbox.STATUS_SENDING]
+    counts = dict(EmailOutbox.objects.filter(status__in=statuses).values_list('status').annotate(n=Count('pk'))
+                  .order_by())
+    return {(status,): counts.get(status, 0) for status in statuses}
+
+
+def _rescreen_remaining():
+    from django.db.models import F, Sum
+
+    from Screener.models import RescreenRun
+    remaining = RescreenRun.objects.filter(
+        status__in=[RescreenRun.STATUS_PENDING, RescreenRun.STATUS_RUNNING]
+    ).aggregate(n=Sum(F('total') - F('processed')))['n']
+    return max(remaining or 0, 0)
+
+
+# Counters the services already keep for themselves, exported as they are.
+REGISTRY.gauge_callback('screener_assessment_cache_events', 'Assessment cache lookups and writes in this process.',
+                        _cache_stats, ['event'])
+REGISTRY.gauge_callback('screener_prescreen_results', 'Pre-screen results by tier in this process.',
+                        _prescreen_stats, ['tier'])
+REGISTRY.gauge_callback('screener_job_queue_depth', 'Screening jobs waiting or in progress.', _screening_queue, ['status'])
+REGISTRY.gauge_callback('screener_email_outbox_depth', 'Outbox emails waiting or being sent.', _email_queue, ['status'])
+REGISTRY.gauge_callback('screener_rescreen_remaining', 'Assessments left in pending and running re-screen runs.',
+                        _rescreen_remaining)
+
+
+def start_metrics_server(port, address='0.0.0.0'):
+    """Serve REGISTRY on http://address:port/metrics from a daemon thread (for worker processes)."""
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = REGISTRY.render().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', CONTENT_TYPE)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((address, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='metrics-server', daemon=True).start()
+    logger.info(f"Serving metrics on {address}:{server.server_address[1]}")
+    return server
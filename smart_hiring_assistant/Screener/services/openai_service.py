@@ -1,19 +1,299 @@
-from openai import OpenAI
+import asyncio
+import logging
 import os
+import random
+import threading
+import time
+import weakref
+
 from django.conf import settings
 
-class OpenAIService:
+from Screener.services import metrics as prometheus
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """Thread-safe token bucket allowing `rate_per_minute` requests with bursts up to `capacity`."""
+    def __init__(self, rate_per_minute, capacity=None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or max(1.0, rate_per_minute / 6.0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """Take one token and return how many seconds the caller must wait before using it."""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+
+class OpenAIMetrics:
+    """Process-wide counters for chat completion calls."""
     def __init__(self):
-        self.client = OpenAI(
-            api_key=os.getenv('OPENAI_API_KEY')
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._values = {
+                'requests': 0,
+                'failures': 0,
+                'retries': 0,
+                'throttled_seconds': 0.0,
+                'prompt_tokens': 0,
+                'completion_tokens': 0,
+                'cached_prompt_tokens': 0,
+                'latency_seconds_total': 0.0,
+                'latency_seconds_max': 0.0,
+            }
+
+    def record_success(self, latency, usage, model='unknown'):
+        prompt_tokens = getattr(usage, 'prompt_tokens', 0) or 0
+        completion_tokens = getattr(usage, 'completion_tokens', 0) or 0
+        cached_tokens = getattr(getattr(usage, 'prompt_tokens_details', None), 'cached_tokens', 0) or 0
+        with self._lock:
+            self._values['requests'] += 1
+            self._values['latency_seconds_total'] += latency
+            self._values['latency_seconds_max'] = max(self._values['latency_seconds_max'], latency)
+            self._values['prompt_tokens'] += prompt_tokens
+            self._values['completion_tokens'] += completion_tokens
+            self._values['cached_prompt_tokens'] += cached_tokens
+        prometheus.LLM_REQUEST_SECONDS.observe(latency, model=model)
+        prometheus.LLM_TOKENS.inc(prompt_tokens, model=model, kind='prompt')
+        prometheus.LLM_TOKENS.inc(completion_tokens, model=model, kind='completion')
+        prometheus.LLM_TOKENS.inc(cached_tokens, model=model, kind='cached_prompt')
+
+    def record(self, counter, amount=1):
+        with self._lock:
+            self._values[counter] += amount
+
+    def snapshot(self):
+        with self._lock:
+            values = dict(self._values)
+        values['latency_seconds_avg'] = (
+            values['latency_seconds_total'] / values['requests'] if values['requests'] else 0.0
         )
-    def generate_chat_completion(self, messages):
-        try:
-            response = self.client.chat.completions.create(
-                model="gpt-4",
-                messages=messages
-            )
-            return response
-        except Exception as e:
-            print(f"OpenAI API Error: {str(e)}")
-            raise
\ No newline at end of file
+        return values
+
+
+def _is_retryable(error):
+    from openai import APIConnectionError, APIStatusError
+
+    if isinstance(error, APIStatusError):
+        return error.status_code == 429 or error.status_code >= 500
+    return isinstance(error, APIConnectionError)  # includes timeouts
+
+
+def _retry_after(error):
+    response = getattr(error, 'response', None)
+    try:
+        return float(response.headers.get('retry-after'))
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+class OpenAIService:
+    """
+    Chat completions over a process-wide OpenAI client.
+    The sync and async clients are created once (per process / per event loop) so HTTP
+    connections and TLS sessions are reused. Calls share a concurrency limit and a
+    token-bucket rate limit, and 429/5xx/connection errors are retried with jittered
+    exponential backoff. The Batch API methods (submit_batch, retrieve_batch, batch_output,
+    cancel_batch) serve run_llm_batches.
+    """
+    supports_batches = True
+    _lock = threading.Lock()
+    _client = None
+    _async_clients = weakref.WeakKeyDictionary()
+    _semaphore = None
+    _async_semaphores = weakref.WeakKeyDictionary()
+    _rate_limiter = None
+    metrics = OpenAIMetrics()
+
+    def __init__(self, model=None):
+        self.model = model or getattr(settings, 'OPENAI_MODEL', 'gpt-4')
+        self.max_retries = getattr(settings, 'OPENAI_MAX_RETRIES', 4)
+        self.retry_base_delay = getattr(settings, 'OPENAI_RETRY_BASE_DELAY', 1.0)
+        self.retry_max_delay = getattr(settings, 'OPENAI_RETRY_MAX_DELAY', 30.0)
+        self.client = self.shared_client()
+
+    @classmethod
+    def _client_options(cls):
+        options = {
+            'api_key': os.getenv('OPENAI_API_KEY'),
+            'timeout': getattr(settings, 'OPENAI_TIMEOUT', 60.0),
+            'max_retries': 0,  # retries are handled here so they respect the rate limiter
+        }
+        base_url = getattr(settings, 'OPENAI_BASE_URL', None)
+        if base_url:
+            options['base_url'] = base_url
+        return options
+
+    @classmethod
+    def shared_client(cls):
+        with cls._lock:
+            if cls._client is None:
+                # The openai package takes most of a second to import; load it with the first client.
+                from openai import OpenAI
+
+                cls._client = OpenAI(**cls._client_options())
+                cls._semaphore = threading.BoundedSemaphore(getattr(settings, 'OPENAI_MAX_CONCURRENCY', 8))
+                requests_per_minute = getattr(settings, 'OPENAI_REQUESTS_PER_MINUTE', 0)
+                cls._rate_limiter = TokenBucket(requests_per_minute) if requests_per_minute else None
+            return cls._client
+
+    @classmethod
+    def shared_async_client(cls):
+        """AsyncOpenAI client (and concurrency semaphore) for the running event loop."""
+        from openai import AsyncOpenAI
+
+        cls.shared_client()
+        loop = asyncio.get_running_loop()
+        with cls._lock:
+            if loop not in cls._async_clients:
+                cls._async_clients[loop] = AsyncOpenAI(**cls._client_options())
+                cls._async_semaphores[loop] = asyncio.Semaphore(getattr(settings, 'OPENAI_MAX_CONCURRENCY', 8))
+            return cls._async_clients[loop], cls._async_semaphores[loop]
+
+    def _throttle_delay(self):
+        if self._rate_limiter is None:
+            return 0.0
+        delay = self._rate_limiter.reserve()
+        if delay:
+            self.metrics.record('throttled_seconds', delay)
+        return delay
+
+    def _backoff_delay(self, attempt, error):
+        delay = random.uniform(0, min(self.retry_max_delay, self.retry_base_delay * 2 ** attempt))
+        retry_after = _retry_after(error)
+        return max(delay, retry_after) if retry_after is not None else delay
+
+    def _should_retry(self, attempt, error):
+        if attempt < self.max_retries and _is_retryable(error):
+            self.metrics.record('retries')
+            prometheus.LLM_RETRIES.inc(model=self.model)
+            return True
+        self.metrics.record('failures')
+        prometheus.ERRORS.inc(component='llm')
+        logger.error(f"OpenAI API Error: {str(error)}")
+        return False
+
+    def generate_chat_completion(self, messages, **kwargs):
+        attempt = 0
+        while True:
+            throttle = self._throttle_delay()
+            if throttle:
+                time.sleep(throttle)
+            try:
+                with self._semaphore:
+                    started = time.perf_counter()
+                    response = self.client.chat.completions.create(model=self.model, messages=messages, **kwargs)
+                self.metrics.record_success(time.perf_counter() - started, getattr(response, 'usage', None), self.model)
+                return response
+            except Exception as e:
+                if not self._should_retry(attempt, e):
+                    raise
+                delay = self._backoff_delay(attempt, e)
+                logger.warning(f"OpenAI request failed ({str(e)}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+                attempt += 1
+
+    async def agenerate_chat_completion(self, messages, **kwargs):
+        client, semaphore = self.shared_async_client()
+        attempt = 0
+        while True:
+            throttle = self._throttle_delay()
+            if throttle:
+                await asyncio.sleep(throttle)
+            try:
+                async with semaphore:
+                    started = time.perf_counter()
+                    response = await client.chat.completions.create(model=self.model, messages=messages, **kwargs)
+                self.metrics.record_success(time.perf_counter() - started, getattr(response, 'usage', None), self.model)
+                return response
+            except Exception as e:
+                if not self._should_retry(attempt, e):
+                    raise
+                delay = self._backoff_delay(attempt, e)
+                logger.warning(f"OpenAI request failed ({str(e)}), retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+                attempt += 1
+
+    async def astream_chat_completion(self, messages, **kwargs):
+        """
+        Yield content deltas (str) as they arrive, then the final chunk carrying the token
+        usage (chunk.usage), which the provider sends after the last delta. Failures before
+        the first token are retried like agenerate_chat_completion; once tokens have been
+        yielded errors propagate.
+        """
+        client, semaphore = self.shared_async_client()
+        attempt = 0
+        while True:
+            throttle = self._throttle_delay()
+            if throttle:
+                await asyncio.sleep(throttle)
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    stream = await client.chat.completions.create(
+                        model=self.model, messages=messages, stream=True,
+                        stream_options={'include_usage': True}, **kwargs
+                    )
+                except Exception as e:
+                    stream = None
+                    error = e
+                if stream is not None:
+                    usage_chunk = None
+                    try:
+                        async for chunk in stream:
+                            if getattr(chunk, 'usage', None) is not None:
+                                usage_chunk = chunk
+                            if chunk.choices and chunk.choices[0].delta.content:
+                                yield chunk.choices[0].delta.content
+                    except Exception:
+                        self.metrics.record('failures')
+                        prometheus.ERRORS.inc(component='llm')
+                        raise
+                    usage = getattr(usage_chunk, 'usage', None)
+                    self.metrics.record_success(time.perf_counter() - started, usage, self.model)
+                    if usage_chunk is not None:
+                        yield usage_chunk
+                    return
+            if not self._should_retry(attempt, error):
+                raise error
+            delay = self._backoff_delay(attempt, error)
+            logger.warning(f"OpenAI stream failed to start ({str(error)}), retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    def submit_batch(self, path, metadata=None):
+        """
+        Upload a JSONL file of /v1/chat/completions requests and create a batch for it;
+        returns the batch id. Answers arrive within LLM_BATCH_COMPLETION_WINDOW at the
+        Batch API's discounted price.
+        """
+        with open(path, 'rb') as f:
+            uploaded = self.client.files.create(file=f, purpose='batch')
+        batch = self.client.batches.create(
+            input_file_id=uploaded.id, endpoint='/v1/chat/completions',
+            completion_window=getattr(settings, 'LLM_BATCH_COMPLETION_WINDOW', '24h'), metadata=metadata,
+        )
+        logger.info(f"Submitted batch {batch.id} ({path}) to {self.model}")
+        return batch.id
+
+    def retrieve_batch(self, batch_id):
+        """The batch's 'status' (validating, in_progress, finalizing, completed, expired, ...) and result file ids."""
+        batch = self.client.batches.retrieve(batch_id)
+        return {'status': batch.status, 'output_file_id': batch.output_file_id, 'error_file_id': batch.error_file_id}
+
+    def batch_output(self, file_id):
+        """Lines of a batch output or error file: one JSON object per request, with its custom_id."""
+        return self.client.files.content(file_id).text.splitlines()
+
+    def cancel_batch(self, batch_id):
+        self.client.batches.cancel(batch_id)
@@ -1,16 +1,323 @@
-from pdfminer.high_level import extract_text
+import atexit
+import functools
+import importlib.metadata
+import logging
+import multiprocessing
 import os
+import threading
+import time
+
+from django.conf import settings
+
+from Screener.services import metrics
+from Screener.services.text_normalizer import NORMALIZER_VERSION, normalize_resume_text
+from Screener.storage import resume_storage
+
+logger = logging.getLogger(__name__)
+
+# Exit code used by a worker that killed itself for exceeding its memory limit.
+_EXIT_RSS_LIMIT = 86
+# Bump EXTRACTION_VERSION whenever _extraction_worker's output for a given PDF changes; with
+# NORMALIZER_VERSION, the page limit and the pdfminer release it versions cached extracted text.
+EXTRACTION_VERSION = 1
+
+
+class PDFExtractionError(Exception):
+    pass
+
+
+class PDFExtractionTimeout(PDFExtractionError):
+    pass
+
+
+def _current_rss_bytes():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        import resource
+        # Peak rather than current RSS; KiB on Linux. Good enough as a fallback.
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _watch_rss(max_rss_bytes):
+    while True:
+        if _current_rss_bytes() > max_rss_bytes:
+            os._exit(_EXIT_RSS_LIMIT)
+        time.sleep(0.1)
+
+
+@functools.cache
+def _pdfminer_version():
+    # From the installed metadata, so the main process does not import pdfminer.
+    try:
+        return importlib.metadata.version('pdfminer.six')
+    except importlib.metadata.PackageNotFoundError:
+        return 'unknown'
+
+
+def _extraction_worker(conn, max_rss_bytes):
+    """
+    Worker process main loop: receive (path, max_pages), reply with ('ok', (text, truncated))
+    or ('error', message). truncated says the PDF had more than max_pages pages.
+    """
+    from pdfminer.high_level import extract_text
+
+    if max_rss_bytes:
+        threading.Thread(target=_watch_rss, args=(max_rss_bytes,), daemon=True).start()
+    conn.send(('ready', os.getpid()))  # pdfminer is imported; see _Worker.wait_ready
+    while True:
+        try:
+            task = conn.recv()
+        except EOFError:
+            break
+        if task is None:
+            break
+        path, max_pages = task
+        try:
+            if not max_pages:
+                conn.send(('ok', (extract_text(path), False)))
+                continue
+            # pdfminer ends every page with a form feed; one page past the limit tells whether it cut the document.
+            pages = extract_text(path, maxpages=max_pages + 1).split('\f')
+            conn.send(('ok', ('\f'.join(pages[:max_pages]) + '\f', len(pages) > max_pages + 1)))
+        except Exception as e:
+            conn.send(('error', f"{type(e).__name__}: {e}"))
+    conn.close()
+
+
+class _Worker:
+    def __init__(self, context, max_rss_bytes):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_extraction_worker, args=(child_conn, max_rss_bytes), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.tasks = 0
+        self.ready = False
+
+    def wait_ready(self, timeout):
+        """Wait for the start-up message; False if the process is not up within timeout."""
+        if not self.ready and self.conn.poll(timeout):
+            status, _ = self.conn.recv()
+            self.ready = status == 'ready'
+        return self.ready
+
+    def stop(self, force=False):
+        try:
+            if force:
+                self.process.kill()
+            else:
+                self.conn.send(None)
+        except (OSError, ValueError):
+            pass
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+
+
+class PDFExtractionExecutor:
+    """
+    Pool of recycled worker processes running pdfminer.
+    Each document gets a wall-clock timeout; a worker that hits the timeout or its RSS
+    limit is killed and replaced, and every worker is recycled after max_tasks_per_worker
+    documents so fragmentation from large files does not accumulate.
+    """
+    def __init__(self, max_workers=2, timeout=30, max_rss_mb=512, max_pages=0,
+                 max_tasks_per_worker=50, start_method='spawn'):
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.max_rss_bytes = max_rss_mb * 1024 * 1024 if max_rss_mb else 0
+        self.max_pages = max_pages
+        self.max_tasks_per_worker = max_tasks_per_worker
+        self._context = multiprocessing.get_context(start_method)
+        self._slots = threading.BoundedSemaphore(max_workers)
+        self._idle = []
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def extract(self, path, max_pages=None):
+        """
+        Return the raw text of the PDF at path, up to max_pages pages (the executor's limit by
+        default; 0 for all). A document cut at the limit is logged and counted. Raises
+        PDFExtractionError on failure or timeout.
+        """
+        max_pages = self.max_pages if max_pages is None else max_pages
+        if self._closed:
+            raise PDFExtractionError('PDF extraction executor is shut down')
+        with self._slots:
+            worker = self._checkout()
+            healthy = False
+            try:
+                try:
+                    if not worker.wait_ready(self.timeout):
+                        raise PDFExtractionTimeout(f"PDF extraction worker did not start within {self.timeout}s")
+                    worker.conn.send((str(path), max_pages))
+                    if not worker.conn.poll(self.timeout):
+                        raise PDFExtractionTimeout(f"PDF extraction exceeded {self.timeout}s")
+                    status, payload = worker.conn.recv()
+                except (EOFError, OSError):
+                    worker.process.join(timeout=1)
+                    if worker.process.exitcode == _EXIT_RSS_LIMIT:
+                        raise PDFExtractionError(f"PDF extraction exceeded {self.max_rss_bytes // (1024 * 1024)}MB memory limit")
+                    raise PDFExtractionError(f"PDF extraction worker died (exit code {worker.process.exitcode})")
+                healthy = True
+            finally:
+                self._checkin(worker, healthy)
+        if status != 'ok':
+            raise PDFExtractionError(payload)
+        text, truncated = payload
+        if truncated:
+            logger.warning(f"{path} has more than {max_pages} pages; extracted only the first {max_pages}")
+            metrics.PDF_PAGES_TRUNCATED.inc()
+        return text
+
+    def prestart(self, count=None):
+        """Start idle workers (max_workers by default) and wait until they are up, so the first documents skip start-up."""
+        count = self.max_workers if count is None else min(count, self.max_workers)
+        with self._lock:
+            missing = count - len(self._idle)
+        workers = [_Worker(self._context, self.max_rss_bytes) for _ in range(max(0, missing))]
+        ready = [worker for worker in workers if worker.wait_ready(self.timeout)]
+        for worker in workers:
+            if worker not in ready:
+                worker.stop(force=True)
+        with self._lock:
+            self._idle.extend(ready)
+        return len(ready)
+
+    def _checkout(self):
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+        return _Worker(self._context, self.max_rss_bytes)
+
+    def _checkin(self, worker, healthy):
+        worker.tasks += 1
+        if not healthy:
+            logger.warning(f"Replacing PDF extraction worker {worker.process.pid}")
+            worker.stop(force=True)
+            return
+        if worker.tasks >= self.max_tasks_per_worker or self._closed:
+            worker.stop()
+            return
+        with self._lock:
+            self._idle.append(worker)
+
+    def shutdown(self):
+        self._closed = True
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for worker in idle:
+            worker.stop()
+
 
 class PDFParserService:
+    """
+    Single entry point for PDF text extraction: raw text from a process-wide
+    PDFExtractionExecutor, then normalized and checked to look like a resume, optionally
+    through the text cached beside content-addressed resume blobs.
+    """
+    _executor = None
+    _executor_pid = None
+    _executor_lock = threading.Lock()
+
+    @classmethod
+    def executor(cls):
+        with cls._executor_lock:
+            # A forked process (e.g. a web worker after a warm-up in its parent) must not share the parent's pipes.
+            if cls._executor is None or cls._executor_pid != os.getpid():
+                cls._executor, cls._executor_pid = cls._build_executor(), os.getpid()
+            return cls._executor
+
+    @classmethod
+    def configure(cls, **overrides):
+        """Replace the process-wide executor, e.g. to size the pool for a batch run."""
+        with cls._executor_lock:
+            previous, cls._executor = cls._executor, cls._build_executor(**overrides)
+            previous_pid, cls._executor_pid = cls._executor_pid, os.getpid()
+        if previous is not None and previous_pid == os.getpid():
+            previous.shutdown()
+        return cls._executor
+
+    @staticmethod
+    def _build_executor(**overrides):
+        options = {
+            'max_workers': getattr(settings, 'PDF_EXTRACTION_WORKERS', 2),
+            'timeout': getattr(settings, 'PDF_EXTRACTION_TIMEOUT', 30),
+            'max_rss_mb': getattr(settings, 'PDF_EXTRACTION_MAX_RSS_MB', 512),
+            'max_pages': getattr(settings, 'PDF_EXTRACTION_MAX_PAGES', 0),
+            'max_tasks_per_worker': getattr(settings, 'PDF_EXTRACTION_MAX_TASKS_PER_WORKER', 50),
+            'start_method': getattr(settings, 'PDF_EXTRACTION_START_METHOD', 'spawn'),
+        }
+        options.update(overrides)
+        return PDFExtractionExecutor(**options)
+
     @staticmethod
-    def extract_text_from_pdf(pdf_path):
+    def text_version():
+        """Version of the extracted, normalized text of a PDF (see EXTRACTION_VERSION); keys cached text."""
+        max_pages = getattr(settings, 'PDF_EXTRACTION_MAX_PAGES', 0)
+        return f"e{EXTRACTION_VERSION}n{NORMALIZER_VERSION}p{max_pages}-{_pdfminer_version()}"
+
+    @classmethod
+    def extract_raw_text(cls, pdf_path):
+        """Extract uncleaned text in a worker process. Raises PDFExtractionError."""
+        if not os.path.exists(pdf_path):
+            raise PDFExtractionError(f"PDF file not found at path: {pdf_path}")
+        return cls.executor().extract(pdf_path)
+
+    @classmethod
+    def extract_text(cls, pdf_path):
+        """Extract and normalize the text of a resume PDF. Raises PDFExtractionError without screenable text."""
         try:
-            text = extract_text(pdf_path)
+            started = time.perf_counter()
+            text = cls.extract_raw_text(pdf_path)
+            extracted = time.perf_counter()
+            metrics.STAGE_SECONDS.observe(extracted - started, stage='extraction')
             if not text:
-                raise Exception("Failed to extract text from PDF")
-            # Clean the extracted text 
-            text = ' '.join(text.split())
-            return text[:15000]  # Limit to 15000 characters
+                raise PDFExtractionError('No text extracted from PDF')
+            # Whitespace, bullets, non-ASCII and OCR fixes in the single shared normalizer
+            text = normalize_resume_text(text)
+            metrics.STAGE_SECONDS.observe(time.perf_counter() - extracted, stage='normalization')
+            if len(text.split()) < 10:
+                raise PDFExtractionError('Extracted text appears to be too short to be a valid resume')
+            # The full text is kept; RAGService selects what goes into the prompt
+            return text
         except Exception as e:
-            print(f"PDF extraction failed: {str(e)}")
-            return 'Failed to extract text from resume.'
\ No newline at end of file
+            logger.error(f"PDF extraction failed for {pdf_path}: {str(e)}")
+            metrics.ERRORS.inc(component='pdf_extraction')
+            raise PDFExtractionError(f"Failed to extract text from resume: {str(e)}") from e
+
+    @classmethod
+    def extract_resume_text(cls, pdf_path, sha256=''):
+        """
+        extract_text, through the text cached beside content-addressed resume blobs: a PDF
+        whose SHA-256 was extracted before, by the current text_version, is not parsed again.
+        Without a digest, or with storage that keeps no text, it just extracts.
+        """
+        storage = resume_storage()
+        cached = sha256 and getattr(settings, 'RESUME_TEXT_CACHE_ENABLED', True) and hasattr(storage, 'read_text')
+        if cached:
+            version = cls.text_version()
+            try:
+                text = storage.read_text(sha256, version)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Reading the cached text of {sha256} failed: {str(e)}")
+                text = None
+            metrics.RESUME_TEXT_CACHE.inc(result='hit' if text is not None else 'miss')
+            if text is not None:
+                return text
+        text = cls.extract_text(pdf_path)
+        if cached:
+            try:
+                storage.write_text(sha256, text, version)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Caching the text of {sha256} failed: {str(e)}")
+        return text
+
+
+@atexit.register
+def _shutdown_executor():
+    if PDFParserService._executor is not None and PDFParserService._executor_pid == os.getpid():
+        PDFParserService._executor.shutdown()
@@ -0,0 +1,198 @@
+import math
+import re
+import threading
+import time
+import zlib
+
+import numpy as np
+from django.conf import settings
+
+from Screener.services.requirements import parse_requirement_sections
+
+_TOKEN_PATTERN = re.compile(r'[a-z0-9][a-z0-9+#]*(?:\.[a-z0-9+#]+)*')
+_STOP_WORDS = frozenset('''
+a about across an and any are as at be by for from has have in including into is it its of on or
+our such that the their this to through using with within work working years year experience
+'''.split())
+
+
+class HashingVectorizer:
+    """
+    Stateless TF vectorizer using the hashing trick: unigrams and bigrams are hashed into
+    n_features signed buckets, so no vocabulary has to be fitted or stored.
+    """
+    def __init__(self, n_features=2 ** 14):
+        if n_features & (n_features - 1):
+            raise ValueError('n_features must be a power of two')
+        self.n_features = n_features
+        self._mask = n_features - 1
+
+    def tokens(self, text):
+        words = [w for w in _TOKEN_PATTERN.findall(text.lower()) if w not in _STOP_WORDS]
+        return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+    def _hash(self, tokens):
+        hashes = np.fromiter((zlib.crc32(t.encode('utf-8')) for t in tokens), dtype=np.uint32, count=len(tokens))
+        indices = (hashes & self._mask).astype(np.intp)
+        signs = np.where(hashes & 0x80000000, -1.0, 1.0).astype(np.float32)
+        return indices, signs
+
+    def term_counts(self, texts):
+        """(len(texts), n_features) matrix of signed term counts."""
+        matrix = np.zeros((len(texts), self.n_features), dtype=np.float32)
+        for row, text in enumerate(texts):
+            tokens = self.tokens(text)
+            if tokens:
+                indices, signs = self._hash(tokens)
+                np.add.at(matrix[row], indices, signs)
+        return matrix
+
+
+def _l2_normalize(matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class RequirementMatrix:
+    """TF-IDF vectors for one job requirements block; IDF is fitted on its own sections."""
+    def __init__(self, vectorizer, job_requirements):
+        self.n_features = vectorizer.n_features
+        self.job_requirements = job_requirements
+        self.sections = parse_requirement_sections(job_requirements)
+        counts = vectorizer.term_counts([f"{name} {text}" for name, text in self.sections])
+        document_frequency = np.count_nonzero(counts, axis=0)
+        n = len(self.sections)
+        self.idf = (np.log((1 + n) / (1 + document_frequency)) + 1).astype(np.float32)
+        self.vectors = _l2_normalize(self._sublinear(counts) * self.idf)
+
+    @staticmethod
+    def _sublinear(counts):
+        return np.sign(counts) * np.log1p(np.abs(counts))
+
+
+class PreScreenService:
+    """
+    Local, network-free first-stage ranker.
+    Resumes and requirement sections are embedded with hashed TF-IDF and compared with
+    batched cosine similarity. The score is the mean similarity across requirement
+    sections; resumes under PRESCREEN_REJECT_THRESHOLD are rejected without an LLM
+    call, and those at or above PRESCREEN_STRONG_THRESHOLD are flagged as strong.
+    A threshold that is None (the default) disables its tier; calibrate_prescreen suggests
+    values from stored assessments.
+    """
+    TIER_REJECT = 'reject'
+    TIER_BORDERLINE = 'borderline'
+    TIER_STRONG = 'strong'
+
+    _stats_lock = threading.Lock()
+    _stats = {TIER_REJECT: 0, TIER_BORDERLINE: 0, TIER_STRONG: 0, 'seconds_total': 0.0}
+
+    def __init__(self, reject_threshold=None, strong_threshold=None, n_features=None):
+        self.reject_threshold = self._threshold(reject_threshold, 'PRESCREEN_REJECT_THRESHOLD')
+        self.strong_threshold = self._threshold(strong_threshold, 'PRESCREEN_STRONG_THRESHOLD')
+        self.vectorizer = HashingVectorizer(n_features or getattr(settings, 'PRESCREEN_FEATURES', 2 ** 14))
+        self._matrices = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _threshold(value, setting):
+        if value is None:
+            value = getattr(settings, setting, None)
+        return float(value) if value not in (None, '') else None
+
+    def _requirement_matrix(self, job_requirements):
+        """Accepts a requirements block or an already compiled RequirementMatrix."""
+        if isinstance(job_requirements, RequirementMatrix):
+            if job_requirements.n_features == self.vectorizer.n_features:
+                return job_requirements
+            job_requirements = job_requirements.job_requirements  # compiled for another feature size
+        with self._lock:
+            matrix = self._matrices.get(job_requirements)
+            if matrix is None:
+                matrix = RequirementMatrix(self.vectorizer, job_requirements)
+                # Keyed by the requirements text, which changes with every edit; bound the stale entries.
+                if len(self._matrices) >= 256:
+                    self._matrices.clear()
+                self._matrices[job_requirements] = matrix
+            return matrix
+
+    def compile(self, job_requirements):
+        """Build a RequirementMatrix that can be passed in place of the requirements text."""
+        return RequirementMatrix(self.vectorizer, job_requirements)
+
+    def requirement_vectors(self, job_requirements):
+        """([(name, text), ...], matrix) for the requirement sections, one L2-normalized row per section."""
+        requirements = self._requirement_matrix(job_requirements)
+        return requirements.sections, requirements.vectors
+
+    def embed(self, texts, job_requirements):
+        """TF-IDF vectors for texts, weighted with the requirements' IDF so both live in the same space."""
+        requirements = self._requirement_matrix(job_requirements)
+        counts = self.vectorizer.term_counts(texts)
+        return _l2_normalize(RequirementMatrix._sublinear(counts) * requirements.idf)
+
+    def score_many(self, resume_texts, job_requirements):
+        """Pre-screen several resumes in one batched similarity computation."""
+        started = time.perf_counter()
+        requirements = self._requirement_matrix(job_requirements)
+        similarities = self.embed(resume_texts, job_requirements) @ requirements.vectors.T
+        elapsed = time.perf_counter() - started
+        results = []
+        for row in similarities:
+            score = float(row.mean()) if row.size else 0.0
+            results.append({
+                'score': round(score, 4),
+                'tier': self._tier(score),
+                'sections': {name: round(float(value), 4) for (name, _), value in zip(requirements.sections, row)},
+                'seconds': elapsed / max(1, len(resume_texts)),
+            })
+        self._record(results, elapsed)
+        return results
+
+    def score_positions(self, resume_text, requirement_sets):
+        """
+        Pre-screen one resume against several requirement sets. The resume is tokenized
+        once; each set then weights it with its own IDF and compares it with its own
+        sections, so the work grows with the number of sections, not sets squared.
+        """
+        started = time.perf_counter()
+        matrices = [self._requirement_matrix(requirements) for requirements in requirement_sets]
+        if not matrices:
+            return []
+        counts = RequirementMatrix._sublinear(self.vectorizer.term_counts([resume_text]))[0]
+        similarities = [matrix.vectors @ _l2_normalize((counts * matrix.idf)[np.newaxis])[0] for matrix in matrices]
+        elapsed = time.perf_counter() - started
+        results = []
+        for matrix, values in zip(matrices, similarities):
+            score = float(values.mean()) if values.size else 0.0
+            results.append({
+                'score': round(score, 4),
+                'tier': self._tier(score),
+                'sections': {name: round(float(value), 4) for (name, _), value in zip(matrix.sections, values)},
+                'seconds': elapsed / len(matrices),
+            })
+        self._record(results, elapsed)
+        return results
+
+    def score(self, resume_text, job_requirements):
+        return self.score_many([resume_text], job_requirements)[0]
+
+    def _tier(self, score):
+        if self.reject_threshold is not None and score < self.reject_threshold:
+            return self.TIER_REJECT
+        if self.strong_threshold is not None and score >= self.strong_threshold:
+            return self.TIER_STRONG
+        return self.TIER_BORDERLINE
+
+    @classmethod
+    def _record(cls, results, elapsed):
+        with cls._stats_lock:
+            for result in results:
+                cls._stats[result['tier']] += 1
+            cls._stats['seconds_total'] += elapsed
+
+    @classmethod
+    def stats(cls):
+        with cls._stats_lock:
+            return dict(cls._stats)
@@ -0,0 +1,148 @@
+import logging
+import re
+import threading
+
+from django.conf import settings
+
+from Screener.services.prompts import ANALYSIS_GUIDELINES, PREFIX_TEMPLATE, RESUME_PROMPT_TEMPLATE
+
+try:
+    import tiktoken
+except ImportError:  # optional: exact counts for OpenAI models, an estimate otherwise
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+_PIECE = re.compile(r'\w+|[^\w\s]')
+# Per-message framing tokens of the chat format, and the tokens priming the reply.
+_MESSAGE_OVERHEAD = 4
+_REPLY_OVERHEAD = 3
+TRUNCATION_MARKER = '\n...'
+
+
+class TokenCounter:
+    """
+    Local token counts for prompt budgeting, shared per model (TokenCounter.for_model).
+    With tiktoken installed the model's own encoding is used, which is exact for OpenAI
+    models (other models, e.g. a local backend, are counted with cl100k_base). Without it
+    words count as one token per six characters and punctuation as one token each, an
+    approximation of those tokenizers on English text.
+    """
+    _lock = threading.Lock()
+    _counters = {}
+
+    def __init__(self, model=None):
+        self.model = model
+        self.encoding = self._encoding(model)
+
+    @classmethod
+    def for_model(cls, model=None):
+        model = model or getattr(settings, 'OPENAI_MODEL', 'gpt-4')
+        with cls._lock:
+            counter = cls._counters.get(model)
+            if counter is None:
+                counter = cls._counters[model] = cls(model)
+            return counter
+
+    @staticmethod
+    def _encoding(model):
+        if tiktoken is None:
+            return None
+        try:
+            try:
+                return tiktoken.encoding_for_model(model)
+            except KeyError:
+                return tiktoken.get_encoding('cl100k_base')
+        except Exception as e:  # the encoding files are downloaded on first use
+            logger.warning(f"tiktoken encoding for {model} unavailable, estimating token counts: {str(e)}")
+            return None
+
+    @property
+    def exact(self):
+        return self.encoding is not None
+
+    def count(self, text):
+        if self.encoding is not None:
+            return len(self.encoding.encode(text, disallowed_special=()))
+        return sum(1 + (len(piece) - 1) // 6 for piece in _PIECE.findall(text))
+
+    def truncate(self, text, max_tokens):
+        """(text cut to at most max_tokens, at a line break where one is close, whether it was cut)."""
+        if not max_tokens or self.count(text) <= max_tokens:
+            return text, False
+        budget = max(0, max_tokens - self.count(TRUNCATION_MARKER))
+        if self.encoding is not None:
+            kept = self.encoding.decode(self.encoding.encode(text, disallowed_special=())[:budget])
+        else:
+            end, used = 0, 0
+            for match in _PIECE.finditer(text):
+                used += 1 + (len(match.group()) - 1) // 6
+                if used > budget:
+                    break
+                end = match.end()
+            kept = text[:end]
+        line_break = kept.rfind('\n')
+        if line_break > len(kept) * 0.8:
+            kept = kept[:line_break]
+        return kept.rstrip() + TRUNCATION_MARKER, True
+
+
+class PromptBuilder:
+    """
+    Assembles the chat messages of an assessment from a position's stable prefix and the
+    applicant's resume, and counts them before they are sent.
+
+    The prefix (RequirementIndex.assessment_prefix) is the whole system message and never
+    contains applicant data, so it is byte-identical for every applicant of a position and
+    providers can serve it from their prompt cache; its token count is computed once per
+    model. The retriever already selects resume chunks within RAG_CONTEXT_MAX_TOKENS; the
+    resume is also cut to RAG_RESUME_MAX_TOKENS here, which bounds the prompt when retrieval
+    is off or failed.
+    """
+    def __init__(self, max_resume_tokens=None):
+        self.max_resume_tokens = (max_resume_tokens if max_resume_tokens is not None
+                                  else getattr(settings, 'RAG_RESUME_MAX_TOKENS', 4000))
+        self._prefix_tokens = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def prefix(system_prompt, instructions, requirements_heading, job_requirements):
+        """The stable system message; called once per position (and per re-screen requirement set)."""
+        return PREFIX_TEMPLATE.format(system_prompt=system_prompt, guidelines=ANALYSIS_GUIDELINES,
+                                      instructions=instructions, requirements_heading=requirements_heading,
+                                      job_requirements=job_requirements)
+
+    def prefix_tokens(self, prefix, model=None):
+        key = (model, prefix)
+        with self._lock:
+            tokens = self._prefix_tokens.get(key)
+        if tokens is None:
+            tokens = TokenCounter.for_model(model).count(prefix) + _MESSAGE_OVERHEAD
+            with self._lock:
+                if len(self._prefix_tokens) >= 256:
+                    self._prefix_tokens.clear()
+                self._prefix_tokens[key] = tokens
+        return tokens
+
+    def messages(self, prefix, resume_text, model=None, template=RESUME_PROMPT_TEMPLATE, **fields):
+        """
+        Returns (messages, stats). stats has the local prompt token count ('prompt_tokens',
+        of which 'prefix_tokens' are cacheable), the resume's tokens and whether it was cut.
+        """
+        counter = TokenCounter.for_model(model)
+        resume_text, truncated = counter.truncate(resume_text, self.max_resume_tokens)
+        user_content = template.format(resume_text=resume_text, **fields)
+        prefix_tokens = self.prefix_tokens(prefix, model)
+        user_tokens = counter.count(user_content) + _MESSAGE_OVERHEAD
+        if truncated:
+            logger.info(f"Resume cut to {self.max_resume_tokens} tokens for the prompt")
+        return [
+            {'role': 'system', 'content': prefix},
+            {'role': 'user', 'content': user_content},
+        ], {
+            'prompt_tokens': prefix_tokens + user_tokens + _REPLY_OVERHEAD,
+            'prefix_tokens': prefix_tokens,
+            'resume_tokens': counter.count(resume_text),
+            'resume_truncated': truncated,
+            'exact': counter.exact,
+        }
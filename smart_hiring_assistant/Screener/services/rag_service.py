@@ -1,111 +1,644 @@
+import hashlib
+import io
+import json
+import logging
+import re
+import time
+from contextlib import contextmanager
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from Screener.services.assessment_cache_service import AssessmentCacheService
+from Screener.services.llm_backends import STAGE_ASSESSMENT, STAGE_TRIAGE, LLMBackends
+from Screener.services.assessment_schema import (
+    assessment_schema, completion_text, max_tokens_for, parse_structured_assessment, request_options,
+)
+from Screener.services.prescreen_service import PreScreenService
+from Screener.services.prompt_builder import PromptBuilder, TokenCounter
+from Screener.services.prompts import (
+    MULTI_POSITION_ENTRY, MULTI_POSITION_SYSTEM_PROMPT, MULTI_POSITION_USER_INSTRUCTIONS, RESCREEN_PREVIOUS_LINE,
+    RESCREEN_RESUME_PROMPT_TEMPLATE, RESCREEN_SYSTEM_PROMPT, RESCREEN_USER_INSTRUCTIONS,
+)
+from Screener.services.requirement_index import RequirementIndex, RequirementIndexService
+from Screener.services.resume_retriever import ResumeRetriever
+
+logger = logging.getLogger(__name__)
+
+_MULTI_DECISION = re.compile(r'OVERALL_DECISION\[\s*([^\]]+?)\s*\]\s*:\s*([A-Za-z_]+)')
+
+
+_NO_USAGE = {'prompt_tokens': 0, 'completion_tokens': 0, 'cached_tokens': 0}
+
+
+def decision_is_qualified(decision_text):
+    """
+    The decision rule for the text after OVERALL_DECISION:, shared by the final parse and the
+    streaming parser: qualified when the first non-empty line is exactly 'qualified' (any
+    case). Anything after that line, such as a closing note, is ignored.
+    """
+    lines = decision_text.strip().splitlines()
+    return bool(lines) and lines[0].strip().lower() == 'qualified'
+
+
+def _usage(response, prompt=None, completion=None, model=None):
+    """
+    Token counts reported for a completion, including the prompt tokens served from the
+    provider's prompt cache. Backends that report no usage get the local counts instead:
+    prompt['prompt_tokens'] from PromptBuilder and the completion text counted here, flagged
+    'estimated'.
+    """
+    usage = getattr(response, 'usage', None)
+    details = getattr(usage, 'prompt_tokens_details', None)
+    result = {
+        'prompt_tokens': getattr(usage, 'prompt_tokens', None),
+        'completion_tokens': getattr(usage, 'completion_tokens', None),
+        'cached_tokens': getattr(details, 'cached_tokens', None) or 0,
+    }
+    if result['prompt_tokens'] is None and prompt is not None:
+        result.update(prompt_tokens=prompt['prompt_tokens'], estimated=True,
+                      completion_tokens=TokenCounter.for_model(model).count(completion or ''))
+    return result
+
+
+@contextmanager
+def _timed(timings, stage):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[stage] = round(time.perf_counter() - started, 6)
+
+
 class RAGService:
-    def __init__(self, openai_service):
-        self.openai_service = openai_service
-        self.job_requirements = """
-        Education: Bachelor's or Master's degree in computer science, engineering, mathematics, or related fields; coursework in machine learning or data science is preferred.
-        Programming: 2+ years of experience with Python, R, or similar languages; proficiency in TensorFlow, PyTorch, or other ML frameworks.
-        Machine Learning: 2+ years of practical experience with ML algorithms, model deployment, and optimization.
-        Software Engineering: Familiarity with Git, Agile methodologies, and collaborative tools; experience in software development teams for at least 2-3 years.
-        Problem-Solving: Strong analytical skills, with a track record of solving complex problems using machine learning techniques.
-        Communication: Effective communicator across technical and non-technical audiences; experience working in cross-functional teams.
-        Portfolio: Demonstrated projects in machine learning through work experience, academic research, or personal projects; contributions to open-source projects or participation in hackathons.
+    """
+    Assess resumes against a position's requirements.
+    position arguments accept a JobPosition, a compiled RequirementIndex, or None for
+    SCREENER_DEFAULT_POSITION.
+    RAG_OUTPUT_FORMAT selects how single-position assessments are answered: 'tool' (a forced
+    function call) or 'json_schema' return a structured assessment with per-requirement
+    statuses and a score; 'text' keeps the OVERALL_DECISION format. Streaming and
+    multi-position assessments always use the text format.
+    Prompts are a stable per-position system message followed by the resume (PromptBuilder),
+    so providers can cache the prefix; retrieval keeps the resume within RAG_CONTEXT_MAX_TOKENS.
+    openai_service is the default chat completion backend (LLM_DEFAULT_BACKEND when None). A
+    position or LLM_STAGE_BACKENDS can name another LLM_BACKENDS entry for the assessment,
+    and a triage backend whose not-qualified verdicts are final, so only the applicants it
+    qualifies reach the assessment backend.
+    """
+    OUTPUT_FORMATS = ('tool', 'json_schema', 'text')
+
+    def __init__(self, openai_service=None, assessment_cache=None, prescreen=None, retriever=None, prompt_builder=None):
+        self.openai_service = openai_service if openai_service is not None else LLMBackends.default()
+        self.prompt_builder = prompt_builder or PromptBuilder()
+        if assessment_cache is None and getattr(settings, 'ASSESSMENT_CACHE_ENABLED', True):
+            assessment_cache = AssessmentCacheService()
+        self.assessment_cache = assessment_cache
+        if prescreen is None and getattr(settings, 'PRESCREEN_ENABLED', True):
+            prescreen = PreScreenService()
+        self.prescreen = prescreen
+        if retriever is None and getattr(settings, 'RAG_RETRIEVAL_ENABLED', True):
+            retriever = ResumeRetriever(prescreen=prescreen)
+        self.retriever = retriever
+        self.output_format = getattr(settings, 'RAG_OUTPUT_FORMAT', 'tool')
+        if self.output_format not in self.OUTPUT_FORMATS:
+            raise ValueError(f"Unknown RAG_OUTPUT_FORMAT '{self.output_format}'; expected one of "
+                             f"{', '.join(self.OUTPUT_FORMATS)}")
+    @property
+    def structured(self):
+        return self.output_format != 'text'
+    @property
+    def model_name(self):
+        return getattr(self.openai_service, 'model', 'gpt-4')
+    def backend(self, index, stage=STAGE_ASSESSMENT):
+        """The backend for a stage of index's position; None for a stage that is not configured (triage)."""
+        name = index.backends.get(stage) or getattr(settings, 'LLM_STAGE_BACKENDS', {}).get(stage)
+        if name:
+            return LLMBackends.get(name)
+        return self.openai_service if stage == STAGE_ASSESSMENT else None
+    def backend_name(self, index, stage=STAGE_ASSESSMENT):
+        """The LLM_BACKENDS name of backend(index, stage); LLM_DEFAULT_BACKEND for openai_service."""
+        return (index.backends.get(stage) or getattr(settings, 'LLM_STAGE_BACKENDS', {}).get(stage)
+                or (getattr(settings, 'LLM_DEFAULT_BACKEND', 'openai') if stage == STAGE_ASSESSMENT else None))
+    @property
+    def job_requirements(self):
+        """Requirements text of the default position."""
+        return RequirementIndexService.for_position().job_requirements
+    @staticmethod
+    def requirement_index(position=None):
+        if isinstance(position, RequirementIndex):
+            return position
+        return RequirementIndexService.for_position(position)
+    def process_resume(self, resume_text, position=None):
+        timings = {}
+        try:
+            index = self.requirement_index(position)
+            with _timed(timings, 'prescreen'):
+                prescreen = self._prescreen(resume_text, index)
+            if prescreen is not None and prescreen['tier'] == PreScreenService.TIER_REJECT:
+                return self._prescreen_rejection(prescreen, timings)
+            contexts = {}
+            triage_backend = self.backend(index, STAGE_TRIAGE)
+            triage = None
+            if triage_backend is not None:
+                result = self._assess(resume_text, index, triage_backend, timings, contexts, prefix='triage_')
+                if result.get('error'):
+                    logger.warning(f"Triage with {triage_backend.model} failed, using the assessment backend: "
+                                   f"{result['error']}")
+                elif not result['meets_requirements']:
+                    return dict(result, prescreen=prescreen, triaged_out=True)
+                triage = {'model': triage_backend.model, 'meets_requirements': result['meets_requirements'],
+                          'usage': result['usage'], 'error': result.get('error')}
+            result = self._assess(resume_text, index, self.backend(index), timings, contexts)
+            return dict(result, prescreen=prescreen, triage=triage)
+        except Exception as e:
+            # Returned as the result's error, which the caller logs and records.
+            logger.debug(f"RAG processing failed: {str(e)}", exc_info=True)
+            return {
+                'detailed_assessment': 'Unable to complete resume assessment due to an error.',
+                'meets_requirements': False,
+                'raw_response': str(e),
+                'error': str(e)
+            }
+    def _assess(self, resume_text, index, backend, timings, contexts, prefix=''):
+        """
+        One assessment of resume_text with backend: cache, retrieval, LLM call and parse, with
+        stage timings under prefix. contexts keeps the retrieved context for a second stage.
+        """
+        with _timed(timings, f"{prefix}cache_lookup"):
+            cache_key = self._cache_lookup_key(resume_text, index, backend=backend)
+            cached = self._cache_get(cache_key)
+        if cached is not None:
+            return dict(self._restore_structured(cached, index), timings=timings, usage=_NO_USAGE,
+                        **self._provenance(index, backend=backend))
+        if 'context' not in contexts:
+            contexts['retrieval'] = {}
+            with _timed(timings, f"{prefix}retrieval"):
+                contexts['context'] = self._retrieve(resume_text, index.matrix, contexts['retrieval'])
+        with _timed(timings, f"{prefix}llm"):
+            assessment_response, usage, prompt = self._generate_assessment(contexts['context'], index, backend)
+        with _timed(timings, f"{prefix}parse"):
+            result, is_valid = self._parse_response(assessment_response, index)
+        if is_valid:
+            self._cache_set(cache_key, result, backend)
+        else:
+            # Unparseable output is an error to retry, not a rejection of the candidate.
+            result['error'] = result['detailed_assessment']
+        return dict(result, retrieval=contexts['retrieval'], timings=timings, usage=usage, prompt=prompt,
+                    **self._provenance(index, backend=backend))
+    def prepare_batch_request(self, resume_text, position=None):
+        """
+        The part of process_resume before the LLM call, for the batch API (run_llm_batches).
+        Returns (result, request). result is final when the pre-screen rejected the resume or
+        the cache answered; otherwise request holds the chat completion 'body' for the
+        position's assessment backend and the JSON-serializable 'context' that
+        finish_batch_request needs for the answer. There is no triage stage.
+        """
+        timings = {}
+        index = self.requirement_index(position)
+        with _timed(timings, 'prescreen'):
+            prescreen = self._prescreen(resume_text, index)
+        if prescreen is not None and prescreen['tier'] == PreScreenService.TIER_REJECT:
+            return dict(self._prescreen_rejection(prescreen, timings), **self._provenance(index)), None
+        backend = self.backend(index)
+        with _timed(timings, 'cache_lookup'):
+            cached = self._cache_get(self._cache_lookup_key(resume_text, index, backend=backend))
+        if cached is not None:
+            return dict(self._restore_structured(cached, index), prescreen=prescreen, timings=timings, usage=_NO_USAGE,
+                        **self._provenance(index, backend=backend)), None
+        retrieval = {}
+        with _timed(timings, 'retrieval'):
+            resume_context = self._retrieve(resume_text, index.matrix, retrieval)
+        messages, prompt = self._build_messages(resume_context, index, backend)
+        body = dict(self._request_options(index), model=self._model_name(backend), messages=messages)
+        context = {'prescreen': prescreen, 'retrieval': retrieval, 'timings': timings, 'prompt': prompt,
+                   'prompt_version': self.prompt_version(index), 'model': self._model_name(backend),
+                   'requirement_versions': index.requirement_versions}
+        return None, {'body': body, 'context': context}
+    def finish_batch_request(self, resume_text, position, response, context):
+        """
+        The process_resume result for the batch answer (a chat completion) to a
+        prepare_batch_request, parsed, validated and cached like an interactive one. An
+        answer to a prompt that no longer matches the position (requirements or prompts
+        changed while the batch ran) is returned as an error, so the job is assessed again.
         """
-    def process_resume(self, resume_text):
         try:
-            context = self._combine_context(resume_text)
-            assessment_response = self._generate_assessment(context)
-            # Parse the assessment focusing only on the final decision
-            if "OVERALL_DECISION:" not in assessment_response:
-                return {
-                    'detailed_assessment': "Error: Assessment response missing required format",
-                    'meets_requirements': False,
-                    'raw_response': assessment_response
-                }
-            # Split at OVERALL_DECISION: and take only the parts we need
-            parts = assessment_response.split("OVERALL_DECISION:")
-            if len(parts) != 2:
-                return {
-                    'detailed_assessment': "Error: Invalid assessment format",
-                    'meets_requirements': False,
-                    'raw_response': assessment_response
-                }
-            detailed_assessment = parts[0].strip()
-            final_decision = parts[1].strip().lower()
-            # Only check for exact match of 'qualified' in the final decision
-            is_qualified = final_decision.strip() == 'qualified'
+            index = self.requirement_index(position)
+            backend = self.backend(index)
+            if (context['prompt_version'] != self.prompt_version(index) or context['model'] != self._model_name(backend)
+                    or context['requirement_versions'] != index.requirement_versions):
+                raise ValueError('The requirements, prompt or model changed after the batch was submitted')
+            timings = dict(context['timings'])
+            with _timed(timings, 'parse'):
+                message = response.choices[0].message
+                text = completion_text(message) if self.structured else message.content
+                result, is_valid = self._parse_response(text, index)
+            if is_valid:
+                self._cache_set(self._cache_lookup_key(resume_text, index, backend=backend), result, backend)
+            else:
+                result['error'] = result['detailed_assessment']
+            usage = _usage(response, context['prompt'], text, context['model'])
+            return dict(result, prescreen=context['prescreen'], retrieval=context['retrieval'], timings=timings,
+                        usage=usage, prompt=context['prompt'], **self._provenance(index, backend=backend))
+        except Exception as e:
+            logger.error(f"Batch assessment failed: {str(e)}")
             return {
-                'detailed_assessment': detailed_assessment,
-                'meets_requirements': is_qualified,
-                'raw_response': assessment_response
+                'detailed_assessment': 'Unable to complete resume assessment due to an error.',
+                'meets_requirements': False,
+                'raw_response': str(e),
+                'error': str(e)
             }
+    def reassess_requirements(self, resume_text, position, previous):
+        """
+        Re-assess a resume after its position's requirements were edited. previous maps the
+        names of requirements whose text is unchanged to the {'status', 'evidence'} recorded
+        for them; only the other requirements are put to the model, with the recorded statuses
+        as context, and it answers with their statuses and a new overall score and decision.
+        The merged assessment covers every current requirement, is returned in the
+        process_resume format (with 'reassessed' listing the names sent to the model) and is
+        cached like a full one. Structured output only.
+        """
+        timings = {}
+        try:
+            index = self.requirement_index(position)
+            with _timed(timings, 'prescreen'):
+                prescreen = self._prescreen(resume_text, index)
+            if prescreen is not None and prescreen['tier'] == PreScreenService.TIER_REJECT:
+                return dict(self._prescreen_rejection(prescreen, timings), **self._provenance(index))
+            backend = self.backend(index)
+            with _timed(timings, 'cache_lookup'):
+                cache_key = self._cache_lookup_key(resume_text, index, backend=backend)
+                cached = self._cache_get(cache_key)
+            if cached is not None:
+                return dict(self._restore_structured(cached, index), prescreen=prescreen, timings=timings,
+                            usage=_NO_USAGE, **self._provenance(index, backend=backend))
+            affected = [name for name in index.requirement_names if name not in previous]
+            sections = [(name, text) for name, text in index.sections if name in affected]
+            job_requirements = '\n'.join(f"{name}: {text}" for name, text in sections)
+            retrieval = {}
+            with _timed(timings, 'retrieval'):
+                resume_context = self._retrieve(resume_text, job_requirements or index.matrix, retrieval)
+            # The same for every applicant of a re-screen run with the same changed requirements.
+            prompt_prefix = self.prompt_builder.prefix(
+                RESCREEN_SYSTEM_PROMPT.format(position_title=index.title, requirement_names=', '.join(affected) or 'none'),
+                RESCREEN_USER_INSTRUCTIONS, 'Requirements to assess:', job_requirements or 'None',
+            )
+            messages, prompt = self.prompt_builder.messages(
+                prompt_prefix, resume_context, model=self._model_name(backend), template=RESCREEN_RESUME_PROMPT_TEMPLATE,
+                previous_assessments='\n'.join(
+                    RESCREEN_PREVIOUS_LINE.format(name=name, status=previous[name]['status'],
+                                                  evidence=previous[name].get('evidence', ''))
+                    for name in index.requirement_names if name in previous
+                ) or 'None',
+            )
+            with _timed(timings, 'llm'):
+                response = backend.generate_chat_completion(
+                    messages, **request_options(self.output_format, assessment_schema(affected), max_tokens_for(affected))
+                )
+                answer_text = completion_text(response.choices[0].message)
+            with _timed(timings, 'parse'):
+                answer = parse_structured_assessment(answer_text, affected)
+                statuses = dict(previous, **answer['requirements'])
+                merged = dict(json.loads(answer_text), requirements=[
+                    {'name': name, 'status': statuses[name]['status'], 'evidence': statuses[name].get('evidence', '')}
+                    for name in index.requirement_names if name in statuses
+                ])
+                result = parse_structured_assessment(json.dumps(merged), index.requirement_names)
+            self._cache_set(cache_key, result, backend)
+            usage = _usage(response, prompt, answer_text, self._model_name(backend))
+            return dict(result, prescreen=prescreen, retrieval=retrieval, timings=timings, usage=usage, prompt=prompt,
+                        reassessed=affected, **self._provenance(index, backend=backend))
         except Exception as e:
-            print(f"RAG processing failed: {str(e)}")
+            logger.error(f"Requirement re-assessment failed: {str(e)}")
             return {
                 'detailed_assessment': 'Unable to complete resume assessment due to an error.',
                 'meets_requirements': False,
-                'raw_response': str(e)
+                'raw_response': str(e),
+                'error': str(e)
             }
-    def _combine_context(self, resume_text):
-        context = f"""
-        Job Requirements Analysis Guidelines:
-        - Requirements listed are minimum qualifications
-        - Candidates exceeding minimum requirements should be considered qualified
-        - Related skills and experience should be considered equivalent
-        - More years of experience than required is a positive factor
-        - Different but relevant degree fields are acceptable
-        - Consider the overall strength of the candidate
-        Job Requirements:
-        {self.job_requirements}
-        Applicant's Resume:
-        {resume_text}
+    def process_resume_for_positions(self, resume_text, positions):
+        """
+        Assess one resume against several positions. The pre-screen runs for all of them in
+        one batched computation and positions still in play after it (and the cache) are
+        evaluated together in a single LLM call. Positions with their own backend or a
+        triage stage are assessed one by one through process_resume.
+        Returns {position key: result dict}.
         """
-        return context
-    def _generate_assessment(self, context):
-        messages = [
-            {
-                'role': 'system',
-                'content': '''You are an experienced technical recruiter evaluating candidates for a machine learning engineer position.
-                Your goal is to identify qualified candidates who meet or exceed the minimum requirements, including those with equivalent or superior qualifications.
-                Assessment Guidelines:
-                1. Consider both direct matches and relevant equivalent qualifications
-                2. More experience than required is a positive factor
-                3. Related degrees and skills should be evaluated favorably
-                4. Look for potential and demonstrated capability, not just exact matches
-                5. Consider the candidate holistically
-                Format your response as follows:
-                1. Start with a detailed analysis of each requirement:
-                   - Education assessment
-                   - Programming experience assessment
-                   - Machine learning experience assessment
-                   - Software engineering experience assessment
-                   - Problem-solving skills assessment
-                   - Communication skills assessment
-                   - Portfolio assessment
-                2. Provide a summary of strengths and weaknesses
-                3. End your response with exactly one of these two lines:
-                   OVERALL_DECISION: qualified
-                   or
-                   OVERALL_DECISION: not_qualified
-                A candidate should be marked as qualified if they:
-                - Meet or exceed the core technical requirements (even with equivalent experience)
-                - Show strong potential in required areas
-                - Have demonstrated relevant skills, even if through different technologies or roles'''
-            },
-            {
-                'role': 'user',
-                'content': f"""{context}
-                Please evaluate this candidate considering both direct matches and equivalent qualifications.
-                For each requirement:
-                1. State if it is met, exceeded, or partially met
-                2. List relevant evidence from the resume
-                3. Consider equivalent experience or qualifications
-                4. Note any exceptional strengths
-                End with exactly:
-                OVERALL_DECISION: qualified
-                or
-                OVERALL_DECISION: not_qualified
-                """
+        indexes = [self.requirement_index(position) for position in positions]
+        results, pending = {}, []
+        prescreens = self._prescreen_many(resume_text, indexes)
+        for index, prescreen in zip(indexes, prescreens):
+            if prescreen is not None and prescreen['tier'] == PreScreenService.TIER_REJECT:
+                results[index.key] = dict(self._prescreen_rejection(prescreen, {}), **self._provenance(index))
+                continue
+            if self.backend(index) is not self.openai_service or self.backend(index, STAGE_TRIAGE) is not None:
+                results[index.key] = self.process_resume(resume_text, index)
+                continue
+            cache_key = self._cache_lookup_key(resume_text, index, structured=False)
+            cached = self._cache_get(cache_key)
+            if cached is not None:
+                results[index.key] = dict(cached, prescreen=prescreen, usage=_NO_USAGE,
+                                          **self._provenance(index, structured=False))
+            else:
+                pending.append((index, prescreen, cache_key))
+        if len(pending) == 1:
+            index, prescreen, _ = pending[0]
+            results[index.key] = self.process_resume(resume_text, index)
+        elif pending:
+            results.update(self._assess_positions(resume_text, pending))
+        return results
+    def _assess_positions(self, resume_text, pending):
+        timings, retrieval = {}, {}
+        try:
+            with _timed(timings, 'retrieval'):
+                job_requirements = '\n'.join(index.job_requirements for index, _, _ in pending)
+                resume_context = self._retrieve(resume_text, job_requirements, retrieval)
+            prompt_prefix = self.prompt_builder.prefix(
+                MULTI_POSITION_SYSTEM_PROMPT, MULTI_POSITION_USER_INSTRUCTIONS, 'Open Positions:',
+                ''.join(MULTI_POSITION_ENTRY.format(key=index.key, title=index.title, job_requirements=index.job_requirements)
+                        for index, _, _ in pending),
+            )
+            messages, prompt = self.prompt_builder.messages(prompt_prefix, resume_context, model=self.model_name)
+            with _timed(timings, 'llm'):
+                response = self.openai_service.generate_chat_completion(messages)
+                assessment_response = response.choices[0].message.content
+            with _timed(timings, 'parse'):
+                parsed = self._parse_multi_assessment(assessment_response)
+            # One call served every position; attribute its tokens evenly.
+            usage = _usage(response, prompt, assessment_response, self.model_name)
+            usage.update({name: usage[name] // len(pending) for name in ('prompt_tokens', 'completion_tokens', 'cached_tokens')
+                          if usage[name] is not None})
+        except Exception as e:
+            logger.error(f"Multi-position assessment failed: {str(e)}")
+            parsed, usage = {}, None
+        results = {}
+        for index, prescreen, cache_key in pending:
+            if index.key not in parsed:
+                # Missing or malformed decision for this position: assess it on its own.
+                results[index.key] = self.process_resume(resume_text, index)
+                continue
+            result = parsed[index.key]
+            self._cache_set(cache_key, result)
+            results[index.key] = dict(result, prescreen=prescreen, retrieval=retrieval, timings=timings, usage=usage,
+                                      **self._provenance(index, structured=False))
+        return results
+    def _parse_multi_assessment(self, assessment_response):
+        """{position key: result} for every well-formed OVERALL_DECISION[key] line."""
+        results, start = {}, 0
+        for match in _MULTI_DECISION.finditer(assessment_response):
+            decision = match.group(2).lower()
+            if decision in ('qualified', 'not_qualified'):
+                results[match.group(1)] = {
+                    'detailed_assessment': assessment_response[start:match.start()].strip(),
+                    'meets_requirements': decision == 'qualified',
+                    'raw_response': assessment_response,
+                }
+            start = match.end()
+        return results
+    def _parse_response(self, assessment_response, index, structured=None):
+        """Structured parse with a fallback to the text format. Returns (result, is_valid)."""
+        if self.structured if structured is None else structured:
+            try:
+                return parse_structured_assessment(assessment_response, index.requirement_names), True
+            except ValueError as e:
+                logger.warning(f"Structured assessment invalid ({str(e)}), trying the text format")
+        return self._parse_assessment(assessment_response)
+    def _restore_structured(self, cached, index):
+        """The cache keeps the raw response only; re-derive score and statuses from it."""
+        if not self.structured:
+            return cached
+        try:
+            parsed = parse_structured_assessment(cached['raw_response'], index.requirement_names)
+        except ValueError:
+            return cached
+        return dict(cached, llm_score=parsed['llm_score'], requirements=parsed['requirements'])
+    def _parse_assessment(self, assessment_response):
+        """Split the completion at OVERALL_DECISION:. Returns (result, is_valid)."""
+        # Parse the assessment focusing only on the final decision
+        if "OVERALL_DECISION:" not in assessment_response:
+            return {
+                'detailed_assessment': "Error: Assessment response missing required format",
+                'meets_requirements': False,
+                'raw_response': assessment_response
+            }, False
+        # Split at OVERALL_DECISION: and take only the parts we need
+        parts = assessment_response.split("OVERALL_DECISION:")
+        if len(parts) != 2:
+            return {
+                'detailed_assessment': "Error: Invalid assessment format",
+                'meets_requirements': False,
+                'raw_response': assessment_response
+            }, False
+        detailed_assessment = parts[0].strip()
+        # Only an exact 'qualified' on the decision line counts
+        is_qualified = decision_is_qualified(parts[1])
+        return {
+            'detailed_assessment': detailed_assessment,
+            'meets_requirements': is_qualified,
+            'raw_response': assessment_response
+        }, True
+    def _prescreen(self, resume_text, index):
+        """Local similarity pre-screen; None when disabled or if it fails (the LLM then decides)."""
+        return self._prescreen_many(resume_text, [index])[0]
+    def _prescreen_many(self, resume_text, indexes):
+        if self.prescreen is None:
+            return [None] * len(indexes)
+        try:
+            results = self.prescreen.score_positions(resume_text, [index.matrix for index in indexes])
+        except Exception as e:
+            logger.error(f"Pre-screen failed: {str(e)}")
+            return [None] * len(indexes)
+        for index, result in zip(indexes, results):
+            result['position'] = index.key
+            result['keywords'] = index.keyword_matches(resume_text)
+        return results
+    def _prescreen_rejection(self, prescreen, timings):
+        summary = (f"Automatically screened out before LLM review: requirement similarity "
+                   f"{prescreen['score']:.3f} is below the {self.prescreen.reject_threshold:.3f} threshold.")
+        return {
+            'detailed_assessment': summary,
+            'meets_requirements': False,
+            'screened_out': True,
+            'raw_response': '',
+            'prescreen': prescreen,
+            'timings': timings,
+            'usage': _NO_USAGE,
+        }
+    def _prompt_fingerprint(self, index, structured=None):
+        if self.structured if structured is None else structured:
+            prompt_template = self.output_format + index.structured_prompt_fingerprint
+        else:
+            prompt_template = index.prompt_fingerprint
+        if self.retriever is not None:
+            prompt_template += self.retriever.signature
+        return prompt_template
+    def prompt_version(self, index, structured=None):
+        """Short hash of everything in the prompt except the resume; stored with each assessment."""
+        return hashlib.sha256(self._prompt_fingerprint(index, structured).encode('utf-8')).hexdigest()[:12]
+    def _model_name(self, backend=None):
+        return getattr(backend, 'model', None) or self.model_name
+    def _provenance(self, index, structured=None, backend=None):
+        return {'position': index.key, 'model': self._model_name(backend),
+                'prompt_version': self.prompt_version(index, structured),
+                'requirement_versions': index.requirement_versions}
+    def _cache_lookup_key(self, resume_text, index, structured=None, backend=None):
+        if self.assessment_cache is None:
+            return None
+        return self.assessment_cache.make_key(resume_text, index.job_requirements,
+                                              self._prompt_fingerprint(index, structured), self._model_name(backend))
+    def _cache_get(self, cache_key):
+        if cache_key is None:
+            return None
+        try:
+            return self.assessment_cache.get(cache_key)
+        except Exception as e:
+            logger.error(f"Assessment cache lookup failed: {str(e)}")
+            return None
+    def _cache_set(self, cache_key, result, backend=None):
+        if cache_key is None:
+            return
+        try:
+            self.assessment_cache.set(cache_key, result, self._model_name(backend))
+        except Exception as e:
+            logger.error(f"Assessment cache store failed: {str(e)}")
+    def _retrieve(self, resume_text, job_requirements, retrieval=None):
+        """The resume reduced to the chunks relevant to the requirements (the full text if retrieval is off)."""
+        if self.retriever is None:
+            return resume_text
+        try:
+            resume_text, stats = self.retriever.retrieve(resume_text, job_requirements)
+            if retrieval is not None:
+                retrieval.update(stats)
+        except Exception as e:
+            logger.error(f"Resume retrieval failed, sending the full resume: {str(e)}")
+        return resume_text
+    def _build_messages(self, resume_context, index, backend=None, structured=None):
+        """(messages, local prompt token counts): the position's stable prefix and the resume context."""
+        if self.structured if structured is None else structured:
+            prompt_prefix = index.structured_assessment_prefix
+        else:
+            prompt_prefix = index.assessment_prefix
+        return self.prompt_builder.messages(prompt_prefix, resume_context, model=self._model_name(backend))
+    def _generate_assessment(self, resume_context, index, backend=None):
+        """
+        Returns (completion text, token usage, local prompt counts); for structured output the
+        text is the JSON assessment.
+        """
+        backend = backend or self.openai_service
+        messages, prompt = self._build_messages(resume_context, index, backend)
+        response = backend.generate_chat_completion(messages, **self._request_options(index))
+        if not self.structured:
+            text = response.choices[0].message.content
+        else:
+            text = completion_text(response.choices[0].message)
+        return text, _usage(response, prompt, text, self._model_name(backend)), prompt
+    def _request_options(self, index):
+        """Chat completion arguments besides the messages: the structured output request, if any."""
+        if not self.structured:
+            return {}
+        return request_options(self.output_format, index.assessment_schema, index.structured_max_tokens)
+    async def astream_assessment(self, resume_text, position=None):
+        """
+        Stream an assessment as (event, payload) tuples:
+        ('token', text) for each delta, ('decision', bool) as soon as the OVERALL_DECISION
+        line is complete, and finally ('result', dict) in the process_resume format.
+        The position's assessment backend answers directly; there is no triage stage.
+        """
+        parser = DecisionStreamParser()
+        # The stored assessment needs the full text; deltas go into one buffer, read once at the end.
+        completion = io.StringIO()
+        usage_chunk = None
+        try:
+            index = await sync_to_async(self.requirement_index)(position)
+            # Embedding and retrieval are CPU-bound; run them off the event loop like the DB calls.
+            prescreen = await sync_to_async(self._prescreen)(resume_text, index)
+            if prescreen is not None and prescreen['tier'] == PreScreenService.TIER_REJECT:
+                result = dict(self._prescreen_rejection(prescreen, {}), **self._provenance(index))
+                yield 'token', result['detailed_assessment']
+                yield 'decision', False
+                yield 'result', result
+                return
+            backend = self.backend(index)
+            cache_key = self._cache_lookup_key(resume_text, index, structured=False, backend=backend)
+            cached = await sync_to_async(self._cache_get)(cache_key)
+            if cached is not None:
+                yield 'token', cached['raw_response']
+                yield 'decision', cached['meets_requirements']
+                yield 'result', dict(cached, prescreen=prescreen, usage=_NO_USAGE,
+                                     **self._provenance(index, structured=False, backend=backend))
+                return
+            retrieved = await sync_to_async(self._retrieve)(resume_text, index.matrix)
+            messages, prompt = self._build_messages(retrieved, index, backend, structured=False)
+            async for delta in backend.astream_chat_completion(messages):
+                if not isinstance(delta, str):
+                    usage_chunk = delta  # sent after the last delta by backends that report usage
+                    continue
+                completion.write(delta)
+                yield 'token', delta
+                decision = parser.feed(delta)
+                if decision is not None:
+                    yield 'decision', decision
+        except Exception as e:
+            logger.error(f"RAG streaming failed: {str(e)}")
+            yield 'result', {
+                'detailed_assessment': 'Unable to complete resume assessment due to an error.',
+                'meets_requirements': False,
+                'raw_response': str(e),
+                'error': str(e)
             }
-        ]
-        response = self.openai_service.generate_chat_completion(messages)
-        return response.choices[0].message.content
\ No newline at end of file
+            return
+        decision = parser.close()
+        if decision is not None:
+            yield 'decision', decision
+        text = completion.getvalue()
+        completion.close()
+        result, is_valid = self._parse_assessment(text)
+        if is_valid:
+            await sync_to_async(self._cache_set)(cache_key, result, backend)
+        else:
+            result['error'] = result['detailed_assessment']
+        # The provider's counts when the stream reported them, else the local counts.
+        usage = _usage(usage_chunk, prompt, text, self._model_name(backend))
+        yield 'result', dict(result, prescreen=prescreen, usage=usage, prompt=prompt,
+                             **self._provenance(index, structured=False, backend=backend))
+
+
+class DecisionStreamParser:
+    """
+    Incrementally detect the OVERALL_DECISION line in a streamed completion.
+    Only a short tail of the stream is kept, never the full text. feed() returns the
+    decision (True for qualified) once, as soon as the decision word is terminated;
+    close() flushes a decision that ended the stream without a trailing newline.
+    """
+    MARKER = 'OVERALL_DECISION:'
+
+    def __init__(self):
+        self._tail = ''
+        self._value = None
+        self.decision = None
+
+    def feed(self, delta):
+        if self.decision is not None:
+            return None
+        if self._value is None:
+            window = self._tail + delta
+            index = window.find(self.MARKER)
+            if index == -1:
+                self._tail = window[-(len(self.MARKER) - 1):]
+                return None
+            self._value = ''
+            delta = window[index + len(self.MARKER):]
+        self._value += delta
+        value = self._value.lstrip()
+        if '\n' in value or '\r' in value:
+            return self._finish(value)
+        return None
+
+    def close(self):
+        if self.decision is None and self._value is not None:
+            return self._finish(self._value)
+        return None
+
+    def _finish(self, value):
+        self.decision = decision_is_qualified(value)
+        return self.decision
@@ -0,0 +1,135 @@
+import hashlib
+import json
+import logging
+import re
+import threading
+
+from django.conf import settings
+
+from Screener.models import JobPosition
+from Screener.services.prescreen_service import PreScreenService
+from Screener.services.assessment_schema import assessment_schema, max_tokens_for
+from Screener.services.prompt_builder import PromptBuilder
+from Screener.services.prompts import (
+    PROMPT_TEMPLATE, REQUIREMENT_ASSESSMENT_LINE, STRUCTURED_PROMPT_TEMPLATE, STRUCTURED_SYSTEM_PROMPT,
+    STRUCTURED_USER_INSTRUCTIONS, SYSTEM_PROMPT, USER_INSTRUCTIONS,
+)
+from Screener.services.requirements import parse_requirement_sections
+
+logger = logging.getLogger(__name__)
+
+
+class RequirementIndex:
+    """
+    Everything screening needs about one position, compiled once: the requirements text,
+    its sections, their versions and keyword sets, the pre-screen TF-IDF matrix, the system
+    prompts and stable prompt prefixes, the JSON schema of a structured assessment and the
+    LLM backend per stage.
+    """
+    def __init__(self, key, title, job_requirements, keywords=None, position_id=None, version=None, prescreen=None,
+                 backends=None):
+        self.key = key
+        self.title = title
+        self.position_id = position_id
+        self.version = version
+        self.job_requirements = job_requirements
+        self.backends = {stage: name for stage, name in (backends or {}).items() if name}  # {stage: LLM_BACKENDS name}
+        self.sections = parse_requirement_sections(job_requirements)
+        self.keywords = {name: frozenset(words) for name, words in (keywords or {}).items() if words}
+        self._keyword_patterns = {
+            name: re.compile(r'(?<![a-z0-9])(?:' + '|'.join(re.escape(w) for w in sorted(words, key=len, reverse=True))
+                             + r')(?![a-z0-9])')
+            for name, words in self.keywords.items()
+        }
+        self.matrix = (prescreen or PreScreenService()).compile(job_requirements)
+        self.system_prompt = SYSTEM_PROMPT.format(
+            position_title=title,
+            requirement_assessments='\n'.join(REQUIREMENT_ASSESSMENT_LINE.format(name=name) for name, _ in self.sections),
+        )
+        # System messages of the text and structured assessments: all of the prompt but the resume.
+        self.assessment_prefix = PromptBuilder.prefix(self.system_prompt, USER_INSTRUCTIONS, 'Job Requirements:',
+                                                      job_requirements)
+        self.prompt_fingerprint = PROMPT_TEMPLATE + self.system_prompt
+        self.requirement_names = list(dict.fromkeys(name for name, _ in self.sections))
+        # Short hash of each requirement's text, stored with assessments so a re-screen can
+        # tell which requirements an edit actually changed.
+        section_texts = {}
+        for name, text in self.sections:
+            section_texts[name] = f"{section_texts[name]}\n{text}" if name in section_texts else text
+        self.requirement_versions = {
+            name: hashlib.sha256(' '.join(text.split()).encode('utf-8')).hexdigest()[:12]
+            for name, text in section_texts.items()
+        }
+        self.structured_system_prompt = STRUCTURED_SYSTEM_PROMPT.format(
+            position_title=title, requirement_names=', '.join(self.requirement_names),
+        )
+        self.structured_assessment_prefix = PromptBuilder.prefix(
+            self.structured_system_prompt, STRUCTURED_USER_INSTRUCTIONS, 'Job Requirements:', job_requirements,
+        )
+        self.assessment_schema = assessment_schema(self.requirement_names)
+        self.structured_max_tokens = max_tokens_for(self.requirement_names)
+        self.structured_prompt_fingerprint = (
+            STRUCTURED_PROMPT_TEMPLATE + self.structured_system_prompt
+            + json.dumps(self.assessment_schema, sort_keys=True)
+        )
+
+    @classmethod
+    def from_position(cls, position, prescreen=None):
+        requirements = list(position.requirements.all())
+        return cls(
+            key=position.slug,
+            title=position.title,
+            job_requirements='\n'.join(f"{r.name}: {r.description}" for r in requirements),
+            keywords={r.name: r.keyword_list() for r in requirements},
+            position_id=position.pk,
+            version=position.updated_at,
+            prescreen=prescreen,
+            backends={'assessment': position.llm_backend, 'triage': position.triage_backend},
+        )
+
+    def keyword_matches(self, resume_text):
+        """{requirement name: sorted keywords found in the (normalized) resume text}."""
+        text = resume_text.lower()
+        return {name: sorted(set(pattern.findall(text))) for name, pattern in self._keyword_patterns.items()}
+
+
+class RequirementIndexService:
+    """
+    Process-wide cache of RequirementIndex objects keyed by position id.
+    Entries are dropped by the JobPosition/JobRequirement signals in this process and
+    rebuilt when a position's updated_at no longer matches, which covers edits made by
+    other processes (requirement edits touch the position's updated_at).
+    """
+    _lock = threading.Lock()
+    _indexes = {}
+
+    @classmethod
+    def for_position(cls, position=None):
+        """Compiled index for position (a JobPosition), or for SCREENER_DEFAULT_POSITION when None."""
+        if position is None:
+            position = cls.default_position()
+        with cls._lock:
+            index = cls._indexes.get(position.pk)
+        if index is not None and index.version == position.updated_at:
+            return index
+        index = RequirementIndex.from_position(position)
+        with cls._lock:
+            cls._indexes[position.pk] = index
+        logger.info(f"Compiled requirement index for position {position.slug}")
+        return index
+
+    @staticmethod
+    def default_position():
+        slug = getattr(settings, 'SCREENER_DEFAULT_POSITION', 'ml-engineer')
+        try:
+            return JobPosition.objects.get(slug=slug)
+        except JobPosition.DoesNotExist:
+            raise JobPosition.DoesNotExist(f"Default position '{slug}' does not exist; set SCREENER_DEFAULT_POSITION")
+
+    @classmethod
+    def invalidate(cls, position_id=None):
+        with cls._lock:
+            if position_id is None:
+                cls._indexes.clear()
+            else:
+                cls._indexes.pop(position_id, None)
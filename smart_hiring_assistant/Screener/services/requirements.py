@@ -0,0 +1,23 @@
+import re
+
+_SECTION_LINE = re.compile(r'^\s*([A-Za-z][\w /&-]{1,60}?)\s*:\s*(.+?)\s*$')
+
+
+def parse_requirement_sections(job_requirements):
+    """
+    Split a job requirements block into [(name, text), ...], one per "Name: description" line.
+    Lines without a "Name:" prefix are appended to the previous section.
+    """
+    sections = []
+    for line in job_requirements.splitlines():
+        if not line.strip():
+            continue
+        match = _SECTION_LINE.match(line)
+        if match:
+            sections.append((match.group(1).strip(), match.group(2)))
+        elif sections:
+            name, text = sections[-1]
+            sections[-1] = (name, f"{text} {line.strip()}")
+        else:
+            sections.append(('Requirements', line.strip()))
+    return sections
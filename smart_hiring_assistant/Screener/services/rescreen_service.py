@@ -0,0 +1,138 @@
+import logging
+import time
+
+from django.conf import settings
+from django.db.models import Exists, F, OuterRef
+from django.utils import timezone
+
+from Screener.models import Assessment, RescreenRun
+from Screener.services.openai_service import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+PLAN_UNCHANGED = 'unchanged'
+PLAN_REASSESS = 'reassess'
+PLAN_FULL = 'full'
+
+
+def diff_requirements(old_versions, new_versions):
+    """Compare two {requirement name: version} maps; returns {'unchanged', 'changed', 'added', 'removed'} name lists."""
+    return {
+        'unchanged': [name for name, version in new_versions.items() if old_versions.get(name) == version],
+        'changed': [name for name, version in new_versions.items() if name in old_versions and old_versions[name] != version],
+        'added': [name for name in new_versions if name not in old_versions],
+        'removed': [name for name in old_versions if name not in new_versions],
+    }
+
+
+class RescreenService:
+    """
+    Bookkeeping for RescreenRun: which assessments a run covers, how each one is re-screened,
+    progress and cancellation, and the throttle on LLM work.
+
+    Each assessment is planned from the requirement versions it was made with:
+    - unchanged: none of the requirements it was assessed on changed, nothing to do;
+    - reassess: only changed and added requirements go to the LLM, statuses of the unchanged
+      ones are reused (RAGService.reassess_requirements);
+    - full: no usable per-requirement statuses (screened out, text-format or older
+      assessments), so the resume is screened again from scratch.
+    Reassess and full plans take a token from a bucket of RESCREEN_RATE_PER_MINUTE, which
+    keeps a large re-screen from crowding out live screening on the shared OpenAI limits.
+    """
+    def __init__(self, rag_service, rate_per_minute=None):
+        self.rag_service = rag_service
+        self.batch_size = getattr(settings, 'RESCREEN_BATCH_SIZE', 50)
+        if rate_per_minute is None:
+            rate_per_minute = getattr(settings, 'RESCREEN_RATE_PER_MINUTE', 60)
+        self.throttle = TokenBucket(rate_per_minute) if rate_per_minute else None
+
+    @staticmethod
+    def assessments(position):
+        """The latest assessment of every resume screened for position."""
+        newer = Assessment.objects.filter(resume=OuterRef('resume'), position=OuterRef('position'), pk__gt=OuterRef('pk'))
+        return Assessment.objects.for_position(position).exclude(Exists(newer))
+
+    @classmethod
+    def start(cls, position):
+        """Create a pending run over position's assessments (picked up by rescreen_applicants)."""
+        run = RescreenRun.objects.create(position=position, total=cls.assessments(position).count())
+        logger.info(f"Created re-screen run {run.pk} for {position.slug} covering {run.total} assessments")
+        return run
+
+    @staticmethod
+    def claim(run):
+        """Move a pending (or interrupted running) run to running; False if it is finished or cancelled."""
+        now = timezone.now()
+        claimed = RescreenRun.objects.filter(
+            pk=run.pk, status__in=[RescreenRun.STATUS_PENDING, RescreenRun.STATUS_RUNNING]
+        ).update(status=RescreenRun.STATUS_RUNNING, started_at=run.started_at or now, updated_at=now)
+        run.refresh_from_db()
+        return bool(claimed)
+
+    def next_batch(self, run):
+        return list(
+            self.assessments(run.position).filter(pk__gt=run.last_assessment_id)
+            .select_related('resume', 'position').order_by('pk')[:self.batch_size]
+        )
+
+    def plan(self, assessment, index):
+        """(plan, previous statuses to reuse) for re-screening assessment against index."""
+        old_versions = assessment.requirement_versions or {}
+        if assessment.decision == Assessment.DECISION_SCREENED_OUT or not old_versions:
+            return PLAN_FULL, {}
+        diff = diff_requirements(old_versions, index.requirement_versions)
+        if not (diff['changed'] or diff['added'] or diff['removed']):
+            return PLAN_UNCHANGED, {}
+        if not self.rag_service.structured:
+            return PLAN_FULL, {}
+        scores = assessment.requirement_scores or {}
+        previous = {
+            name: {'status': scores[name]['status'], 'evidence': scores[name].get('evidence', '')}
+            for name in diff['unchanged'] if (scores.get(name) or {}).get('status')
+        }
+        if len(previous) < len(diff['unchanged']):
+            return PLAN_FULL, {}
+        return PLAN_REASSESS, previous
+
+    def wait_for_turn(self):
+        if self.throttle is None:
+            return
+        delay = self.throttle.reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    def assess(self, assessment, index, plan, previous):
+        """Run the LLM side of a reassess or full plan; returns a RAGService result dict."""
+        resume_text = assessment.resume.resume_text
+        if not resume_text:
+            raise ValueError(f"Resume {assessment.resume_id} has no extracted text")
+        self.wait_for_turn()
+        if plan == PLAN_REASSESS:
+            return self.rag_service.reassess_requirements(resume_text, index, previous)
+        return self.rag_service.process_resume(resume_text, index)
+
+    @staticmethod
+    def record_progress(run, last_assessment_id, counts, error=None):
+        """Add a batch's counts ({field: n}) to the run and move its cursor past the batch."""
+        updates = {field: F(field) + amount for field, amount in counts.items() if amount}
+        if error:
+            updates['last_error'] = error
+        RescreenRun.objects.filter(pk=run.pk).update(
+            last_assessment_id=last_assessment_id, updated_at=timezone.now(), **updates
+        )
+        run.refresh_from_db()
+
+    @staticmethod
+    def is_cancelled(run):
+        return RescreenRun.objects.filter(pk=run.pk, status=RescreenRun.STATUS_CANCELLED).exists()
+
+    @staticmethod
+    def finish(run, status=RescreenRun.STATUS_DONE, error=None):
+        updates = {'status': status, 'finished_at': timezone.now(), 'updated_at': timezone.now()}
+        if error:
+            updates['last_error'] = error
+        RescreenRun.objects.filter(pk=run.pk).exclude(status=RescreenRun.STATUS_CANCELLED).update(**updates)
+        run.refresh_from_db()
+        logger.info(f"Re-screen run {run.pk} {run.status}: {run.processed}/{run.total} processed, "
+                    f"{run.unchanged} unchanged, {run.reassessed} reassessed, {run.full} full, {run.failed} failed, "
+                    f"{run.decisions_changed} decisions changed, {run.prompt_tokens + run.completion_tokens} tokens")
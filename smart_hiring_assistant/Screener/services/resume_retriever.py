@@ -0,0 +1,144 @@
+import re
+
+import numpy as np
+from django.conf import settings
+
+from Screener.services.prescreen_service import PreScreenService
+from Screener.services.prompt_builder import TokenCounter
+
+# Canonical section -> heading spellings, longest first so 'WORK EXPERIENCE' wins over 'EXPERIENCE'.
+SECTION_HEADINGS = {
+    'Summary': ['professional summary', 'career summary', 'summary', 'profile', 'objective', 'about me'],
+    'Experience': ['professional experience', 'work experience', 'employment history', 'work history',
+                   'experience', 'employment'],
+    'Education': ['academic background', 'education', 'qualifications'],
+    'Skills': ['technical skills', 'core competencies', 'skills', 'technologies'],
+    'Projects': ['personal projects', 'selected projects', 'projects', 'portfolio'],
+    'Certifications': ['certifications', 'certificates', 'licenses'],
+    'Publications': ['publications', 'research'],
+    'Awards': ['awards', 'honors', 'achievements'],
+    'Other': ['languages', 'interests', 'hobbies', 'volunteering', 'references'],
+}
+_HEADING_SECTIONS = {spelling: name for name, spellings in SECTION_HEADINGS.items() for spelling in spellings}
+_SPELLINGS = sorted(_HEADING_SECTIONS, key=len, reverse=True)
+# Normalized resume text is a single line, so headings are found inline: upper-case anywhere
+# ("EDUCATION B.Sc. ..."), title-case only when followed by a colon ("Education: B.Sc. ...").
+_HEADING_PATTERN = re.compile(
+    r'(?<![A-Za-z])(?:(?P<upper>' + '|'.join(re.escape(s.upper()) for s in _SPELLINGS) + r')(?![a-z])'
+    r'|(?P<title>' + '|'.join(re.escape(s.title()) for s in _SPELLINGS) + r')\s*:)'
+)
+_PIECE_BOUNDARY = re.compile(r'(?<=[.;])\s+|\s+(?=- )')
+
+
+def split_resume_sections(resume_text):
+    """Split normalized resume text into [(section_name, text), ...]; text before the first heading is 'Header'."""
+    sections = []
+    name, start = 'Header', 0
+    for match in _HEADING_PATTERN.finditer(resume_text):
+        body = resume_text[start:match.start()].strip(' :-')
+        if body:
+            sections.append((name, body))
+        name = _HEADING_SECTIONS[(match.group('upper') or match.group('title')).lower()]
+        start = match.end()
+    body = resume_text[start:].strip(' :-')
+    if body:
+        sections.append((name, body))
+    return sections
+
+
+def chunk_section(text, chunk_chars):
+    """Pack bullets/sentences of one section into chunks of at most chunk_chars (longer pieces are split on spaces)."""
+    chunks, current = [], ''
+    for piece in _PIECE_BOUNDARY.split(text):
+        while len(piece) > chunk_chars:
+            cut = piece.rfind(' ', 0, chunk_chars)
+            cut = cut if cut > 0 else chunk_chars
+            if current:
+                chunks.append(current)
+                current = ''
+            chunks.append(piece[:cut])
+            piece = piece[cut:].lstrip()
+        if current and len(current) + 1 + len(piece) > chunk_chars:
+            chunks.append(current)
+            current = piece
+        else:
+            current = f"{current} {piece}" if current else piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+class ResumeRetriever:
+    """
+    Builds a bounded resume context for the LLM prompt.
+    The resume is split into sections and chunks, chunks are embedded in the same hashed
+    TF-IDF space as the pre-screen, and the best matches for each requirement section are
+    taken in turn until RAG_CONTEXT_MAX_TOKENS (counted with TokenCounter) are used. Chunks
+    that share no terms with any requirement (boilerplate) are left out; resumes are never
+    truncated blindly.
+    """
+    def __init__(self, prescreen=None, max_tokens=None, chunk_chars=None, token_counter=None):
+        self.prescreen = prescreen or PreScreenService()
+        self.max_tokens = max_tokens or getattr(settings, 'RAG_CONTEXT_MAX_TOKENS', 1500)
+        self.chunk_chars = chunk_chars or getattr(settings, 'RAG_CHUNK_CHARS', 600)
+        self.token_counter = token_counter or TokenCounter.for_model()
+
+    @property
+    def signature(self):
+        """Settings that change the assembled context; part of the assessment cache key."""
+        return f"retriever:v2:{self.max_tokens}:{self.chunk_chars}"
+
+    def chunks(self, resume_text):
+        return [(name, chunk) for name, text in split_resume_sections(resume_text)
+                for chunk in chunk_section(text, self.chunk_chars)]
+
+    def retrieve(self, resume_text, job_requirements):
+        """Return (context_text, stats) where context_text keeps the selected chunks in resume order."""
+        chunks = self.chunks(resume_text)
+        if not chunks:
+            return '', {'chunks_total': 0, 'chunks_used': 0, 'chars_total': 0, 'chars_used': 0,
+                        'tokens_total': 0, 'tokens_used': 0}
+        # Each chunk also costs its line break (and section headings), hence the + 1.
+        tokens = [self.token_counter.count(chunk) + 1 for _, chunk in chunks]
+        _, requirement_vectors = self.prescreen.requirement_vectors(job_requirements)
+        similarities = self.prescreen.embed([chunk for _, chunk in chunks], job_requirements) @ requirement_vectors.T
+        selected = self._select(chunks, similarities, tokens)
+        if not selected:
+            selected = self._select(chunks, np.ones((len(chunks), 1), dtype=np.float32), tokens)  # no overlap at all
+        context = self._render([(index, chunks[index]) for index in sorted(selected)])
+        return context, {
+            'chunks_total': len(chunks),
+            'chunks_used': len(selected),
+            'chars_total': sum(len(chunk) for _, chunk in chunks),
+            'chars_used': sum(len(chunks[index][1]) for index in selected),
+            'tokens_total': sum(tokens),
+            'tokens_used': sum(tokens[index] for index in selected),
+        }
+
+    def _select(self, chunks, similarities, tokens):
+        """Round-robin over requirements, each taking its next-best chunk, until the token budget is spent."""
+        rankings = np.argsort(-similarities, axis=0, kind='stable')
+        selected, used = set(), 0
+        for rank in range(len(chunks)):
+            for requirement in range(similarities.shape[1]):
+                index = int(rankings[rank, requirement])
+                if index in selected or similarities[index, requirement] <= 0:
+                    continue
+                size = tokens[index]
+                if used + size > self.max_tokens:
+                    continue
+                selected.add(index)
+                used += size
+        return selected
+
+    @staticmethod
+    def _render(selected):
+        lines, previous_index, previous_name = [], None, None
+        for index, (name, chunk) in selected:
+            if name != previous_name:
+                lines.append(f"{name}:")
+            elif index != previous_index + 1:
+                lines.append('...')
+            lines.append(chunk)
+            previous_index, previous_name = index, name
+        return '\n'.join(lines)
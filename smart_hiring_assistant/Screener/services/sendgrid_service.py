@@ -1,57 +1,149 @@
 import os
-from sendgrid import SendGridAPIClient
-from sendgrid.helpers.mail import Mail, Content
+import time
+
+from Screener.services import metrics
+from Screener.services.email_backends import EmailSendError, get_email_backend
+
+# Message templates per outbox kind. -tag- placeholders are filled per recipient with
+# SendGrid substitutions, so one mail/send call can carry many personalized messages.
+REJECTION_TEMPLATE = {
+    'subject': 'Application Status Update',
+    'plain': """
+            Dear -name-,
+            Thank you for your interest in our company. After careful consideration,
+            we regret to inform you that we will not be moving forward with your
+            application at this time. We appreciate your time and effort in applying.
+            Best regards,
+            Recruitment Team
+            """,
+}
+
+RECRUITER_FORWARD_TEMPLATE = {
+    'subject': 'Successful Applicant: -name-',
+    'plain': """
+        Name: -name-
+        Email: -email-
+        Position: -position-
+        Resume Path: -resume_path-
+        Assessment:
+        -assessment-
+        """,
+    'html': """
+        <p>Name: -name-</p>
+        <p>Email: -email-</p>
+        <p>Position: -position-</p>
+        <p>Resume Path: <a href="-resume_path-">View Resume</a></p>
+        <p>Assessment:</p>
+        <p>-assessment-</p>
+        """,
+}
+
+# Kinds whose outbox context already holds the rendered subject, plain and html bodies
+# (too long for substitutions). Each such email is sent as its own request.
+PRERENDERED_KINDS = {'recruiter_digest'}
+
+TEMPLATES = {
+    'rejection': REJECTION_TEMPLATE,
+    'recruiter_forward': RECRUITER_FORWARD_TEMPLATE,
+}
+
+# SendGrid accepts up to 1000 personalizations per request and 10,000 bytes of substitutions each.
+MAX_PERSONALIZATIONS = 1000
+MAX_SUBSTITUTION_CHARS = 8000
+
 
 class SendGridService:
-    def __init__(self):
-        self.sg = SendGridAPIClient(os.getenv('SENDGRID_API_KEY'))
+    """Builds SendGrid v3 mail/send payloads and sends them through the configured email backend."""
+    def __init__(self, backend=None):
+        self.backend = backend or get_email_backend()
         self.from_email = os.getenv('FROM_EMAIL')
         self.from_name = os.getenv('MAIL_FROM_NAME')
+
+    def build_payload(self, kind, recipients, custom_args=None):
+        """
+        One mail/send payload for up to MAX_PERSONALIZATIONS recipients of the same kind.
+        recipients is a list of (to_email, to_name, substitutions) with substitutions keyed
+        by the template tags without dashes, e.g. {'name': 'Jane'}.
+        """
+        if kind in PRERENDERED_KINDS:
+            return self._prerendered_payload(recipients, custom_args)
+        template = TEMPLATES[kind]
+        personalizations = []
+        for to_email, to_name, substitutions in recipients[:MAX_PERSONALIZATIONS]:
+            to = {'email': to_email}
+            if to_name:
+                to['name'] = to_name
+            personalizations.append({
+                'to': [to],
+                'substitutions': {f"-{tag}-": str(value)[:MAX_SUBSTITUTION_CHARS] for tag, value in substitutions.items()},
+            })
+        content = [{'type': 'text/plain', 'value': template['plain']}]
+        if 'html' in template:
+            content.append({'type': 'text/html', 'value': template['html']})
+        payload = {
+            'personalizations': personalizations,
+            'from': {'email': self.from_email, 'name': self.from_name} if self.from_name else {'email': self.from_email},
+            'subject': template['subject'],
+            'content': content,
+        }
+        if custom_args:
+            payload['custom_args'] = custom_args
+        return payload
+
+    def _prerendered_payload(self, recipients, custom_args=None):
+        if len(recipients) != 1:
+            raise ValueError(f"Pre-rendered emails are sent one per request, got {len(recipients)} recipients")
+        to_email, to_name, context = recipients[0]
+        to = {'email': to_email}
+        if to_name:
+            to['name'] = to_name
+        content = [{'type': 'text/plain', 'value': context['plain']}]
+        if context.get('html'):
+            content.append({'type': 'text/html', 'value': context['html']})
+        payload = {
+            'personalizations': [{'to': [to]}],
+            'from': {'email': self.from_email, 'name': self.from_name} if self.from_name else {'email': self.from_email},
+            'subject': context['subject'],
+            'content': content,
+        }
+        if custom_args:
+            payload['custom_args'] = custom_args
+        return payload
+
+    def send(self, kind, recipients, custom_args=None):
+        """Send one batch; raises EmailSendError (see .retryable) on failure."""
+        payload = self.build_payload(kind, recipients, custom_args)
+        started = time.perf_counter()
+        try:
+            status = self.backend.send(payload)
+        except Exception:
+            metrics.ERRORS.inc(component='email')
+            raise
+        finally:
+            metrics.EMAIL_SEND_SECONDS.observe(time.perf_counter() - started, kind=kind)
+        metrics.EMAILS_SENT.inc(len(payload['personalizations']), kind=kind)
+        return status
+
     def send_rejection_email(self, to_email, name):
-        message = Mail(
-            from_email=(self.from_email, self.from_name),
-            to_emails=to_email,
-            subject='Application Status Update',
-            plain_text_content=f"""
-            Dear {name},
-            Thank you for your interest in our company. After careful consideration, 
-            we regret to inform you that we will not be moving forward with your 
-            application at this time. We appreciate your time and effort in applying.
-            Best regards,
-            Recruitment Team
-            """
-        )
         try:
-            response = self.sg.send(message)
-            return response.status_code
-        except Exception as e:
+            return self.send('rejection', [(to_email, name, {'name': name})])
+        except EmailSendError as e:
             print(f"Failed to send rejection email: {str(e)}")
             return False
+
     def forward_successful_applicant(self, to_email, applicant_data, assessment):
-        html_content = f"""
-        <p>Name: {applicant_data['name']}</p>
-        <p>Email: {applicant_data['email']}</p>
-        <p>Resume Path: <a href="{applicant_data['resume_path']}">View Resume</a></p>
-        <p>Assessment:</p>
-        <p>{assessment}</p>
-        """
-        plain_content = f"""
-        Name: {applicant_data['name']}
-        Email: {applicant_data['email']}
-        Resume Path: {applicant_data['resume_path']}
-        Assessment:
-        {assessment}
-        """
-        message = Mail(
-            from_email=(self.from_email, self.from_name),
-            to_emails=to_email,
-            subject=f"Successful Applicant: {applicant_data['name']}",
-            plain_text_content=plain_content,
-            html_content=html_content
-        )
         try:
-            response = self.sg.send(message)
-            return response.status_code
-        except Exception as e:
+            return self.send('recruiter_forward', [(to_email, '', forward_substitutions(applicant_data, assessment))])
+        except EmailSendError as e:
             print(f"Failed to send successful applicant email: {str(e)}")
-            return False
\ No newline at end of file
+            return False
+
+
+def forward_substitutions(applicant_data, assessment):
+    return {
+        'name': applicant_data['name'],
+        'email': applicant_data['email'],
+        'position': applicant_data.get('position_applied', ''),
+        'resume_path': applicant_data['resume_path'],
+        'assessment': assessment,
+    }
@@ -0,0 +1,102 @@
+"""
+Process-wide service instances shared by views, screening workers and management commands.
+
+The services keep no per-request state (settings read at construction plus process-wide
+clients, pools and locks), so one instance per process is shared by every thread. Each is
+built on first use from a dotted path, which also keeps its module, and what that imports
+(openai, numpy), out of import time for processes that never need it:
+
+    rag_service = ServiceRegistry.get('rag')
+
+SCREENER_SERVICES can point a name at another class. warm_up() builds them ahead of the
+first request; the WSGI and ASGI entry points call warm_up_from_settings(), which does so
+when SCREENER_WARM_UP is set, so management commands never pay for it.
+"""
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SERVICES = {
+    'rag': 'Screener.services.rag_service.RAGService',
+    'email_outbox': 'Screener.services.email_outbox_service.EmailOutboxService',
+    'job_queue': 'Screener.services.job_queue_service.JobQueueService',
+    'duplicates': 'Screener.services.duplicate_service.DuplicateResumeService',
+    'llm_batches': 'Screener.services.llm_batch_service.LLMBatchService',
+    'shortlist': 'Screener.services.shortlist_service.ShortlistService',
+}
+
+
+class ServiceRegistry:
+    """Lazily built, process-wide service instances keyed by name."""
+    _lock = threading.RLock()  # reentrant: a service may look up another while it is built
+    _instances = {}
+
+    @staticmethod
+    def paths():
+        return {**DEFAULT_SERVICES, **getattr(settings, 'SCREENER_SERVICES', {})}
+
+    @classmethod
+    def get(cls, name):
+        service = cls._instances.get(name)
+        if service is not None:
+            return service
+        with cls._lock:
+            service = cls._instances.get(name)
+            if service is None:
+                path = cls.paths().get(name)
+                if path is None:
+                    raise ImproperlyConfigured(f"Unknown service '{name}'; expected one of {', '.join(cls.paths())}")
+                started = time.perf_counter()
+                service = cls._instances[name] = import_string(path)()
+                logger.info(f"Created service {name} ({type(service).__name__}) in "
+                            f"{(time.perf_counter() - started) * 1000:.0f}ms")
+            return service
+
+    @classmethod
+    def warm_up(cls, names=None, pdf_workers=True):
+        """
+        Build the named services (all when None) and start the PDF extraction workers, so
+        the first request does not pay for imports, client construction and process spawn.
+        Failures are logged rather than raised; the service is retried on first use.
+        Returns {name: seconds} for the services that were built.
+        """
+        timings = {}
+        for name in names or cls.paths():
+            started = time.perf_counter()
+            try:
+                cls.get(name)
+            except Exception as e:
+                logger.warning(f"Warm-up of service {name} failed: {str(e)}")
+                continue
+            timings[name] = time.perf_counter() - started
+        if pdf_workers:
+            from Screener.services.pdf_parser_service import PDFParserService
+
+            started = time.perf_counter()
+            try:
+                PDFParserService.executor().prestart()
+            except Exception as e:
+                logger.warning(f"Warm-up of PDF extraction workers failed: {str(e)}")
+            else:
+                timings['pdf_extraction'] = time.perf_counter() - started
+        logger.info(f"Warmed up {', '.join(f'{name} {seconds * 1000:.0f}ms' for name, seconds in timings.items())}")
+        return timings
+
+    @classmethod
+    def warm_up_from_settings(cls):
+        """warm_up() as configured by SCREENER_WARM_UP*, for web server entry points; {} when disabled."""
+        if not getattr(settings, 'SCREENER_WARM_UP', False):
+            return {}
+        return cls.warm_up(getattr(settings, 'SCREENER_WARM_UP_SERVICES', None) or None,
+                           pdf_workers=getattr(settings, 'SCREENER_WARM_UP_PDF_WORKERS', True))
+
+    @classmethod
+    def reset(cls):
+        with cls._lock:
+            cls._instances.clear()
@@ -0,0 +1,106 @@
+import base64
+import json
+import logging
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db.models import F, Q
+from django.db.models.fields.json import KeyTransform
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from Screener.models import Assessment
+
+logger = logging.getLogger(__name__)
+
+
+class ShortlistService:
+    """
+    A position's assessments for recruiters, one page at a time: best rank_score first (or
+    newest first), filtered by decision, assessment date and requirement statuses. Assessments
+    without an LLM score (rank_score NULL) follow the scored ones, newest first.
+
+    Pages are keyset-paginated: the cursor is the sort key of the last row shown, and the
+    next page is the rows after it in (sort key, id) order. With a decision filter that order
+    is an index scan (screener_assess_rank_idx, screener_assess_pos_dec_idx), so a page costs
+    the same at any depth; there is no offset and no total count. List pages load only the
+    columns they show, never resume_text or the assessment text and requirement blobs.
+    """
+    SORT_SCORE = 'score'
+    SORT_RECENT = 'recent'
+    SORT_CHOICES = [(SORT_SCORE, 'Best match'), (SORT_RECENT, 'Newest')]
+
+    LIST_FIELDS = ['pk', 'position', 'email', 'decision', 'score', 'llm_score', 'rank_score', 'created_at',
+                   'rescreened_at', 'resume__name', 'resume__resume_file']
+
+    def __init__(self):
+        self.page_size = getattr(settings, 'SHORTLIST_PAGE_SIZE', 50)
+
+    def page(self, position, decision=Assessment.DECISION_QUALIFIED, sort=SORT_SCORE, since=None, until=None,
+             requirements=None, after=None):
+        """
+        ([assessments], cursor of the next page or None). since/until are dates (inclusive),
+        requirements maps requirement names to the status they must have (structured
+        assessments only), after is a cursor from a previous page. Raises ValueError for a
+        malformed cursor.
+        """
+        field = 'rank_score' if sort == self.SORT_SCORE else 'created_at'
+        assessments = Assessment.objects.for_position(position)
+        if decision:
+            assessments = assessments.filter(decision=decision)
+        if since:
+            assessments = assessments.filter(created_at__gte=self._start_of(since))
+        if until:
+            assessments = assessments.filter(created_at__lt=self._start_of(until + timedelta(days=1)))
+        for number, (name, status) in enumerate((requirements or {}).items()):
+            alias = f"requirement_{number}_status"
+            assessments = assessments.alias(
+                **{alias: KeyTransform('status', KeyTransform(name, 'requirement_scores'))}
+            ).filter(**{alias: status})
+        if after:
+            value, pk = self.decode_cursor(after, field)
+            unscored = Q(**{f"{field}__isnull": True})
+            if value is None:
+                assessments = assessments.filter(unscored, pk__lt=pk)
+            else:
+                assessments = assessments.filter(
+                    Q(**{f"{field}__lt": value}) | Q(**{field: value}, pk__lt=pk) | unscored
+                )
+        rows = list(
+            assessments.select_related('resume').only(*self.LIST_FIELDS)
+            .order_by(self.ordering(field), '-pk')[:self.page_size + 1]
+        )
+        if len(rows) <= self.page_size:
+            return rows, None
+        rows = rows[:self.page_size]
+        return rows, self.encode_cursor(getattr(rows[-1], field), rows[-1].pk)
+
+    @staticmethod
+    def ordering(field):
+        # NULLs last in every database: SQLite sorts them last when descending, PostgreSQL first.
+        return F(field).desc(nulls_last=True)
+
+    @staticmethod
+    def _start_of(day):
+        return timezone.make_aware(datetime.combine(day, time.min))
+
+    @staticmethod
+    def encode_cursor(value, pk):
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        return base64.urlsafe_b64encode(json.dumps([value, pk]).encode('utf-8')).decode('ascii').rstrip('=')
+
+    @staticmethod
+    def decode_cursor(cursor, field):
+        """(sort key, id) from encode_cursor; field says which sort key to expect."""
+        try:
+            value, pk = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+            if field == 'created_at':
+                value = parse_datetime(value)
+                if value is None:
+                    raise ValueError('not a timestamp')
+            elif value is not None:  # None: the cursor is among the unscored assessments
+                value = float(value)
+            return value, int(pk)
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"Invalid shortlist cursor {cursor!r}: {e}")
@@ -0,0 +1,61 @@
+import codecs
+import re
+import unicodedata
+
+# Resume text normalization shared by every PDF extraction path. All tables and
+# patterns are built once at import; each call makes a handful of C-level passes.
+# Bump NORMALIZER_VERSION whenever the output for a given input changes so anything
+# cached on normalized text can be invalidated.
+NORMALIZER_VERSION = 1
+
+_BULLETS = '•●■◆▪◦‣∙○➢➤►'
+_ASCII_FOLDS = {
+    '‐': '-', '‑': '-', '‒': '-', '–': '-', '—': '-', '−': '-',
+    '‘': "'", '’': "'", '‚': "'", '′': "'",
+    '“': '"', '”': '"', '„': '"', '″': '"',
+    '…': '...',
+}
+
+
+class _FoldTable(dict):
+    """str.translate() table for non-ASCII code points, classified the first time each is seen."""
+    def __missing__(self, codepoint):
+        char = chr(codepoint)
+        if char in _BULLETS:
+            value = '- '
+        elif char.isspace():
+            value = ' '
+        elif char in _ASCII_FOLDS:
+            value = _ASCII_FOLDS[char]
+        else:
+            # Keep the ASCII base of accented letters and ligatures (é -> e, ﬁ -> fi); drop the rest.
+            folded = unicodedata.normalize('NFKD', char).encode('ascii', 'ignore').decode('ascii')
+            value = folded if folded and folded.isprintable() else ''
+        self[codepoint] = value
+        return value
+
+
+_FOLD_TABLE = _FoldTable()
+
+
+def _fold_non_ascii(error):
+    return error.object[error.start:error.end].translate(_FOLD_TABLE), error.end
+
+
+codecs.register_error('resume_text_fold', _fold_non_ascii)
+
+# Byte-level fixups applied after folding: '|' is a common OCR misread of 'I', and
+# control characters other than whitespace are dropped (whitespace is collapsed next).
+_OCR_BYTES = bytes.maketrans(b'|', b'I')
+_CONTROL_BYTES = bytes(b for b in range(32) if not chr(b).isspace()) + b'\x7f'
+
+_CAMEL_BOUNDARY = re.compile(r'([a-z])([A-Z])')  # words glued together by the PDF layout
+_REPEATED_DASHES = re.compile(r'- *- *-')
+
+
+def normalize_resume_text(text):
+    """Return text folded to printable ASCII with bullets as '- ', whitespace collapsed and OCR noise fixed."""
+    text = text.encode('ascii', 'resume_text_fold').translate(_OCR_BYTES, _CONTROL_BYTES).decode('ascii')
+    text = ' '.join(text.split())
+    text = _CAMEL_BOUNDARY.sub(r'\1 \2', text)
+    return _REPEATED_DASHES.sub('-', text)
@@ -0,0 +1,18 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import JobPosition, JobRequirement
+from .services.requirement_index import RequirementIndexService
+
+
+@receiver([post_save, post_delete], sender=JobPosition)
+def invalidate_position_index(sender, instance, **kwargs):
+    RequirementIndexService.invalidate(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=JobRequirement)
+def invalidate_requirement_index(sender, instance, **kwargs):
+    # Touch the position so indexes cached by other processes see a new version too.
+    JobPosition.objects.filter(pk=instance.position_id).update(updated_at=timezone.now())
+    RequirementIndexService.invalidate(instance.position_id)
@@ -0,0 +1,188 @@
+import hashlib
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import zlib
+
+from django.core.files.move import file_move_safe
+from django.core.files.storage import FileSystemStorage, InvalidStorageError, default_storage, storages
+
+logger = logging.getLogger(__name__)
+
+# Sidecar text file: header, then the zlib-compressed UTF-8 text.
+#   magic, format, text version (NUL padded), compressed length, CRC-32 of the compressed bytes
+_TEXT_HEADER = struct.Struct('>4sB32sII')
+_TEXT_MAGIC = b'SRTX'
+_TEXT_FORMAT = 1
+TEXT_SUFFIX = '.text'
+
+
+def resume_storage():
+    """Storage for Resume.resume_file: the 'resumes' alias of STORAGES, else the default storage."""
+    try:
+        return storages['resumes']
+    except InvalidStorageError:
+        return default_storage
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    File system storage that names every file by the SHA-256 of its bytes, under
+    <prefix>/<first two hex digits>/<sha256><extension>. Identical uploads share one blob:
+    saving content that is already stored writes nothing and returns the existing name.
+    Uploads from ResumeUploadHandler carry their digest (HashedUploadedFile.sha256) and are
+    renamed into place; other content is hashed first. Blobs are never deleted when a
+    Resume is; `manage.py gc_resume_blobs` removes the ones no resume references.
+
+    Next to each blob a sidecar, <sha256>.text, can hold the text extracted from it
+    (write_text/read_text), zlib-compressed behind a small header with the version of the
+    extraction that produced it. read_text memory-maps the file and returns None unless the
+    version matches, so any change to extraction or normalization invalidates every sidecar
+    at once; the next extraction overwrites it.
+
+    Names stored before this storage was configured (e.g. resumes/cv.pdf) still resolve,
+    as for FileSystemStorage.
+    """
+    def __init__(self, prefix='resumes/blobs', **kwargs):
+        super().__init__(**kwargs)
+        self.prefix = prefix.strip('/')
+
+    @staticmethod
+    def file_digest(content):
+        digest = getattr(content, 'sha256', None)
+        if digest:
+            return digest
+        digest = hashlib.sha256()
+        if hasattr(content, 'seek'):
+            content.seek(0)
+        for chunk in content.chunks():
+            digest.update(chunk)
+        content.seek(0)
+        return digest.hexdigest()
+
+    def blob_name(self, digest, extension=''):
+        return f"{self.prefix}/{digest[:2]}/{digest}{extension.lower()}"
+
+    def is_blob(self, name):
+        return name.startswith(f"{self.prefix}/")
+
+    def digest_of(self, name):
+        """The SHA-256 a blob name was derived from, or None for another name."""
+        if not self.is_blob(name):
+            return None
+        return os.path.basename(name).split('.', 1)[0]
+
+    def get_available_name(self, name, max_length=None):
+        # The name is replaced by the content address in _save, so it never needs to be unique.
+        return name
+
+    def _save(self, name, content):
+        digest = self.file_digest(content)
+        name = self.blob_name(digest, os.path.splitext(name)[1])
+        full_path = self.path(name)
+        if os.path.exists(full_path):
+            # Refreshing mtime keeps gc_resume_blobs' grace period from deleting a blob that is
+            # about to be referenced again.
+            try:
+                os.utime(full_path)
+                logger.info(f"Stored {name} already; reusing it")
+                return name
+            except FileNotFoundError:
+                pass  # collected in the meantime: store it again
+        directory = os.path.dirname(full_path)
+        self._makedirs(directory)
+        if hasattr(content, 'temporary_file_path'):
+            file_move_safe(content.temporary_file_path(), full_path, allow_overwrite=True)
+        else:
+            with tempfile.NamedTemporaryFile(dir=directory, prefix=f".{digest}.", suffix='.tmp', delete=False) as f:
+                for chunk in content.chunks():
+                    f.write(chunk if isinstance(chunk, bytes) else chunk.encode())
+            # Atomic: a concurrent save of the same bytes replaces it with an identical file.
+            os.replace(f.name, full_path)
+        if self.file_permissions_mode is not None:
+            os.chmod(full_path, self.file_permissions_mode)
+        return name
+
+    def _makedirs(self, directory):
+        if self.directory_permissions_mode is not None:
+            old_umask = os.umask(0o777 & ~self.directory_permissions_mode)
+            try:
+                os.makedirs(directory, self.directory_permissions_mode, exist_ok=True)
+            finally:
+                os.umask(old_umask)
+        else:
+            os.makedirs(directory, exist_ok=True)
+
+    def text_path(self, digest):
+        return self.path(self.blob_name(digest, TEXT_SUFFIX))
+
+    def read_text(self, digest, version):
+        """Cached text for the blob with this digest, or None if missing, corrupt or of another version."""
+        try:
+            with open(self.text_path(digest), 'rb') as f:
+                if os.fstat(f.fileno()).st_size < _TEXT_HEADER.size:
+                    return None
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    magic, text_format, stored_version, length, crc = _TEXT_HEADER.unpack_from(mapped)
+                    if (magic != _TEXT_MAGIC or text_format != _TEXT_FORMAT
+                            or stored_version.rstrip(b'\0') != version.encode('ascii')
+                            or len(mapped) != _TEXT_HEADER.size + length):
+                        return None
+                    payload = memoryview(mapped)[_TEXT_HEADER.size:]
+                    try:
+                        if zlib.crc32(payload) != crc:
+                            logger.warning(f"Corrupt text sidecar for {digest}")
+                            return None
+                        return zlib.decompress(payload).decode('utf-8')
+                    finally:
+                        payload.release()
+        except FileNotFoundError:
+            return None
+
+    @staticmethod
+    def text_version(path):
+        """Version recorded in a sidecar file, or None if it is not one."""
+        try:
+            with open(path, 'rb') as f:
+                header = f.read(_TEXT_HEADER.size)
+        except OSError:
+            return None
+        if len(header) < _TEXT_HEADER.size:
+            return None
+        magic, text_format, version, _, _ = _TEXT_HEADER.unpack(header)
+        if magic != _TEXT_MAGIC or text_format != _TEXT_FORMAT:
+            return None
+        return version.rstrip(b'\0').decode('ascii', 'replace')
+
+    def write_text(self, digest, text, version):
+        """Store the text extracted from the blob with this digest (atomically replacing any older sidecar)."""
+        encoded_version = version.encode('ascii')
+        if len(encoded_version) > 32:
+            raise ValueError(f"Text version {version!r} is longer than 32 bytes")
+        payload = zlib.compress(text.encode('utf-8'), 6)
+        path = self.text_path(digest)
+        directory = os.path.dirname(path)
+        self._makedirs(directory)
+        with tempfile.NamedTemporaryFile(dir=directory, prefix=f".{digest}.", suffix='.tmp', delete=False) as f:
+            f.write(_TEXT_HEADER.pack(_TEXT_MAGIC, _TEXT_FORMAT, encoded_version, len(payload), zlib.crc32(payload)))
+            f.write(payload)
+        os.replace(f.name, path)
+
+    def shards(self):
+        """
+        Lists of (name, path, mtime), one per shard directory under the prefix, of every file
+        in it: blobs, text sidecars and temporary files left by interrupted writes. A blob and
+        its sidecar are always in the same shard.
+        """
+        root = self.path(self.prefix)
+        if not os.path.isdir(root):
+            return
+        for shard in sorted(os.listdir(root)):
+            directory = os.path.join(root, shard)
+            if not os.path.isdir(directory):
+                continue
+            with os.scandir(directory) as entries:
+                yield [(f"{self.prefix}/{shard}/{entry.name}", entry.path, entry.stat().st_mtime)
+                       for entry in entries if entry.is_file()]
@@ -1,3 +1,821 @@
-from django.test import TestCase
+import asyncio
+import io
+import json
+import os
+import shutil
+import signal
+import tempfile
+import time
+from datetime import timedelta
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.utils import timezone
+
+from benchmarks.corpus import synthetic_pdf
+from Screener.management.commands.gc_resume_blobs import Command as GCCommand
+from Screener.models import (
+    Assessment, AssessmentCacheEntry, EmailOutbox, JobPosition, LLMBatch, RecruiterDigest, RescreenRun, Resume,
+    ScreeningJob,
+)
+from Screener.services import metrics
+from Screener.services.assessment_cache_service import AssessmentCacheService
+from Screener.services.assessment_schema import parse_structured_assessment
+from Screener.services.digest_service import RecruiterDigestService
+from Screener.services.duplicate_service import DuplicateResumeService, simhash
+from Screener.services.email_outbox_service import EmailOutboxService
+from Screener.services.job_queue_service import JobQueueService
+from Screener.services.llm_backends import LLMBackends
+from Screener.services.llm_batch_service import LLMBatchService
+from Screener.services.pdf_parser_service import (
+    PDFExtractionError, PDFExtractionExecutor, PDFExtractionTimeout, PDFParserService,
+)
+from Screener.services.prescreen_service import PreScreenService
+from Screener.services.rag_service import DecisionStreamParser, RAGService
+from Screener.services.rescreen_service import (
+    PLAN_FULL, PLAN_REASSESS, PLAN_UNCHANGED, RescreenService, diff_requirements,
+)
+from Screener.services.service_registry import ServiceRegistry
+from Screener.services.shortlist_service import ShortlistService
+from Screener.services.text_normalizer import normalize_resume_text
+from Screener.storage import ContentAddressedStorage, resume_storage
+from Screener.views import build_applicant_data, record_screening_outcome
+
+
+def make_resume(name='Applicant', text='Python developer with machine learning experience.',
+                resume_file='resumes/blobs/00/test.pdf', **kwargs):
+    return Resume.objects.create(name=name, email=f"{name.lower().replace(' ', '.')}@example.com",
+                                 resume_text=text, resume_file=resume_file, **kwargs)
+
+
+def use_temporary_media(test):
+    """Point MEDIA_ROOT and the resume storage at a directory removed after the test; returns it."""
+    media = tempfile.mkdtemp()
+    test.addCleanup(shutil.rmtree, media)
+    storages = {
+        'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+        'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+        'resumes': {'BACKEND': 'Screener.storage.ContentAddressedStorage',
+                    'OPTIONS': {'prefix': 'resumes/blobs', 'location': media}},
+    }
+    settings_override = override_settings(STORAGES=storages, MEDIA_ROOT=media, RESUME_UPLOAD_TEMP_DIR=None)
+    settings_override.enable()
+    test.addCleanup(settings_override.disable)
+    return media
+
+
+class StreamingBackend:
+    """Chat completion backend that streams a fixed completion in small deltas."""
+    model = 'test-model'
+
+    def __init__(self, text, size=7, usage=None):
+        self.text = text
+        self.size = size
+        self.usage = usage
+
+    async def astream_chat_completion(self, messages, **kwargs):
+        for start in range(0, len(self.text), self.size):
+            yield self.text[start:start + self.size]
+        if self.usage is not None:
+            yield SimpleNamespace(usage=self.usage, choices=[])
+
+
+@override_settings(PRESCREEN_ENABLED=False, ASSESSMENT_CACHE_ENABLED=False, RAG_RETRIEVAL_ENABLED=False,
+                   RAG_OUTPUT_FORMAT='text')
+class StreamingAssessmentTests(TestCase):
+    COMPLETIONS = [
+        ('Strong fit.\nOVERALL_DECISION: Qualified', True),
+        ('Strong fit.\nOVERALL_DECISION: Qualified\nNote: strong Python background.', True),
+        ('Strong fit.\nOVERALL_DECISION:\n\n  QUALIFIED  \n', True),
+        ('Weak fit.\nOVERALL_DECISION: Not Qualified\nNote: no Python.', False),
+        ('Unsure.\nOVERALL_DECISION: Qualified, pending an interview', False),
+    ]
+
+    def stream(self, text, size=7):
+        async def collect():
+            return [event async for event in RAGService(StreamingBackend(text, size)).astream_assessment('resume')]
+        return async_to_sync(collect)()
+
+    def test_stream_parser_agrees_with_final_parse(self):
+        service = RAGService(StreamingBackend(''))
+        for text, expected in self.COMPLETIONS:
+            for size in (1, 5, len(text)):
+                with self.subTest(text=text, size=size):
+                    parser = DecisionStreamParser()
+                    decisions = [parser.feed(text[start:start + size]) for start in range(0, len(text), size)]
+                    decisions.append(parser.close())
+                    self.assertEqual([decision for decision in decisions if decision is not None], [expected])
+                    result, is_valid = service._parse_assessment(text)
+                    self.assertTrue(is_valid)
+                    self.assertEqual(result['meets_requirements'], expected)
+
+    def test_partial_decision_matches_result(self):
+        events = self.stream('Strong fit.\nOVERALL_DECISION: Qualified\nNote: strong Python background.')
+        decisions = [payload for event, payload in events if event == 'decision']
+        event, result = events[-1]
+        self.assertEqual(event, 'result')
+        self.assertEqual(decisions, [True])
+        self.assertTrue(result['meets_requirements'])
+        self.assertNotIn('error', result)
+        self.assertEqual(''.join(payload for event, payload in events if event == 'token'), result['raw_response'])
+
+    def test_streamed_usage_is_recorded(self):
+        usage = SimpleNamespace(prompt_tokens=1200, completion_tokens=80,
+                                prompt_tokens_details=SimpleNamespace(cached_tokens=1024))
+        backend = StreamingBackend('Fit.\nOVERALL_DECISION: Qualified', usage=usage)
+
+        async def collect(service):
+            return [event async for event in service.astream_assessment('resume')]
+        result = async_to_sync(collect)(RAGService(backend))[-1][1]
+        self.assertEqual(result['usage'], {'prompt_tokens': 1200, 'completion_tokens': 80, 'cached_tokens': 1024})
+        self.assertEqual(result['raw_response'], backend.text)
+        backend.usage = None
+        result = async_to_sync(collect)(RAGService(backend))[-1][1]
+        self.assertTrue(result['usage']['estimated'])
+
+    def test_failure_before_the_llm_call_ends_with_error_result(self):
+        class BrokenCache:
+            def make_key(self, *args):
+                raise OSError('cache unavailable')
+        service = RAGService(StreamingBackend('OVERALL_DECISION: Qualified'), assessment_cache=BrokenCache())
+
+        async def collect():
+            return [event async for event in service.astream_assessment('resume')]
+        events = async_to_sync(collect)()
+        self.assertEqual([event for event, _ in events], ['result'])
+        self.assertEqual(events[0][1]['error'], 'cache unavailable')
+
+    def test_prescreen_and_retrieval_run_off_the_event_loop(self):
+        on_loop = {}
+
+        class RecordingService(RAGService):
+            def _prescreen(self, resume_text, index):
+                on_loop['prescreen'] = running_loop()
+                return None
+
+            def _retrieve(self, resume_text, matrix):
+                on_loop['retrieve'] = running_loop()
+                return super()._retrieve(resume_text, matrix)
+
+        def running_loop():
+            try:
+                return asyncio.get_running_loop() is not None
+            except RuntimeError:
+                return False
+
+        async def collect():
+            return [event async for event in RecordingService(StreamingBackend('OVERALL_DECISION: Qualified'))
+                    .astream_assessment('resume')]
+        async_to_sync(collect)()
+        self.assertEqual(on_loop, {'prescreen': False, 'retrieve': False})
+
+
+class AssessmentParsingTests(TestCase):
+    ASSESSMENT = {
+        'requirements': [{'name': 'Python', 'status': 'met', 'evidence': 'Five years of Django.'},
+                         {'name': 'ML', 'status': 'partial', 'evidence': ''}],
+        'score': 72, 'summary': ' Good backend fit. ', 'decision': 'qualified',
+    }
+
+    def test_structured_assessment(self):
+        text = json.dumps(self.ASSESSMENT)
+        result = parse_structured_assessment(text, ['Python', 'ML'])
+        self.assertEqual(result, {
+            'detailed_assessment': ('Python: met - Five years of Django.\nML: partial\n\n'
+                                    'Good backend fit.\n\nScore: 72/100'),
+            'meets_requirements': True,
+            'raw_response': text,
+            'llm_score': 72.0,
+            'requirements': {'Python': {'status': 'met', 'evidence': 'Five years of Django.'},
+                             'ML': {'status': 'partial', 'evidence': ''}},
+        })
+
+    def test_invalid_structured_assessments(self):
+        invalid = [
+            ('{"decision": ', 'not JSON'),
+            ('[]', 'not a JSON object'),
+            (dict(self.ASSESSMENT, decision='maybe'), "Invalid decision 'maybe'"),
+            (dict(self.ASSESSMENT, score=101), 'Invalid score 101'),
+            (dict(self.ASSESSMENT, score=True), 'Invalid score True'),
+            (dict(self.ASSESSMENT, summary=None), 'Missing summary'),
+            (dict(self.ASSESSMENT, requirements={}), 'Missing requirements'),
+            (dict(self.ASSESSMENT, requirements=[{'name': 'Go', 'status': 'met'}]), "Unknown requirement 'Go'"),
+            (dict(self.ASSESSMENT, requirements=[{'name': 'ML', 'status': 'done'}]), "Invalid status 'done' for ML"),
+        ]
+        for data, message in invalid:
+            with self.subTest(message=message), self.assertRaisesMessage(ValueError, message):
+                parse_structured_assessment(data if isinstance(data, str) else json.dumps(data), ['Python', 'ML'])
+
+    def test_stream_parser_reports_the_decision_once_as_soon_as_it_ends(self):
+        parser = DecisionStreamParser()
+        deltas = ['Strong fit.\nOVERALL_DEC', 'ISION: Quali', 'fied', '\nNote: OVERALL_DECISION: Not Qualified\n']
+        self.assertEqual([parser.feed(delta) for delta in deltas], [None, None, None, True])
+        self.assertIsNone(parser.close())
+        self.assertTrue(parser.decision)
+
+    def test_stream_parser_close(self):
+        parser = DecisionStreamParser()
+        for delta in ('Weak fit.\n', 'OVERALL_DECISION: Not Qualified'):
+            self.assertIsNone(parser.feed(delta))
+        self.assertFalse(parser.close())
+        parser = DecisionStreamParser()
+        self.assertIsNone(parser.feed('No decision line at all.'))
+        self.assertIsNone(parser.close())
+        self.assertIsNone(parser.decision)
+        self.assertEqual(len(parser._tail), len(DecisionStreamParser.MARKER) - 1)
+
+
+@override_settings(SCREENER_JOB_MAX_ATTEMPTS=2, SCREENER_JOB_RETRY_BACKOFF=30, SCREENER_JOB_LEASE_SECONDS=600)
+class JobQueueTests(TestCase):
+    def setUp(self):
+        self.queue = JobQueueService()
+        self.job = self.queue.enqueue(make_resume())
+
+    def expire_lease(self, job):
+        ScreeningJob.objects.filter(pk=job.pk).update(locked_at=timezone.now() - timedelta(seconds=601))
+
+    def test_claim_is_exclusive(self):
+        job = self.queue.claim('worker-1')
+        self.assertEqual(job.pk, self.job.pk)
+        self.assertEqual((job.status, job.attempts, job.locked_by), (ScreeningJob.STATUS_RUNNING, 1, 'worker-1'))
+        self.assertIsNone(self.queue.claim('worker-2'))
+
+    def test_delayed_job_is_claimable_only_by_id(self):
+        delayed = self.queue.enqueue(make_resume('Delayed'), delay=60)
+        self.assertEqual(self.queue.claim('worker-1').pk, self.job.pk)
+        self.assertIsNone(self.queue.claim('worker-1'))
+        self.assertEqual(self.queue.claim('stream', job_id=delayed.pk).pk, delayed.pk)
+
+    def test_failure_is_retried_with_backoff_then_final(self):
+        job = self.queue.claim('worker-1')
+        self.queue.fail(job, 'timeout')
+        job.refresh_from_db()
+        self.assertEqual(job.status, ScreeningJob.STATUS_PENDING)
+        self.assertGreater(job.available_at, timezone.now() + timedelta(seconds=25))
+        self.assertIsNone(self.queue.claim('worker-1'))
+        ScreeningJob.objects.filter(pk=job.pk).update(available_at=timezone.now())
+        job = self.queue.claim('worker-1')
+        self.assertEqual(job.attempts, 2)
+        self.queue.fail(job, 'timeout again')
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.last_error), (ScreeningJob.STATUS_FAILED, 'timeout again'))
+
+    def test_release_does_not_count_the_attempt(self):
+        job = self.queue.claim('worker-1')
+        self.queue.release(job)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (ScreeningJob.STATUS_PENDING, 0))
+
+    def test_stale_lease_is_reclaimed(self):
+        job = self.queue.claim('worker-1')
+        self.assertIsNone(self.queue.claim('worker-2'))
+        self.expire_lease(job)
+        job = self.queue.claim('worker-2')
+        self.assertEqual((job.locked_by, job.attempts), ('worker-2', 2))
+
+    def test_stale_lease_of_last_attempt_fails_the_job(self):
+        for worker in ('worker-1', 'worker-2'):
+            self.expire_lease(self.queue.claim(worker))
+        self.assertIsNone(self.queue.claim('worker-3'))
+        self.assertEqual(self.queue.expire_leases(), 1)
+        job = ScreeningJob.objects.get(pk=self.job.pk)
+        self.assertEqual((job.status, job.attempts, job.locked_by), (ScreeningJob.STATUS_FAILED, 2, ''))
+        self.assertEqual(self.queue.expire_leases(), 0)
+
+    def test_worker_whose_lease_expired_mid_job_changes_nothing(self):
+        slow = self.queue.claim('worker-1')
+        self.expire_lease(slow)
+        taken_over = self.queue.claim('worker-2')
+        result = {'success': True, 'meets_requirements': False, 'assessment': 'Not a fit', 'llm_score': 10}
+        applicant_data = build_applicant_data(slow.resume)
+        record_screening_outcome(slow, applicant_data, result, EmailOutboxService(), self.queue)
+        self.assertFalse(self.queue.release(slow))
+        self.assertFalse(self.queue.fail(slow, 'too late'))
+        self.assertFalse(Assessment.objects.exists())
+        self.assertFalse(EmailOutbox.objects.exists())
+        job = ScreeningJob.objects.get(pk=self.job.pk)
+        self.assertEqual((job.status, job.attempts, job.locked_by, job.last_error),
+                         (ScreeningJob.STATUS_RUNNING, 2, 'worker-2', ''))
+        record_screening_outcome(taken_over, applicant_data, result, EmailOutboxService(), self.queue)
+        job.refresh_from_db()
+        self.assertEqual(job.status, ScreeningJob.STATUS_DONE)
+        self.assertEqual(Assessment.objects.count(), 1)
+
+
+class ShortlistPaginationTests(TestCase):
+    def setUp(self):
+        self.position = JobPosition.objects.get(slug='ml-engineer')
+        # Repeated scores, so pages must break ties by id; None for assessments without an LLM score.
+        for number, rank_score in enumerate([90, 80, None, 80, 80, 70, None, 70, 60, 50, None, 50, 40, 30]):
+            resume = make_resume(f"Applicant {number}", position=self.position)
+            Assessment.objects.create(
+                resume=resume, position=self.position, email=resume.email, rank_score=rank_score,
+                decision=Assessment.DECISION_QUALIFIED if number % 4 else Assessment.DECISION_NOT_QUALIFIED,
+                requirement_scores={'Python': {'status': 'met' if number % 2 else 'unmet'}},
+            )
+        self.shortlist = ShortlistService()
+        self.shortlist.page_size = 3
+
+    def walk(self, **filters):
+        pages, cursor = [], None
+        while True:
+            rows, cursor = self.shortlist.page(self.position, after=cursor, **filters)
+            pages.append([row.pk for row in rows])
+            if cursor is None:
+                return pages
+
+    def test_pages_follow_the_full_ordering(self):
+        orders = ((ShortlistService.SORT_SCORE, ShortlistService.ordering('rank_score')),
+                  (ShortlistService.SORT_RECENT, '-created_at'))
+        for sort, field in orders:
+            with self.subTest(sort=sort):
+                pages = self.walk(sort=sort)
+                expected = list(Assessment.objects.filter(decision=Assessment.DECISION_QUALIFIED)
+                                .order_by(field, '-pk').values_list('pk', flat=True))
+                self.assertEqual([pk for page in pages for pk in page], expected)
+                self.assertTrue(all(len(page) == 3 for page in pages[:-1]))
+
+    def test_requirement_and_decision_filters(self):
+        pages = self.walk(decision=None, requirements={'Python': 'met'})
+        expected = list(Assessment.objects.filter(requirement_scores__Python__status='met')
+                        .order_by(ShortlistService.ordering('rank_score'), '-pk').values_list('pk', flat=True))
+        self.assertEqual([pk for page in pages for pk in page], expected)
+
+    def test_unscored_assessments_rank_after_scored_ones(self):
+        scores = dict(Assessment.objects.values_list('pk', 'rank_score'))
+        ranks = [scores[pk] for page in self.walk(decision=None) for pk in page]
+        self.assertEqual(ranks, sorted(filter(None, ranks), reverse=True) + [None] * 3)
+        self.assertEqual(Assessment.rank_score_for(None), None)
+        self.assertEqual(Assessment.rank_score_for(72), 72.0)
+
+    def test_malformed_cursor(self):
+        for cursor in ('not-a-cursor', ShortlistService.encode_cursor('yesterday', 1)):
+            with self.subTest(cursor=cursor), self.assertRaises(ValueError):
+                self.shortlist.page(self.position, sort=ShortlistService.SORT_RECENT, after=cursor)
+
+
+class AssessmentCacheTests(TestCase):
+    def test_key_ignores_resume_whitespace_only(self):
+        key = AssessmentCacheService.make_key('Python  developer\n', 'Python', 'prompt-v1', 'gpt-4')
+        self.assertEqual(key, AssessmentCacheService.make_key(' Python developer', 'Python\n', 'prompt-v1', 'gpt-4'))
+        for changed in (('Java developer', 'Python', 'prompt-v1', 'gpt-4'),
+                        ('Python developer', 'Go', 'prompt-v1', 'gpt-4'),
+                        ('Python developer', 'Python', 'prompt-v2', 'gpt-4'),
+                        ('Python developer', 'Python', 'prompt-v1', 'gpt-4o')):
+            self.assertNotEqual(key, AssessmentCacheService.make_key(*changed))
+
+    def test_hit_miss_and_expiry(self):
+        cache = AssessmentCacheService(ttl=60)
+        assessment = {'detailed_assessment': 'Strong fit', 'meets_requirements': True, 'raw_response': 'raw'}
+        self.assertIsNone(cache.get('key'))
+        cache.set('key', assessment, 'gpt-4')
+        self.assertEqual(cache.get('key'), dict(assessment, cached=True))
+        expired = AssessmentCacheService(ttl=-1)
+        expired.set('old', assessment, 'gpt-4')
+        self.assertIsNone(expired.get('old'))
+
+    def test_eviction_keeps_most_recently_hit(self):
+        cache = AssessmentCacheService(max_entries=3, evict_every=1000)
+        assessment = {'detailed_assessment': 'Fit', 'meets_requirements': True}
+        for number in range(5):
+            cache.set(f"key-{number}", assessment, 'gpt-4')
+            AssessmentCacheEntry.objects.filter(key=f"key-{number}").update(
+                last_hit_at=timezone.now() - timedelta(minutes=10 - number))
+        cache.get('key-0')
+        self.assertEqual(cache.evict(), 2)
+        self.assertEqual(sorted(AssessmentCacheEntry.objects.values_list('key', flat=True)),
+                         ['key-0', 'key-3', 'key-4'])
+
+
+class DuplicateResumeTests(TestCase):
+    TEXT = ('Senior machine learning engineer with eight years of Python, PyTorch and production model '
+            'deployment experience, leading a team of four engineers on recommendation systems.')
+
+    def test_simhash_of_light_edit_is_close(self):
+        edited = self.TEXT.replace('eight', 'nine')
+        unrelated = 'Pastry chef trained in Lyon with a decade of restaurant and catering kitchen management.'
+        self.assertLessEqual((simhash(self.TEXT) ^ simhash(edited)).bit_count(), 3 * 4)
+        self.assertGreater((simhash(self.TEXT) ^ simhash(unrelated)).bit_count(), 16)
+
+    def test_link_finds_original_for_same_position_only(self):
+        service = DuplicateResumeService()
+        position = JobPosition.objects.get(slug='ml-engineer')
+        other = JobPosition.objects.create(title='Data Engineer', slug='data-engineer')
+        original = make_resume('Original', self.TEXT, position=position)
+        service.link(original)
+        self.assertEqual(service.link(make_resume('Copy', self.TEXT, position=position)), original)
+        self.assertIsNone(service.link(make_resume('Elsewhere', self.TEXT, position=other)))
+
+
+class EmailOutboxTests(TestCase):
+    class Recorder:
+        def __init__(self):
+            self.sent = []
+
+        def send(self, kind, recipients, custom_args=None):
+            self.sent.append((kind, [email for email, _, _ in recipients]))
+
+    def test_enqueue_is_idempotent_and_dispatch_batches(self):
+        recorder = self.Recorder()
+        outbox = EmailOutboxService(sendgrid_service=recorder)
+        for resume_id, email in ((1, 'a@example.com'), (2, 'b@example.com'), (1, 'a@example.com')):
+            outbox.enqueue_rejection({'resume_id': resume_id, 'email': email, 'name': 'Applicant'})
+        self.assertEqual(EmailOutbox.objects.count(), 2)
+        self.assertEqual(outbox.dispatch(), (2, 2))
+        self.assertEqual(recorder.sent, [(EmailOutbox.KIND_REJECTION, ['a@example.com', 'b@example.com'])])
+        self.assertEqual(outbox.dispatch(), (0, 0))
+        self.assertEqual(outbox.pending_count(), 0)
+
+
+class RecruiterDigestTests(TestCase):
+    def setUp(self):
+        self.position = JobPosition.objects.get(slug='ml-engineer')
+        self.position.recruiter_email = ''
+        self.position.save()
+        for name, rank_score, score in (('Unscored', None, 0.9), ('Good', 70.0, 0.01), ('Best', 95.0, 0.02)):
+            resume = make_resume(name, position=self.position)
+            Assessment.objects.create(resume=resume, position=self.position, email=resume.email, score=score,
+                                      rank_score=rank_score, decision=Assessment.DECISION_QUALIFIED)
+        self.digests = RecruiterDigestService(EmailOutboxService())
+
+    def test_applicants_are_ranked_by_rank_score(self):
+        with mock.patch.dict(os.environ, {'RECRUITER_EMAIL': 'recruiter@example.com'}):
+            row = self.digests.build(self.position)
+        names = [line.split('. ', 1)[1].split(' <')[0] for line in row.context['plain'].splitlines()
+                 if line[:1].isdigit()]
+        self.assertEqual(names, ['Best', 'Good', 'Unscored'])
+
+    def test_missing_recipient_waits_a_window(self):
+        now = timezone.now()
+        with mock.patch.dict(os.environ, {'RECRUITER_EMAIL': ''}):
+            self.assertIsNone(self.digests.build(self.position, now))
+            self.assertEqual(self.digests.build_due(now + timedelta(minutes=1)), 0)
+        digest = RecruiterDigest.objects.get(position=self.position)
+        self.assertEqual(digest.next_due_at, now + timedelta(minutes=self.position.digest_window_minutes))
+        self.assertEqual(digest.last_assessment_id, 0)
+        self.assertNotIn(self.position, self.digests.due_positions(now + timedelta(minutes=1)))
+        self.assertFalse(EmailOutbox.objects.exists())
+
+
+class ResumeStorageTests(TestCase):
+    def setUp(self):
+        self.media = use_temporary_media(self)
+        self.storage = resume_storage()
+
+    def test_identical_content_shares_a_blob(self):
+        first = self.storage.save('resumes/cv.pdf', ContentFile(b'%PDF-1.4 resume'))
+        second = self.storage.save('resumes/other-name.PDF', ContentFile(b'%PDF-1.4 resume'))
+        self.assertEqual(first, second)
+        digest = self.storage.digest_of(first)
+        self.assertEqual(first, f"resumes/blobs/{digest[:2]}/{digest}.pdf")
+        self.assertNotEqual(first, self.storage.save('resumes/cv.pdf', ContentFile(b'%PDF-1.4 another')))
+
+    def test_text_sidecar_round_trip_and_version(self):
+        digest = self.storage.digest_of(self.storage.save('resumes/cv.pdf', ContentFile(b'%PDF-1.4 resume')))
+        self.assertIsNone(self.storage.read_text(digest, 'v1'))
+        self.storage.write_text(digest, 'Python développeur', 'v1')
+        self.assertEqual(self.storage.read_text(digest, 'v1'), 'Python développeur')
+        self.assertIsNone(self.storage.read_text(digest, 'v2'))
+        self.assertEqual(ContentAddressedStorage.text_version(self.storage.text_path(digest)), 'v1')
+
+    def test_gc_keeps_referenced_blobs(self):
+        kept = self.storage.save('resumes/cv.pdf', ContentFile(b'%PDF-1.4 kept'))
+        orphan = self.storage.save('resumes/cv.pdf', ContentFile(b'%PDF-1.4 orphan'))
+        self.storage.write_text(self.storage.digest_of(orphan), 'orphan text', 'v1')
+        make_resume(resume_file=kept)
+        stdout = io.StringIO()
+        call_command('gc_resume_blobs', grace_seconds=-60, dry_run=True, stdout=stdout)
+        self.assertTrue(self.storage.exists(orphan))
+        call_command('gc_resume_blobs', grace_seconds=-60, stdout=stdout)
+        self.assertTrue(self.storage.exists(kept))
+        self.assertFalse(self.storage.exists(orphan))
+        self.assertFalse(os.path.exists(self.storage.text_path(self.storage.digest_of(orphan))))
+
+    def test_gc_keeps_a_blob_reused_during_the_sweep(self):
+        reused = self.storage.save('resumes/cv.pdf', ContentFile(b'%PDF-1.4 reused'))
+        stale = self.storage.save('resumes/cv.pdf', ContentFile(b'%PDF-1.4 stale'))
+        for name in (reused, stale):
+            os.utime(self.storage.path(name), (time.time() - 7200, time.time() - 7200))
+        referenced = GCCommand._referenced
+
+        def upload_after_listing(command, names):
+            found = referenced(command, names)
+            if reused in names and not Resume.objects.exists():
+                make_resume(resume_file=reused)  # an identical upload commits right after the sweep's lookup
+            return found
+        with mock.patch.object(GCCommand, '_referenced', autospec=True, side_effect=upload_after_listing):
+            call_command('gc_resume_blobs', grace_seconds=3600, stdout=io.StringIO())
+        self.assertTrue(self.storage.exists(reused))
+        self.assertFalse(self.storage.exists(stale))
+        self.assertEqual(sorted(os.listdir(os.path.dirname(self.storage.path(reused)))),
+                         [os.path.basename(reused)])
+
+
+class PreScreenThresholdTests(TestCase):
+    REQUIREMENTS = 'Python:\n- Python and Django experience\nML:\n- PyTorch model training'
+
+    def test_tiers_are_off_by_default(self):
+        result = PreScreenService().score('Pastry chef with catering experience.', self.REQUIREMENTS)
+        self.assertEqual(result['tier'], PreScreenService.TIER_BORDERLINE)
+
+    def test_configured_thresholds(self):
+        service = PreScreenService(reject_threshold=0.05, strong_threshold=0.5)
+        self.assertEqual(service.score('Pastry chef.', self.REQUIREMENTS)['tier'], PreScreenService.TIER_REJECT)
+        with override_settings(PRESCREEN_REJECT_THRESHOLD='0.05', PRESCREEN_STRONG_THRESHOLD=''):
+            service = PreScreenService()
+        self.assertEqual((service.reject_threshold, service.strong_threshold), (0.05, None))
+
+    def test_tiers(self):
+        service = PreScreenService(reject_threshold=0.05, strong_threshold=0.3)
+        tiers = [service.score(text, self.REQUIREMENTS)['tier'] for text in (
+            'Pastry chef with catering experience.',
+            'Python developer.',
+            'Python and Django experience, PyTorch model training.',
+        )]
+        self.assertEqual(tiers, [PreScreenService.TIER_REJECT, PreScreenService.TIER_BORDERLINE,
+                                 PreScreenService.TIER_STRONG])
+
+    def test_score_positions_matches_scoring_each_position(self):
+        service = PreScreenService(reject_threshold=0.05)
+        requirement_sets = [self.REQUIREMENTS, 'Data:\n- SQL and dbt\nCloud:\n- AWS', 'Baking:\n- Pastry']
+        resume = 'Python developer with Django, SQL and some AWS experience.'
+        results = service.score_positions(resume, [service.compile(text) for text in requirement_sets])
+        for result, requirements in zip(results, requirement_sets):
+            expected = service.score(resume, requirements)
+            self.assertEqual((result['score'], result['tier']), (expected['score'], expected['tier']))
+            self.assertEqual(result['sections'], expected['sections'])
+        self.assertEqual(service.score_positions(resume, []), [])
+
+    def test_requirement_matrix_cache_is_bounded(self):
+        service = PreScreenService()
+        for number in range(300):
+            service.score('Python developer.', f"Python:\n- Python {number}")
+        self.assertLessEqual(len(service._matrices), 256)
+
+    def test_calibration_suggests_thresholds(self):
+        position = JobPosition.objects.get(slug='ml-engineer')
+        resume = make_resume(position=position)
+        Assessment.objects.bulk_create(
+            [Assessment(resume=resume, position=position, decision=Assessment.DECISION_QUALIFIED, score=score / 1000)
+             for score in range(20, 120)]
+            + [Assessment(resume=resume, position=position, decision=Assessment.DECISION_NOT_QUALIFIED,
+                          score=score / 1000) for score in range(0, 100)]
+        )
+        stdout = io.StringIO()
+        call_command('calibrate_prescreen', min_samples=50, stdout=stdout)
+        output = stdout.getvalue()
+        self.assertIn('PRESCREEN_REJECT_THRESHOLD=0.0210: rejects 1 of 100 qualified and 21 of 100', output)
+        self.assertIn('PRESCREEN_STRONG_THRESHOLD=0.0980: flags 24 applicants, 92% of them qualified', output)
+
+
+@override_settings(PRESCREEN_ENABLED=False, ASSESSMENT_CACHE_ENABLED=False, LLM_DEFAULT_BACKEND='stub')
+class LLMBatchServiceTests(TestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        settings_override = override_settings(LLM_BATCH_DIR=directory)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        for registry in (LLMBackends, ServiceRegistry):
+            registry.reset()
+            self.addCleanup(registry.reset)
+        self.position = JobPosition.objects.get(slug='ml-engineer')
+        self.position.batch_screening = True
+        self.position.llm_backend = 'file-batch'
+        self.position.save()
+        self.queue = JobQueueService()
+        self.batches = LLMBatchService()
+
+    def enqueue(self, name):
+        text = f"{name}: Python developer with Django, PyTorch model training and SQL experience."
+        return self.queue.enqueue(make_resume(name, text=text, position=self.position))
+
+    def test_is_due(self):
+        self.batches.max_requests, self.batches.max_wait = 10, 900
+        now = timezone.now()
+        self.assertFalse(self.batches.is_due(0, None))
+        self.assertFalse(self.batches.is_due(3, now - timedelta(seconds=60)))
+        self.assertTrue(self.batches.is_due(3, now - timedelta(seconds=901)))
+        self.assertTrue(self.batches.is_due(10, now))
+
+    def test_jobs_are_screened_through_a_batch(self):
+        jobs = [self.enqueue(name) for name in ('Ada', 'Grace')]
+        self.assertEqual({job.mode for job in jobs}, {ScreeningJob.MODE_BATCH})
+        for signum in (signal.SIGINT, signal.SIGTERM):  # the command installs its own stop handlers
+            self.addCleanup(signal.signal, signum, signal.getsignal(signum))
+        call_command('run_llm_batches', until_idle=True, poll_interval=0, stdout=io.StringIO())
+        batch = LLMBatch.objects.get()
+        self.assertEqual((batch.status, batch.request_count, batch.answered_count, batch.failed_count),
+                         (LLMBatch.STATUS_COMPLETED, 2, 2, 0))
+        self.assertTrue(os.path.exists(batch.input_file))
+        for job in jobs:
+            job.refresh_from_db()
+            self.assertEqual(job.status, ScreeningJob.STATUS_DONE)
+            self.assertIn('llm_batch', Assessment.objects.get(resume=job.resume).timings)
+
+    def test_poll_skips_jobs_the_batch_no_longer_holds(self):
+        kept, taken_over = self.enqueue('Ada'), self.enqueue('Grace')
+        jobs = self.queue.claim_batch('runner', 10)
+        index = self.batches.rag_service.requirement_index(self.position)
+        entries = [(job, self.batches.rag_service.prepare_batch_request(job.resume.resume_text, index)[1])
+                   for job in jobs]
+        batch = self.batches.submit('file-batch', entries)
+        self.assertEqual({job.locked_by for job in jobs}, {LLMBatchService.worker_id(batch)})
+        ScreeningJob.objects.filter(pk=taken_over.pk).update(locked_by='worker-1')
+        outcomes = self.batches.poll(batch)
+        self.assertEqual([(job.pk, bool(result.get('error'))) for job, result in outcomes], [(kept.pk, False)])
+
+
+class RescreenServiceTests(TestCase):
+    VERSIONS = {'Python': 'v1', 'ML': 'v1', 'SQL': 'v1'}
+
+    def setUp(self):
+        self.position = JobPosition.objects.get(slug='ml-engineer')
+        self.rescreen = RescreenService(SimpleNamespace(structured=True), rate_per_minute=0)
+
+    def assessment(self, resume=None, **fields):
+        resume = resume or make_resume(position=self.position)
+        fields.setdefault('decision', Assessment.DECISION_QUALIFIED)
+        return Assessment.objects.create(resume=resume, position=self.position, email=resume.email, **fields)
+
+    def test_diff_requirements(self):
+        diff = diff_requirements(self.VERSIONS, {'Python': 'v1', 'ML': 'v2', 'Go': 'v1'})
+        self.assertEqual(diff, {'unchanged': ['Python'], 'changed': ['ML'], 'added': ['Go'], 'removed': ['SQL']})
+
+    def test_plans(self):
+        scores = {name: {'status': 'met', 'evidence': f"{name} evidence"} for name in self.VERSIONS}
+        structured = self.assessment(requirement_versions=self.VERSIONS, requirement_scores=scores)
+        index = SimpleNamespace(requirement_versions=self.VERSIONS)
+        self.assertEqual(self.rescreen.plan(structured, index), (PLAN_UNCHANGED, {}))
+        index = SimpleNamespace(requirement_versions=dict(self.VERSIONS, ML='v2'))
+        self.assertEqual(self.rescreen.plan(structured, index), (PLAN_REASSESS, {
+            'Python': {'status': 'met', 'evidence': 'Python evidence'},
+            'SQL': {'status': 'met', 'evidence': 'SQL evidence'},
+        }))
+        missing_status = self.assessment(requirement_versions=self.VERSIONS, requirement_scores={'Python': {}})
+        screened_out = self.assessment(decision=Assessment.DECISION_SCREENED_OUT, requirement_versions=self.VERSIONS)
+        for assessment in (missing_status, screened_out, self.assessment()):
+            with self.subTest(assessment=assessment):
+                self.assertEqual(self.rescreen.plan(assessment, index), (PLAN_FULL, {}))
+        self.rescreen.rag_service.structured = False
+        self.assertEqual(self.rescreen.plan(structured, index), (PLAN_FULL, {}))
+
+    def test_run_covers_the_latest_assessment_of_each_resume(self):
+        resume = make_resume(position=self.position)
+        self.assessment(resume)
+        latest = self.assessment(resume)
+        other = self.assessment()
+        run = RescreenService.start(self.position)
+        self.assertEqual(run.total, 2)
+        self.assertTrue(RescreenService.claim(run))
+        self.assertEqual([a.pk for a in self.rescreen.next_batch(run)], [latest.pk, other.pk])
+        RescreenService.record_progress(run, latest.pk, {'processed': 1, 'unchanged': 1})
+        self.assertEqual([a.pk for a in self.rescreen.next_batch(run)], [other.pk])
+        self.assertEqual((run.processed, run.unchanged, run.last_assessment_id), (1, 1, latest.pk))
+
+    def test_cancelled_run_stays_cancelled(self):
+        run = RescreenService.start(self.position)
+        RescreenRun.objects.filter(pk=run.pk).update(status=RescreenRun.STATUS_CANCELLED)
+        self.assertTrue(RescreenService.is_cancelled(run))
+        self.assertFalse(RescreenService.claim(run))
+        RescreenService.finish(run)
+        self.assertEqual(run.status, RescreenRun.STATUS_CANCELLED)
+
+
+class TextNormalizerTests(TestCase):
+    CASES = [
+        ('\u2022 Python \u2014 5 years\n\n\u25e6 Caf\u00e9 \u201cr\u00e9sum\u00e9\u201d \ufb01les\u2026',
+         '- Python - 5 years - Cafe "resume" files...'),
+        ('Senior|Engineer\x00\x07 at\tACME', 'Senior IEngineer at ACME'),
+        ('JavaDeveloper --- done', 'Java Developer - done'),
+        ('\u6f22\u5b57 only \u2713 emoji \U0001f389 x', 'only emoji x'),
+        ('a\xa0b\u2003c\r\n', 'a b c'),
+        ('', ''),
+    ]
+
+    def test_normalization(self):
+        for text, expected in self.CASES:
+            with self.subTest(text=text):
+                self.assertEqual(normalize_resume_text(text), expected)
+
+    def test_output_is_printable_ascii_and_stable(self):
+        for text, _ in self.CASES:
+            normalized = normalize_resume_text(text)
+            self.assertTrue(normalized.isascii() and (normalized.isprintable() or not normalized))
+            self.assertEqual(normalize_resume_text(normalized), normalized)
+
+
+class PDFExtractionTests(TestCase):
+    def setUp(self):
+        self.media = use_temporary_media(self)
+
+    def write_pdf(self, name, lines, lines_per_page=60):
+        path = os.path.join(self.media, name)
+        with open(path, 'wb') as f:
+            f.write(synthetic_pdf('\n'.join(f"Line {i}: Python, Django and SQL experience" for i in range(lines)),
+                                  lines_per_page=lines_per_page))
+        return path
+
+    def executor(self, **options):
+        executor = PDFExtractionExecutor(max_workers=1, **options)
+        self.addCleanup(executor.shutdown)
+        return executor
+
+    def test_page_limit_cut_is_counted(self):
+        path = self.write_pdf('four-pages.pdf', 40, lines_per_page=10)
+        truncated = metrics.PDF_PAGES_TRUNCATED.value()
+        executor = self.executor(max_pages=2)
+        self.assertEqual(executor.extract(path).count('\f'), 2)
+        self.assertEqual(metrics.PDF_PAGES_TRUNCATED.value(), truncated + 1)
+        self.assertEqual(executor.extract(path, max_pages=4).count('\f'), 4)
+        self.assertEqual(executor.extract(path, max_pages=0).count('\f'), 4)
+        self.assertEqual(metrics.PDF_PAGES_TRUNCATED.value(), truncated + 1)
+
+    def test_timeout_replaces_the_worker(self):
+        path = self.write_pdf('long.pdf', 20000)
+        executor = self.executor(timeout=30)
+        self.assertEqual(executor.prestart(), 1)
+        executor.timeout = 0.01
+        with self.assertRaises(PDFExtractionTimeout):
+            executor.extract(path)
+        self.assertEqual(executor._idle, [])
+        executor.timeout = 30
+        self.assertIn('Line 0', executor.extract(self.write_pdf('short.pdf', 20)))
+
+    def test_memory_limit_kills_the_worker(self):
+        with self.assertRaisesMessage(PDFExtractionError, 'exceeded 1MB memory limit'):
+            self.executor(max_rss_mb=1).extract(self.write_pdf('resume.pdf', 20))
+
+    def test_text_is_normalized_validated_and_cached(self):
+        path = self.write_pdf('resume.pdf', 20)
+        text = PDFParserService.extract_text(path)
+        self.assertTrue(text.startswith('Line 0: Python, Django and SQL experience'))
+        self.assertNotIn('\f', text)
+        with self.assertRaisesMessage(PDFExtractionError, 'too short'):
+            PDFParserService.extract_text(self.write_pdf('empty.pdf', 1))
+        storage = resume_storage()
+        with open(path, 'rb') as f:
+            digest = storage.digest_of(storage.save('resumes/cv.pdf', ContentFile(f.read())))
+        self.assertEqual(PDFParserService.extract_resume_text(path, digest), text)
+        os.remove(path)
+        self.assertEqual(PDFParserService.extract_resume_text(path, digest), text)
+
+
+class MetricsEndpointTests(TestCase):
+    @override_settings(METRICS_ENABLED=False, METRICS_TOKEN='secret')
+    def test_disabled(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 404)
+
+    @override_settings(METRICS_ENABLED=True, METRICS_TOKEN=None, DEBUG=False)
+    def test_requires_a_token_without_debug(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 404)
+
+    @override_settings(METRICS_ENABLED=True, METRICS_TOKEN='secret')
+    def test_bearer_token(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 401)
+        response = self.client.get('/metrics', headers={'Authorization': 'Bearer secret'})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'# TYPE', response.content)
+
+
+@override_settings(RESUME_UPLOAD_MAX_BYTES=1024 * 1024)
+class ResumeUploadHandlerTests(TestCase):
+    def setUp(self):
+        use_temporary_media(self)
+        self.client = Client(enforce_csrf_checks=True)
+        self.client.get('/')
+        self.position = JobPosition.objects.get(slug='ml-engineer')
+
+    def post(self, content, name='cv.pdf'):
+        return self.client.post('/', {
+            'csrfmiddlewaretoken': self.client.cookies['csrftoken'].value,
+            'name': 'Applicant', 'email': 'applicant@example.com', 'position': self.position.pk,
+            'resume_file': SimpleUploadedFile(name, content, content_type='application/pdf'),
+        })
+
+    def test_oversize_upload_reports_the_size_error(self):
+        response = self.post(synthetic_pdf('Python developer. ' * 20) + b'%' + b'x' * (3 * 1024 * 1024))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'File size must be under 1MB.')
+        self.assertFalse(Resume.objects.exists())
+
+    def test_non_pdf_is_rejected(self):
+        response = self.post(b'GIF89a' + b'\0' * 2048, name='cv.pdf')
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'The uploaded file is not a PDF')
+        self.assertFalse(Resume.objects.exists())
+
+    def test_upload_queues_the_job_without_extracting(self):
+        response = self.post(synthetic_pdf('Python developer with Django and SQL experience. ' * 20))
+        self.assertEqual(response.status_code, 302)
+        resume = Resume.objects.get()
+        self.assertEqual(resume.resume_text, '')
+        self.assertTrue(resume.sha256)
+        job = ScreeningJob.objects.get(resume=resume)
+        self.assertEqual(job.status, ScreeningJob.STATUS_PENDING)
+        self.assertIn(str(job.public_id), response['Location'])
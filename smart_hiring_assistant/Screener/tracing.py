@@ -0,0 +1,71 @@
+import contextvars
+import logging
+import re
+import uuid
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+_trace_id = contextvars.ContextVar('screener_trace_id', default=None)
+
+# Incoming IDs are echoed into logs and headers, so only accept short, plain tokens.
+_VALID_TRACE_ID = re.compile(r'^[A-Za-z0-9._:-]{1,64}$')
+
+
+def get_trace_id():
+    return _trace_id.get()
+
+
+@contextmanager
+def trace(trace_id=None):
+    """Run a block (e.g. one screening job in a worker) under trace_id, or a new one."""
+    token = _trace_id.set(trace_id or uuid.uuid4().hex)
+    try:
+        yield _trace_id.get()
+    finally:
+        _trace_id.reset(token)
+
+
+class TraceIDFilter(logging.Filter):
+    """Adds record.trace_id ('-' outside a traced request or job) for log formats."""
+    def filter(self, record):
+        record.trace_id = _trace_id.get() or '-'
+        return True
+
+
+class TraceIDMiddleware:
+    """
+    Give every request a trace ID: the incoming TRACE_ID_HEADER (e.g. set by a load balancer)
+    when it is a plain token, otherwise a new one. It is available to log records through
+    TraceIDFilter for the duration of the request and returned in the same response header.
+    Supports both sync and async handling, so async views are not forced through a thread.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.header = getattr(settings, 'TRACE_ID_HEADER', 'X-Request-ID')
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def _incoming(self, request):
+        incoming = request.headers.get(self.header, '')
+        return incoming if _VALID_TRACE_ID.match(incoming) else None
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with trace(self._incoming(request)) as trace_id:
+            request.trace_id = trace_id
+            response = self.get_response(request)
+        response[self.header] = trace_id
+        return response
+
+    async def __acall__(self, request):
+        with trace(self._incoming(request)) as trace_id:
+            request.trace_id = trace_id
+            response = await self.get_response(request)
+        response[self.header] = trace_id
+        return response
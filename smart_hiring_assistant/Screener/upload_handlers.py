@@ -0,0 +1,161 @@
+import hashlib
+import logging
+import os
+import re
+import tempfile
+
+from django.conf import settings
+from django.core.files.uploadedfile import TemporaryUploadedFile
+from django.core.files.uploadhandler import FileUploadHandler, SkipFile, StopFutureHandlers
+
+from .storage import resume_storage
+
+try:
+    import magic
+except (ImportError, OSError):  # python-magic is optional and needs the libmagic system library
+    magic = None
+
+logger = logging.getLogger(__name__)
+
+PDF_SIGNATURE = b'%PDF-'
+# The PDF spec lets readers accept the header anywhere in the first 1024 bytes.
+SIGNATURE_WINDOW = 1024
+_PAGE_OBJECT = re.compile(rb'/Type\s*/Page(?![A-Za-z])')
+_PAGE_TAIL = 32  # bytes kept between chunks so a page marker split across them is still seen
+# Room for the other form fields when judging the declared request size.
+_FORM_OVERHEAD = 64 * 1024
+
+
+class HashedUploadedFile(TemporaryUploadedFile):
+    """A TemporaryUploadedFile written next to storage (so saving it is a rename) that knows its SHA-256."""
+    def __init__(self, name, content_type, size, charset, content_type_extra=None, temp_dir=None):
+        # Deliberately not calling TemporaryUploadedFile.__init__, which always uses FILE_UPLOAD_TEMP_DIR.
+        _, ext = os.path.splitext(name)
+        file = tempfile.NamedTemporaryFile(suffix='.upload' + ext, dir=temp_dir)
+        super(TemporaryUploadedFile, self).__init__(file, name, content_type, size, charset, content_type_extra)
+        self.sha256 = None
+        self.page_markers = 0
+
+
+class ResumeUploadHandler(FileUploadHandler):
+    """
+    Streams resume uploads (the RESUME_UPLOAD_FIELD file field) straight to a temporary file
+    beside the storage directory, hashing them as they arrive.
+
+    Bad uploads are rejected as early as possible and never reach storage:
+    - a request whose declared size exceeds RESUME_UPLOAD_MAX_BYTES has its resume skipped
+      before any of the file is stored (the other form fields, including the CSRF token,
+      are still parsed, so the form can report the error);
+    - a file whose first bytes are not a PDF header is skipped on the first chunk;
+    - a file that grows past RESUME_UPLOAD_MAX_BYTES, or that declares more page objects
+      than RESUME_UPLOAD_MAX_PAGES, is skipped as soon as that is seen.
+    Page objects are counted in the raw stream, so pages inside compressed object streams
+    are missed; the count only rejects documents that are certainly too long, and extraction
+    still stops at PDF_EXTRACTION_MAX_PAGES, when set, for the rest.
+
+    The rejection reason is left in request.upload_errors for ResumeUploadForm. Other file
+    fields fall through to the next handler in FILE_UPLOAD_HANDLERS.
+    """
+    chunk_size = 64 * 1024
+
+    def __init__(self, request=None):
+        super().__init__(request)
+        self.field_name = getattr(settings, 'RESUME_UPLOAD_FIELD', 'resume_file')
+        self.max_bytes = getattr(settings, 'RESUME_UPLOAD_MAX_BYTES', 2 * 1024 * 1024)
+        self.max_pages = getattr(settings, 'RESUME_UPLOAD_MAX_PAGES', 50)
+        self.active = False
+        self.oversize = False
+
+    def _reject(self, message):
+        if self.request is not None:
+            if not hasattr(self.request, 'upload_errors'):
+                self.request.upload_errors = {}
+            self.request.upload_errors[self.field_name] = message
+        logger.info(f"Rejected resume upload: {message}")
+
+    def handle_raw_input(self, input_data, META, content_length, boundary, encoding=None):
+        # Judged here, acted on in new_file: returning no data would also drop the CSRF token.
+        self.oversize = bool(content_length and content_length > self.max_bytes + _FORM_OVERHEAD)
+        return None
+
+    def new_file(self, field_name, file_name, content_type, content_length, charset=None, content_type_extra=None):
+        super().new_file(field_name, file_name, content_type, content_length, charset, content_type_extra)
+        self.active = field_name == self.field_name
+        if not self.active:
+            return
+        if self.oversize:
+            self.active = False
+            self._reject(f"File size must be under {self.max_bytes // (1024 * 1024)}MB.")
+            raise SkipFile()  # the parser drains the file's part without storing it
+        self.size = 0
+        self.head = b''
+        self.tail = b''
+        self.digest = hashlib.sha256()
+        self.file = HashedUploadedFile(file_name, content_type, 0, charset, content_type_extra,
+                                       temp_dir=self._temp_dir())
+        raise StopFutureHandlers()  # this handler alone stores the resume
+
+    @staticmethod
+    def _temp_dir():
+        temp_dir = getattr(settings, 'RESUME_UPLOAD_TEMP_DIR', None)
+        if not temp_dir:
+            try:
+                temp_dir = resume_storage().path(os.path.join('resumes', '.partial'))
+            except NotImplementedError:  # storage without local paths: fall back to the system temp dir
+                return getattr(settings, 'FILE_UPLOAD_TEMP_DIR', None)
+        os.makedirs(temp_dir, exist_ok=True)
+        return temp_dir
+
+    def receive_data_chunk(self, raw_data, start):
+        if not self.active:
+            return raw_data
+        if len(self.head) < SIGNATURE_WINDOW:
+            self.head += raw_data[:SIGNATURE_WINDOW - len(self.head)]
+            if len(self.head) >= SIGNATURE_WINDOW and PDF_SIGNATURE not in self.head:
+                self._skip(f"The uploaded file is not a PDF{self._detected_type()}.")
+        self.size += len(raw_data)
+        if self.size > self.max_bytes:
+            self._skip(f"File size must be under {self.max_bytes // (1024 * 1024)}MB.")
+        self._count_pages(raw_data)
+        self.digest.update(raw_data)
+        self.file.write(raw_data)
+        return None
+
+    def _count_pages(self, raw_data):
+        window = self.tail + raw_data
+        for match in _PAGE_OBJECT.finditer(window):
+            # Matches inside the kept tail were counted with the previous chunk; one ending at the
+            # window's edge might be "/Pages", so it is left for the next chunk to decide.
+            if len(self.tail) < match.end() < len(window):
+                self.file.page_markers += 1
+        self.tail = window[-_PAGE_TAIL:]
+        if self.max_pages and self.file.page_markers > self.max_pages:
+            self._skip(f"The PDF has more than {self.max_pages} pages.")
+
+    def _detected_type(self):
+        if magic is None:
+            return ''
+        try:
+            return f" (got {magic.from_buffer(self.head, mime=True)})"
+        except Exception:
+            return ''
+
+    def _skip(self, message):
+        self._reject(message)
+        self.file.close()  # deletes the partial temporary file
+        self.active = False
+        raise SkipFile()
+
+    def file_complete(self, file_size):
+        if not self.active:
+            return None
+        self.active = False
+        if PDF_SIGNATURE not in self.head:
+            # Under SIGNATURE_WINDOW bytes, so never checked mid-stream. SkipFile is not allowed
+            # here; the file is returned and ResumeUploadForm reports the error.
+            self._reject(f"The uploaded file is not a PDF{self._detected_type()}.")
+        self.file.flush()
+        self.file.seek(0)
+        self.file.size = file_size
+        self.file.sha256 = self.digest.hexdigest()
+        return self.file
@@ -4,4 +4,8 @@ from . import views
 app_name = 'Screener'
 urlpatterns = [
     path('', views.upload_resume, name='upload_resume'),
+    path('status/<uuid:job_id>/', views.screening_status, name='screening_status'),
+    path('status/<uuid:job_id>/stream/', views.stream_screening, name='stream_screening'),
+    path('positions/<slug:slug>/shortlist/', views.recruiter_shortlist, name='recruiter_shortlist'),
+    path('metrics', views.prometheus_metrics, name='metrics'),
 ]
\ No newline at end of file
@@ -1,17 +1,29 @@
-from django.shortcuts import render, redirect
+from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.exceptions import PermissionDenied
+from django.http import Http404, HttpResponse, HttpResponseBadRequest, JsonResponse, StreamingHttpResponse
+from django.urls import reverse
 
 # Create your views here.
 
-from .forms import ResumeUploadForm
-from .services.openai_service import OpenAIService
-from .services.rag_service import RAGService
-from .services.sendgrid_service import SendGridService
+from .forms import ResumeUploadForm, ShortlistFilterForm
+from .models import Assessment, JobPosition, Resume, ScreeningJob
+from .services.pdf_parser_service import PDFParserService
+from .services.requirement_index import RequirementIndexService
+from .services.service_registry import ServiceRegistry
+from .services import metrics
 from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from asgiref.sync import sync_to_async
+import asyncio
+import hmac
+import json
 import logging
-from pdfminer.high_level import extract_text
-import re
 import os
+import time
+import uuid
 from datetime import datetime
 
 # Configure log and load recruiter email
@@ -19,66 +31,299 @@ logger = logging.getLogger(__name__)
 RECRUITER_EMAIL = os.getenv('RECRUITER_EMAIL')
 
 def upload_resume(request):
-    """Handle resume upload and processing with enhanced evaluation capabilities."""
+    """
+    Save the uploaded resume and enqueue it for background screening.
+    Extraction, assessment and email notification run in run_screener_workers;
+    the candidate page polls screening_status for the outcome.
+    """
     if request.method == 'POST':
-        form = ResumeUploadForm(request.POST, request.FILES)
+        form = ResumeUploadForm(request.POST, request.FILES, upload_errors=getattr(request, 'upload_errors', None))
         if form.is_valid():
             try:
                 # Here you save the form instance
-                resume = form.save()
+                resume = form.save(commit=False)
+                if resume.position is None:
+                    resume.position = RequirementIndexService.default_position()
+                # Set by ResumeUploadHandler as the file streamed in.
+                resume.sha256 = getattr(form.cleaned_data['resume_file'], 'sha256', None) or ''
+                resume.save()
                 logger.info(f"Resume uploaded successfully for {resume.name}")
-                # Initialize all the services
-                try:
-                    openai_service = OpenAIService()
-                    rag_service = RAGService(openai_service)
-                    sendgrid_service = SendGridService()
-                except Exception as e:
-                    logger.error(f"Failed to initialize services: {str(e)}")
-                    messages.error(request, 'Service initialization failed. Please contact support.')
-                    return redirect('Screener:upload_resume')
-                #Must process the resume
-                applicant_data = {
-                    'name': resume.name,
-                    'email': resume.email,
-                    'resume_path': resume.resume_file.path,
-                    'position_applied': resume.position_applied if hasattr(resume, 'position_applied') else 'ML Engineer'
-                }
-                assessment_result = screen_resume(applicant_data, rag_service, sendgrid_service)
-                if assessment_result.get('success', False):
-                    if assessment_result.get('meets_requirements', False):
-                        message = ('Thank you for applying! Your qualifications look promising, '
-                                 'and our recruitment team will be in touch shortly.')
-                    else:
-                        message = ('Thank you for your interest. We have carefully reviewed your application '
-                                 'and will keep your resume on file for future opportunities.')
-                    messages.success(request, message)
-                else:
-                    message = ('We encountered an issue processing your application. '
-                             'Our team has been notified and will review it manually.')
-                    messages.warning(request, message)
-                # Store assessment details for future reference
-                try:
-                    store_assessment_results(resume, assessment_result)
-                except Exception as e:
-                    logger.error(f"Failed to store assessment results: {str(e)}")
-                return redirect('Screener:upload_resume')
+                # Extraction runs in the job, not in this request. Give the page a moment to open the
+                # streaming connection and claim the job itself.
+                job = ServiceRegistry.get('job_queue').enqueue(
+                    resume, delay=getattr(settings, 'SCREENER_STREAM_CLAIM_GRACE', 0)
+                )
+                # Worker logs for this job carry trace ID job-<pk>; this line links it to the upload request.
+                logger.info(f"Queued screening job {job.pk} for resume {resume.pk}")
+                messages.info(request, 'Thank you for applying! Your resume is being reviewed.')
+                return redirect(f"{reverse('Screener:upload_resume')}?job={job.public_id}")
             except Exception as e:
                 logger.error(f'Resume upload failed: {str(e)}')
                 messages.error(request, 'Failed to process resume. Please try again later.')
                 return redirect('Screener:upload_resume')
     else:
         form = ResumeUploadForm()
-    return render(request, 'Screener/upload.html', {'form': form})
+    try:
+        job_id = uuid.UUID(request.GET.get('job', ''))
+    except ValueError:
+        job_id = None
+    return render(request, 'Screener/upload.html', {'form': form, 'job_id': job_id})
+
+
+def screening_status(request, job_id):
+    """Return the state of a screening job as JSON for the candidate page to poll."""
+    job = get_object_or_404(ScreeningJob, public_id=job_id)
+    finished = job.status in (ScreeningJob.STATUS_DONE, ScreeningJob.STATUS_FAILED)
+    return JsonResponse({
+        'status': job.status,
+        'finished': finished,
+        'message': applicant_status_message(job) if finished else '',
+    })
+
+
+async def stream_screening(request, job_id):
+    """
+    Server-sent events for a screening job: assessment tokens as they are generated,
+    the decision as soon as it is parsed, then the candidate-facing outcome.
+    """
+    try:
+        job = await ScreeningJob.objects.select_related('resume', 'resume__position').aget(public_id=job_id)
+    except ScreeningJob.DoesNotExist:
+        raise Http404('Unknown screening job')
+    response = StreamingHttpResponse(_screening_events(job), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # disable proxy buffering (nginx)
+    return response
+
+
+def prometheus_metrics(request):
+    """
+    Process metrics in the Prometheus text format, when METRICS_ENABLED. METRICS_TOKEN is
+    required as a bearer token; without one the endpoint is served only with DEBUG on.
+    """
+    if not getattr(settings, 'METRICS_ENABLED', False):
+        raise Http404
+    token = getattr(settings, 'METRICS_TOKEN', None)
+    if not token and not settings.DEBUG:
+        logger.warning('Refusing to serve /metrics: METRICS_TOKEN is not set and DEBUG is off')
+        raise Http404
+    if token and not hmac.compare_digest(request.headers.get('Authorization', ''), f"Bearer {token}"):
+        return HttpResponse('Unauthorized', status=401)
+    return HttpResponse(metrics.REGISTRY.render(), content_type=metrics.CONTENT_TYPE)
+
+
+@staff_member_required
+def recruiter_shortlist(request, slug):
+    """
+    A position's applicants for recruiters, ranked by the score stored with their assessment,
+    one keyset page at a time (?after= is the cursor of the previous page's last row).
+    """
+    if not request.user.has_perm('Screener.view_assessment'):
+        raise PermissionDenied
+    position = get_object_or_404(JobPosition, slug=slug)
+    form = ShortlistFilterForm(request.GET or None, position=position)
+    filters = form.filters()
+    try:
+        assessments, cursor = ServiceRegistry.get('shortlist').page(position, after=request.GET.get('after'), **filters)
+    except ValueError as e:
+        return HttpResponseBadRequest(str(e))
+    next_url = None
+    if cursor:
+        params = request.GET.copy()
+        params['after'] = cursor
+        next_url = f"?{params.urlencode()}"
+    first_params = request.GET.copy()
+    first_params.pop('after', None)
+    return render(request, 'Screener/shortlist.html', {
+        'position': position,
+        'form': form,
+        'assessments': assessments,
+        'paged': 'after' in request.GET,
+        'first_url': f"?{first_params.urlencode()}",
+        'next_url': next_url,
+    })
+
+
+def _sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
 
 
-def screen_resume(applicant_data, rag_service, sendgrid_service):
+async def _screening_events(job):
+    if job.mode == ScreeningJob.MODE_BATCH and job.status not in (ScreeningJob.STATUS_DONE, ScreeningJob.STATUS_FAILED):
+        # Assessed within hours by run_llm_batches; the applicant hears back by email.
+        yield _sse('result', {'status': job.status, 'message': BATCH_QUEUED_MESSAGE})
+        return
+    job_queue = ServiceRegistry.get('job_queue')
+    claimed = await sync_to_async(job_queue.claim)(f"sse-{os.getpid()}", job_id=job.pk)
+    if claimed is None:
+        # A worker already has it (or it is finished): report progress until it completes.
+        async for event in _follow_screening_job(job.pk):
+            yield event
+        return
+    job = claimed
+    finished = False
+    try:
+        try:
+            resume_text = await sync_to_async(ensure_resume_text)(job.resume)
+            applicant_data = build_applicant_data(job.resume)
+            duplicate_result = await sync_to_async(duplicate_screening_result)(job.resume)
+        except Exception as e:
+            settled = await sync_to_async(job_queue.fail)(job, e)
+            finished = True
+            async for event in _settled_events(job, settled):
+                yield event
+            return
+        if duplicate_result is not None:
+            settled = await sync_to_async(job_queue.complete)(job, duplicate_result)
+            finished = True
+            async for event in _settled_events(job, settled):
+                yield event
+            return
+        yield _sse('status', {'status': 'assessing'})
+        rag_service = ServiceRegistry.get('rag')
+        assessment_result = None
+        async for event, payload in rag_service.astream_assessment(resume_text, applicant_data['position']):
+            if event == 'token':
+                yield _sse('token', {'text': payload})
+            elif event == 'decision':
+                # Persist the verdict as soon as it is known (while this stream still holds the job).
+                await ScreeningJob.objects.filter(pk=job.pk, locked_by=job.locked_by, locked_at=job.locked_at).aupdate(
+                    result={'success': True, 'meets_requirements': payload, 'partial': True}
+                )
+                yield _sse('decision', {'meets_requirements': payload})
+            else:
+                assessment_result = payload
+        if assessment_result is None:
+            assessment_result = {'meets_requirements': False, 'error': 'The assessment stream ended without a result'}
+        record_screening_metrics(assessment_result)
+        if assessment_result.get('error'):
+            settled = await sync_to_async(job_queue.fail)(job, assessment_result['error'])
+        else:
+            result = build_screening_result(assessment_result)
+            settled = await sync_to_async(_complete_screening_job)(job_queue, job, result, applicant_data)
+        finished = True
+        async for event in _settled_events(job, settled):
+            yield event
+    finally:
+        if not finished:
+            # Client went away mid-stream: let a background worker take the job over.
+            await sync_to_async(job_queue.release)(job)
+
+
+async def _settled_events(job, settled):
+    """The result of a job this stream completed or failed; if its lease was lost, the new holder's progress."""
+    if settled:
+        yield _sse('result', {'status': job.status, 'message': applicant_status_message(job)})
+    else:
+        async for event in _follow_screening_job(job.pk):
+            yield event
+
+
+def _complete_screening_job(job_queue, job, result, applicant_data):
+    """Store the assessment, complete the job and queue the email together; False if the job was taken over."""
+    started = time.perf_counter()
+    with transaction.atomic():
+        # Completed first: when the lease was lost nothing else is written.
+        if not job_queue.complete(job, result):
+            return False
+        store_assessment_results(job.resume, result)
+        notify_applicant(applicant_data, screening_notification(result), ServiceRegistry.get('email_outbox'))
+    metrics.STAGE_SECONDS.observe(time.perf_counter() - started, stage='db_write')
+    return True
+
+
+async def _follow_screening_job(job_pk, interval=2.0):
+    deadline = time.monotonic() + getattr(settings, 'SCREENER_JOB_LEASE_SECONDS', 600)
+    while time.monotonic() < deadline:
+        job = await ScreeningJob.objects.aget(pk=job_pk)
+        if job.status in (ScreeningJob.STATUS_DONE, ScreeningJob.STATUS_FAILED):
+            yield _sse('result', {'status': job.status, 'message': applicant_status_message(job)})
+            return
+        yield _sse('status', {'status': job.status})
+        await asyncio.sleep(interval)
+
+
+BATCH_QUEUED_MESSAGE = ('Thank you for applying! Your resume is queued for review, '
+                        'and we will email you as soon as it has been assessed.')
+
+
+def applicant_status_message(job):
+    """Candidate-facing message for a finished screening job."""
+    result = job.result or {}
+    if job.status == ScreeningJob.STATUS_DONE and result.get('success', False):
+        if result.get('meets_requirements', False):
+            return ('Thank you for applying! Your qualifications look promising, '
+                    'and our recruitment team will be in touch shortly.')
+        return ('Thank you for your interest. We have carefully reviewed your application '
+                'and will keep your resume on file for future opportunities.')
+    return ('We encountered an issue processing your application. '
+            'Our team has been notified and will review it manually.')
+
+
+def build_applicant_data(resume):
+    return {
+        'resume_id': resume.pk,
+        'name': resume.name,
+        'email': resume.email,
+        'resume_path': resume.resume_file.path,
+        'resume_text': resume.resume_text,
+        'position': resume.position,
+        'position_applied': resume.position.title if resume.position else 'ML Engineer'
+    }
+
+
+def process_screening_job(job, rag_service, email_outbox, job_queue=None):
+    """
+    Run screen_resume for a claimed job and record the outcome (retrying on failure).
+    The assessment, the job completion and the queued email are written in one transaction.
+    """
+    job_queue = job_queue or ServiceRegistry.get('job_queue')
+    try:
+        ensure_resume_text(job.resume)
+        duplicate_result = duplicate_screening_result(job.resume)
+        if duplicate_result is not None:
+            job_queue.complete(job, duplicate_result)
+            return duplicate_result
+        applicant_data = build_applicant_data(job.resume)
+        assessment_result = screen_resume(applicant_data, rag_service, None)
+    except Exception as e:
+        job_queue.fail(job, e)
+        return None
+    record_screening_outcome(job, applicant_data, assessment_result, email_outbox, job_queue)
+    return assessment_result
+
+
+def record_screening_outcome(job, applicant_data, result, email_outbox, job_queue):
+    """
+    Complete a claimed job with a screening result (see build_screening_result), storing the
+    assessment and queueing the email in one transaction, or fail it for a retry. Nothing is
+    recorded when the caller's lease on the job was lost to another worker.
+    """
+    if result.get('success', False):
+        started = time.perf_counter()
+        with transaction.atomic():
+            # Completed first: when the lease was lost nothing else is written.
+            if not job_queue.complete(job, result):
+                return
+            store_assessment_results(job.resume, result)
+            if email_outbox is not None:
+                notify_applicant(applicant_data, screening_notification(result), email_outbox)
+        metrics.STAGE_SECONDS.observe(time.perf_counter() - started, stage='db_write')
+    else:
+        job_queue.fail(job, result.get('error') or 'Screening failed', result)
+
+
+def screen_resume(applicant_data, rag_service, email_outbox):
     """
     Screen a resume with enhanced evaluation capabilities.
     Returns a dict with success status, detailed assessment, and scoring information.
+    Uses applicant_data['resume_text'] when the text was already extracted, and skips
+    email notifications when email_outbox is None (e.g. bulk screening).
     """
+    started = time.perf_counter()
     try:
         # Extract text from PDF with on cleaning
-        resume_text = extract_text_from_pdf(applicant_data['resume_path'])
+        resume_text = applicant_data.get('resume_text') or PDFParserService.extract_text(applicant_data['resume_path'])
         if not resume_text:
             logger.error("PDF extraction failed - empty text returned")
             return {
@@ -87,7 +332,7 @@ def screen_resume(applicant_data, rag_service, sendgrid_service):
                 'assessment': None
             }
         # Process resume using RAG service
-        assessment_result = rag_service.process_resume(resume_text)
+        assessment_result = rag_service.process_resume(resume_text, applicant_data.get('position'))
         if not isinstance(assessment_result, dict):
             logger.error("RAG service returned invalid response format")
             return {
@@ -95,39 +340,22 @@ def screen_resume(applicant_data, rag_service, sendgrid_service):
                 'error': 'Invalid assessment format',
                 'assessment': None
             }
+        record_screening_metrics(assessment_result, time.perf_counter() - started)
+        if assessment_result.get('error'):
+            return {
+                'success': False,
+                'error': assessment_result['error'],
+                'assessment': None
+            }
         # Logging with assessment
         qualification_status = "qualified" if assessment_result['meets_requirements'] else "not qualified"
         logger.info(f"Applicant {applicant_data['name']} assessed as {qualification_status} with detailed evaluation")
-        try:
-            if assessment_result['meets_requirements']:
-                # Email for successful applicants with detailed assessment
-                email_sent = sendgrid_service.forward_successful_applicant(
-                    RECRUITER_EMAIL,
-                    applicant_data,
-                    format_detailed_assessment(assessment_result['detailed_assessment'])
-                )
-                if not email_sent:
-                    logger.error(f"Failed to send recruiter email for {applicant_data['name']}")
-            else:
-                # Send the rejection email 
-                email_sent = sendgrid_service.send_rejection_email(
-                    applicant_data['email'],
-                    applicant_data['name']
-                )
-                if not email_sent:
-                    logger.error(f"Failed to send rejection email to {applicant_data['name']}")
-        except Exception as e:
-            logger.error(f"Email sending failed: {str(e)}")
-            # Continue to process even if email fails
-        return {
-            'success': True,
-            'assessment': assessment_result['detailed_assessment'],
-            'meets_requirements': assessment_result['meets_requirements'],
-            'raw_response': assessment_result.get('raw_response', ''),
-            'error': None
-        }
+        if email_outbox is not None:
+            notify_applicant(applicant_data, assessment_result, email_outbox)
+        return build_screening_result(assessment_result)
     except Exception as e:
         logger.error(f'Resume screening error: {str(e)}')
+        metrics.ERRORS.inc(component='screening')
         return {
             'success': False,
             'error': str(e),
@@ -135,40 +363,190 @@ def screen_resume(applicant_data, rag_service, sendgrid_service):
         }
 
 
-def extract_text_from_pdf(path):
+def record_screening_metrics(assessment_result, seconds=None):
+    """Stage timings and outcome of one RAGService assessment."""
+    metrics.observe_stages(assessment_result.get('timings'))
+    if seconds is not None:
+        metrics.STAGE_SECONDS.observe(seconds, stage='screen_total')
+    if assessment_result.get('error'):
+        outcome = 'error'
+    elif assessment_result.get('screened_out'):
+        outcome = 'screened_out'
+    elif assessment_result.get('cached'):
+        outcome = 'cached'
+    else:
+        outcome = 'qualified' if assessment_result['meets_requirements'] else 'not_qualified'
+    metrics.SCREENINGS.inc(outcome=outcome)
+
+
+def build_screening_result(assessment_result):
+    return {
+        'success': True,
+        'assessment': assessment_result['detailed_assessment'],
+        'meets_requirements': assessment_result['meets_requirements'],
+        'raw_response': assessment_result.get('raw_response', ''),
+        'prescreen': assessment_result.get('prescreen'),
+        'retrieval': assessment_result.get('retrieval'),
+        'timings': assessment_result.get('timings', {}),
+        'screened_out': assessment_result.get('screened_out', False),
+        'cached': assessment_result.get('cached', False),
+        'position': assessment_result.get('position'),
+        'model': assessment_result.get('model'),
+        'prompt_version': assessment_result.get('prompt_version'),
+        'usage': assessment_result.get('usage'),
+        'llm_score': assessment_result.get('llm_score'),
+        'requirements': assessment_result.get('requirements'),
+        'requirement_versions': assessment_result.get('requirement_versions'),
+        'error': None
+    }
+
+
+def screening_notification(result):
+    """The fields notify_applicant reads, from a build_screening_result dict."""
+    return {'meets_requirements': result['meets_requirements'], 'detailed_assessment': result['assessment']}
+
+
+def build_assessment(resume, result, position=None):
+    """Unsaved Assessment row for a successful screening result (see build_screening_result)."""
+    if result.get('screened_out'):
+        decision = Assessment.DECISION_SCREENED_OUT
+    elif result['meets_requirements']:
+        decision = Assessment.DECISION_QUALIFIED
+    else:
+        decision = Assessment.DECISION_NOT_QUALIFIED
+    prescreen = result.get('prescreen') or {}
+    keywords = prescreen.get('keywords') or {}
+    sections = prescreen.get('sections') or {}
+    statuses = result.get('requirements') or {}  # LLM status and evidence, from structured output
+    usage = result.get('usage') or {}
+    llm_seconds = (result.get('timings') or {}).get('llm')
+    return Assessment(
+        resume=resume,
+        position=position if position is not None else resume.position,
+        email=resume.email.lower(),
+        decision=decision,
+        detailed_assessment=result.get('assessment') or '',
+        raw_response=result.get('raw_response') or '',
+        score=prescreen.get('score'),
+        llm_score=result.get('llm_score'),
+        rank_score=Assessment.rank_score_for(result.get('llm_score')),
+        requirement_scores={
+            name: dict({'similarity': sections.get(name), 'keywords': keywords.get(name, [])}, **statuses.get(name, {}))
+            for name in dict.fromkeys([*sections, *statuses])
+        },
+        requirement_versions=result.get('requirement_versions') or {},
+        model_name=result.get('model') or '',
+        prompt_version=result.get('prompt_version') or '',
+        prompt_tokens=usage.get('prompt_tokens'),
+        completion_tokens=usage.get('completion_tokens'),
+        cached_prompt_tokens=usage.get('cached_tokens'),
+        tokens_estimated=usage.get('estimated', False),
+        latency_ms=round(llm_seconds * 1000) if llm_seconds is not None else None,
+        timings=result.get('timings') or {},
+        cached=result.get('cached', False),
+    )
+
+
+def store_assessment_results(resume, result, position=None):
+    """Persist a successful screening result as an Assessment; failures stay on the ScreeningJob only."""
+    if not result.get('success', False):
+        return None
+    assessment = build_assessment(resume, result, position)
+    assessment.save()
+    return assessment
+
+
+_RESCREEN_FIELDS = ['decision', 'detailed_assessment', 'raw_response', 'score', 'llm_score', 'rank_score',
+                    'requirement_scores', 'requirement_versions', 'model_name', 'prompt_version', 'latency_ms',
+                    'timings', 'cached']
+_TOKEN_FIELDS = ['prompt_tokens', 'completion_tokens', 'cached_prompt_tokens']
+
+
+def update_assessment(assessment, result):
+    """
+    Overwrite a stored Assessment with a re-screen result (see build_screening_result). The row
+    keeps its id, so recruiter digests already sent do not list the applicant again, and its
+    token counts include what the re-screen spent. Returns True if the decision changed.
+    """
+    fresh = build_assessment(assessment.resume, result, assessment.position)
+    decision_changed = fresh.decision != assessment.decision
+    for field in _RESCREEN_FIELDS:
+        setattr(assessment, field, getattr(fresh, field))
+    for field in _TOKEN_FIELDS:
+        if getattr(fresh, field):
+            setattr(assessment, field, (getattr(assessment, field) or 0) + getattr(fresh, field))
+    assessment.tokens_estimated = assessment.tokens_estimated or fresh.tokens_estimated
+    assessment.rescreened_at = timezone.now()
+    assessment.save(update_fields=_RESCREEN_FIELDS + _TOKEN_FIELDS + ['tokens_estimated', 'rescreened_at'])
+    return decision_changed
+
+
+def duplicate_screening_result(resume):
+    """
+    Screening result reused from the original application when resume is a near-duplicate
+    (Resume.duplicate_of) whose original already has an assessment for the same position.
+    """
+    assessment = ServiceRegistry.get('duplicates').previous_assessment(resume)
+    if assessment is None:
+        return None
+    logger.info(f"Resume {resume.pk} reuses assessment {assessment.pk} of near-duplicate resume {resume.duplicate_of_id}")
+    return {
+        'success': True,
+        'assessment': assessment.detailed_assessment,
+        'meets_requirements': assessment.meets_requirements,
+        'raw_response': assessment.raw_response,
+        'screened_out': assessment.decision == Assessment.DECISION_SCREENED_OUT,
+        'duplicate_of': resume.duplicate_of_id,
+        'assessment_id': assessment.pk,
+        'error': None
+    }
+
+
+def ensure_resume_text(resume):
+    """
+    Return the resume's extracted text, extracting and saving it first if the upload did not.
+    A byte-identical earlier upload (same sha256) lends its text instead of re-extracting,
+    and so does the text cached beside the stored file (PDFParserService.extract_resume_text).
+    Newly extracted text is fingerprinted and linked to any near-duplicate earlier resume.
+    """
+    if not resume.resume_text:
+        identical = None
+        if resume.sha256:
+            identical = (Resume.objects.filter(sha256=resume.sha256).exclude(pk=resume.pk).exclude(resume_text='')
+                         .values_list('resume_text', flat=True).first())
+        if identical is not None:
+            logger.info(f"Resume {resume.pk} is identical to an earlier upload, reusing its text")
+        resume.resume_text = (identical if identical is not None
+                              else PDFParserService.extract_resume_text(resume.resume_file.path, resume.sha256))
+        Resume.objects.filter(pk=resume.pk).update(resume_text=resume.resume_text)
+        ServiceRegistry.get('duplicates').link(resume)
+    return resume.resume_text
+
+
+def notify_applicant(applicant_data, assessment_result, email_outbox):
     """
-    Extract and clean text from a PDF file with enhanced cleaning capabilities.
-    Returns cleaned text or raises an exception if extraction fails.
+    Queue the recruiter forward for qualified applicants and the rejection for the rest.
+    Emails are written to the outbox and sent by dispatch_emails, never on this path.
+    Qualified applicants for positions in digest mode get no email of their own: their
+    stored assessment is picked up by the next recruiter digest for the position.
     """
     try:
-        if not os.path.exists(path):
-            raise FileNotFoundError(f"PDF file not found at path: {path}")
-        # Extract text from PDF
-        text = extract_text(path)
-        if not text:
-            raise Exception("No text extracted from PDF")
-        # Text cleaning
-        # Remove extra whitespace and normalize spaces
-        text = re.sub(r'\s+', ' ', text)
-        # Remove non-ASCII characters but preserve common special characters
-        text = re.sub(r'[^\x20-\x7E\n]', '', text)
-        # Normalize bullet points and special characters
-        text = re.sub(r'[•●■◆▪]', '- ', text)
-        # Fix common OCR issues
-        text = text.replace('|', 'I')  # Common OCR mistake
-        text = re.sub(r'(?<=[a-z])(?=[A-Z])', ' ', text)  # Add space between camelCase
-        # Remove duplicate dash indicators
-        text = re.sub(r'-\s*-\s*-', '-', text)
-        # Remove leading/trailing whitespace
-        text = text.strip()
-        # Verify meaningful content
-        if len(text.split()) < 10:
-            raise Exception("Extracted text appears to be too short to be a valid resume")
-        # Limit to 15000 characters to avoid token limits
-        return text[:15000]
+        position = applicant_data.get('position')
+        if assessment_result['meets_requirements']:
+            if position is not None and position.recruiter_notification == JobPosition.NOTIFY_DIGEST:
+                return
+            # Email for successful applicants with detailed assessment
+            email_outbox.enqueue_recruiter_forward(
+                (position.recruiter_email if position is not None else '') or RECRUITER_EMAIL,
+                applicant_data,
+                format_detailed_assessment(assessment_result['detailed_assessment'])
+            )
+        else:
+            # Queue the rejection email
+            email_outbox.enqueue_rejection(applicant_data)
     except Exception as e:
-        logger.error(f'PDF extraction failed for {path}: {str(e)}')
-        raise Exception(f"Failed to extract text from resume: {str(e)}")
+        logger.error(f"Queueing email failed for {applicant_data['name']}: {str(e)}")
+        # Continue to process even if email fails
 
 
 def format_detailed_assessment(assessment):
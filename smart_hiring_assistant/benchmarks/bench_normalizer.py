@@ -0,0 +1,100 @@
+"""
+Micro-benchmark for Screener.services.text_normalizer.
+
+    python -m benchmarks.bench_normalizer [--corpus-dir DIR] [--output results.json]
+                                          [--baseline previous.json --tolerance 0.15]
+
+Exits with status 1 when --baseline is given and throughput dropped by more than --tolerance.
+"""
+import argparse
+import json
+import platform
+import re
+import statistics
+import sys
+import time
+
+from benchmarks.corpus import load_corpus
+from Screener.services.text_normalizer import NORMALIZER_VERSION, normalize_resume_text
+
+
+def legacy_normalize(text):
+    """The per-call regex cleanup previously inlined in views.extract_text_from_pdf, kept for comparison."""
+    text = re.sub(r'\s+', ' ', text)
+    text = re.sub(r'[^\x20-\x7E\n]', '', text)
+    text = re.sub(r'[•●■◆▪]', '- ', text)
+    text = text.replace('|', 'I')
+    text = re.sub(r'(?<=[a-z])(?=[A-Z])', ' ', text)
+    text = re.sub(r'-\s*-\s*-', '-', text)
+    return text.strip()
+
+
+def time_corpus(func, corpus, repeats):
+    """Best-of and median seconds to normalize the whole corpus once."""
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        for text in corpus:
+            func(text)
+        timings.append(time.perf_counter() - started)
+    return min(timings), statistics.median(timings)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--corpus-dir', help='Directory of extracted resume *.txt files (default: synthetic corpus).')
+    parser.add_argument('--size', type=int, default=500, help='Synthetic corpus size.')
+    parser.add_argument('--repeats', type=int, default=7)
+    parser.add_argument('--output', help='Write results as JSON to this path.')
+    parser.add_argument('--baseline', help='JSON results from an earlier run to compare against.')
+    parser.add_argument('--tolerance', type=float, default=0.15,
+                        help='Allowed fractional throughput drop versus --baseline (default: 0.15).')
+    args = parser.parse_args(argv)
+
+    corpus = load_corpus(size=args.size, corpus_dir=args.corpus_dir)
+    if not corpus:
+        parser.error('corpus is empty')
+    total_mb = sum(len(text.encode('utf-8')) for text in corpus) / (1024 * 1024)
+    normalize_resume_text(corpus[0])  # warm the fold table
+
+    results = {
+        'python': platform.python_version(),
+        'normalizer_version': NORMALIZER_VERSION,
+        'documents': len(corpus),
+        'corpus_mb': round(total_mb, 3),
+        'implementations': {},
+    }
+    for label, func in (('normalizer', normalize_resume_text), ('legacy', legacy_normalize)):
+        best, median = time_corpus(func, corpus, args.repeats)
+        results['implementations'][label] = {
+            'best_seconds': best,
+            'median_seconds': median,
+            'docs_per_second': len(corpus) / median,
+            'mb_per_second': total_mb / median,
+        }
+    current = results['implementations']['normalizer']
+    legacy = results['implementations']['legacy']
+    print(f"{len(corpus)} documents, {total_mb:.2f} MB")
+    for label, stats in results['implementations'].items():
+        print(f"  {label:<10} {stats['docs_per_second']:>10.0f} docs/s {stats['mb_per_second']:>8.2f} MB/s "
+              f"(median {stats['median_seconds'] * 1000:.1f} ms)")
+    print(f"  speedup over legacy: {legacy['median_seconds'] / current['median_seconds']:.2f}x")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['implementations']['normalizer']
+        floor = baseline['mb_per_second'] * (1 - args.tolerance)
+        if current['mb_per_second'] < floor:
+            print(f"REGRESSION: {current['mb_per_second']:.2f} MB/s is below {floor:.2f} MB/s "
+                  f"(baseline {baseline['mb_per_second']:.2f} MB/s, tolerance {args.tolerance:.0%})")
+            return 1
+        print(f"OK: within {args.tolerance:.0%} of baseline ({baseline['mb_per_second']:.2f} MB/s)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,303 @@
+"""
+End-to-end replay benchmark for the screening pipeline.
+
+    python -m benchmarks.bench_pipeline [--size 40 | --corpus-dir DIR] [--concurrency 1 4 8]
+                                        [--llm-latency 0.5] [--email-latency 0.1] [--output results.json]
+                                        [--baseline previous.json --tolerance 0.15]
+
+Every resume PDF goes through the same steps as a screening worker, against a throwaway
+SQLite database and a local stub of the OpenAI and SendGrid APIs (benchmarks.stub_server),
+so runs are offline, repeatable and comparable across commits. Each concurrency level runs
+the whole corpus on that many threads and reports per-stage p50/p95/p99 latency and
+throughput; queued emails are then dispatched and timed per batch.
+
+Stages: extraction, normalization, prescreen, prompt_build (retrieval and prompt assembly),
+llm (round trip to the stub), parse, db_write, email_enqueue, and email_dispatch per batch.
+
+--corpus-dir takes a directory of *.pdf files (e.g. anonymized real resumes); by default a
+deterministic synthetic corpus is rendered to PDF. Exits with status 1 when --baseline is
+given and throughput at any concurrency level dropped by more than --tolerance.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+from benchmarks.corpus import load_pdf_corpus
+from benchmarks.stub_server import StubServer
+
+STAGES = ['extraction', 'normalization', 'prescreen', 'prompt_build', 'llm', 'parse', 'db_write', 'email_enqueue',
+          'total']
+
+
+def setup_django(database, server, args):
+    """Point Django at a fresh database and the stub APIs; must run before any service is created."""
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'smart_hiring_assistant.settings')
+    os.environ.setdefault('OPENAI_API_KEY', 'benchmark')
+    os.environ.setdefault('SENDGRID_API_KEY', 'benchmark')
+    os.environ.setdefault('FROM_EMAIL', 'benchmark@example.com')
+    os.environ.setdefault('RECRUITER_EMAIL', 'recruiter@example.com')
+    import django
+    from django.conf import settings
+
+    settings.DATABASES['default']['NAME'] = database
+    settings.OPENAI_BASE_URL = server.openai_base_url
+    settings.OPENAI_MAX_CONCURRENCY = max(args.concurrency)
+    settings.OPENAI_REQUESTS_PER_MINUTE = 0
+    settings.SENDGRID_API_HOST = server.sendgrid_host
+    settings.EMAIL_OUTBOX_BACKEND = 'sendgrid'
+    settings.ASSESSMENT_CACHE_ENABLED = False  # every document should reach the LLM stage
+    settings.PRESCREEN_ENABLED = not args.no_prescreen
+    settings.PDF_EXTRACTION_WORKERS = args.pdf_workers or max(args.concurrency)
+    if args.output_format:
+        settings.RAG_OUTPUT_FORMAT = args.output_format
+    django.setup()
+    from django.core.management import call_command
+    call_command('migrate', verbosity=0)
+    return settings
+
+
+class Pipeline:
+    """The screening worker's steps for one document, timed individually."""
+    def __init__(self):
+        from Screener.services.email_outbox_service import EmailOutboxService
+        from Screener.services.openai_service import OpenAIService
+        from Screener.services.rag_service import RAGService
+        from Screener.services.requirement_index import RequirementIndexService
+
+        self.rag_service = RAGService(OpenAIService())
+        self.email_outbox = EmailOutboxService()
+        self.position = RequirementIndexService.default_position()
+
+    def screen(self, path, name, sequence):
+        from django.db import close_old_connections, connection, transaction
+
+        from Screener.models import Resume
+        from Screener.services.pdf_parser_service import PDFParserService
+        from Screener.services.text_normalizer import normalize_resume_text
+        from Screener.views import (
+            build_applicant_data, build_screening_result, notify_applicant, screening_notification,
+            store_assessment_results,
+        )
+
+        close_old_connections()
+        timings = {}
+        started = time.perf_counter()
+        try:
+            raw_text = PDFParserService.extract_raw_text(path)
+            timings['extraction'] = time.perf_counter() - started
+            mark = time.perf_counter()
+            text = normalize_resume_text(raw_text)
+            timings['normalization'] = time.perf_counter() - mark
+
+            result = self.rag_service.process_resume(text, self.position)
+            if result.get('error'):
+                return {'error': result['error']}
+            rag_timings = result.get('timings', {})
+            for stage, rag_stage in (('prescreen', 'prescreen'), ('prompt_build', 'retrieval'),
+                                     ('llm', 'llm'), ('parse', 'parse')):
+                if rag_stage in rag_timings:
+                    timings[stage] = rag_timings[rag_stage]
+
+            # Same transaction layout as process_screening_job: rows and queued email commit together.
+            screening = build_screening_result(result)
+            mark = time.perf_counter()
+            with transaction.atomic():
+                resume = Resume.objects.create(
+                    name=f"Benchmark {sequence}", email=f"applicant{sequence}@example.com",
+                    resume_file=f"benchmarks/{name}", resume_text=text, position=self.position,
+                )
+                store_assessment_results(resume, screening)
+                enqueue_started = time.perf_counter()
+                notify_applicant(build_applicant_data(resume), screening_notification(screening), self.email_outbox)
+                enqueue_finished = time.perf_counter()
+            timings['email_enqueue'] = enqueue_finished - enqueue_started
+            timings['db_write'] = (enqueue_started - mark) + (time.perf_counter() - enqueue_finished)
+            timings['total'] = time.perf_counter() - started
+            return {'timings': timings, 'screened_out': result.get('screened_out', False),
+                    'qualified': result['meets_requirements']}
+        except Exception as e:
+            return {'error': str(e)}
+        finally:
+            connection.close()
+
+    def dispatch_emails(self):
+        """Drain the outbox; returns (seconds per dispatch call, emails sent)."""
+        batches, sent = [], 0
+        while True:
+            started = time.perf_counter()
+            claimed, batch_sent = self.email_outbox.dispatch('benchmark')
+            if not claimed:
+                break
+            batches.append(time.perf_counter() - started)
+            sent += batch_sent
+        return batches, sent
+
+
+def summarize(samples):
+    if not samples:
+        return {'count': 0}
+    values = np.asarray(samples) * 1000
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {
+        'count': len(samples),
+        'mean_ms': round(float(values.mean()), 3),
+        'p50_ms': round(float(p50), 3),
+        'p95_ms': round(float(p95), 3),
+        'p99_ms': round(float(p99), 3),
+        'max_ms': round(float(values.max()), 3),
+    }
+
+
+def run_level(pipeline, documents, concurrency, server, offset):
+    chat_before, mail_before = server.requests['chat'], server.requests['mail']
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='bench') as pool:
+        outcomes = list(pool.map(lambda item: pipeline.screen(item[1][0], item[1][1], offset + item[0]),
+                                 enumerate(documents)))
+    wall = time.perf_counter() - started
+    dispatch_started = time.perf_counter()
+    batches, emails_sent = pipeline.dispatch_emails()
+    dispatch_wall = time.perf_counter() - dispatch_started
+
+    completed = [outcome for outcome in outcomes if 'error' not in outcome]
+    errors = sorted({outcome['error'] for outcome in outcomes if 'error' in outcome})
+    return {
+        'concurrency': concurrency,
+        'documents': len(documents),
+        'completed': len(completed),
+        'failures': len(outcomes) - len(completed),
+        'errors': errors[:5],
+        'screened_out': sum(outcome['screened_out'] for outcome in completed),
+        'qualified': sum(outcome['qualified'] for outcome in completed),
+        'wall_seconds': round(wall, 4),
+        'docs_per_second': round(len(completed) / wall, 3) if wall else 0.0,
+        'llm_requests': server.requests['chat'] - chat_before,
+        'stages': {stage: summarize([outcome['timings'][stage] for outcome in completed
+                                     if stage in outcome['timings']]) for stage in STAGES},
+        'email_dispatch': dict(summarize(batches), emails=emails_sent,
+                               mail_requests=server.requests['mail'] - mail_before,
+                               emails_per_second=round(emails_sent / dispatch_wall, 3) if dispatch_wall else 0.0),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True, cwd=Path(__file__).resolve().parent).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_level(level):
+    print(f"\nconcurrency {level['concurrency']}: {level['completed']}/{level['documents']} documents in "
+          f"{level['wall_seconds']:.2f}s ({level['docs_per_second']:.2f} docs/s), "
+          f"{level['screened_out']} screened out, {level['llm_requests']} LLM calls, {level['failures']} failures")
+    print(f"  {'stage':<15}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'count':>8}")
+    for stage, stats in list(level['stages'].items()) + [('email_dispatch', level['email_dispatch'])]:
+        if stats['count']:
+            print(f"  {stage:<15}{stats['p50_ms']:>10.2f}{stats['p95_ms']:>10.2f}{stats['p99_ms']:>10.2f}"
+                  f"{stats['count']:>8}")
+    for error in level['errors']:
+        print(f"  error: {error}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--corpus-dir', help='Directory of resume *.pdf files (default: synthetic corpus).')
+    parser.add_argument('--size', type=int, default=40, help='Synthetic corpus size.')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 8],
+                        help='Worker thread counts to run the corpus at (default: 1 4 8).')
+    parser.add_argument('--llm-latency', type=float, default=0.5, help='Stub LLM response time in seconds.')
+    parser.add_argument('--email-latency', type=float, default=0.1, help='Stub SendGrid response time in seconds.')
+    parser.add_argument('--jitter', type=float, default=0.2, help='Latency jitter as a fraction (default: 0.2).')
+    parser.add_argument('--output-format', choices=['tool', 'json_schema', 'text'],
+                        help='RAG_OUTPUT_FORMAT to benchmark (default: the configured one).')
+    parser.add_argument('--no-prescreen', action='store_true', help='Disable the local pre-screen.')
+    parser.add_argument('--pdf-workers', type=int, help='PDF extraction processes (default: max concurrency).')
+    parser.add_argument('--output', help='Write results as JSON to this path.')
+    parser.add_argument('--baseline', help='JSON results from an earlier run to compare against.')
+    parser.add_argument('--tolerance', type=float, default=0.15,
+                        help='Allowed fractional throughput drop versus --baseline (default: 0.15).')
+    args = parser.parse_args(argv)
+
+    corpus = load_pdf_corpus(size=args.size, corpus_dir=args.corpus_dir)
+    if not corpus:
+        parser.error('corpus is empty')
+    server = StubServer(llm_latency=args.llm_latency, email_latency=args.email_latency, jitter=args.jitter).start()
+    with tempfile.TemporaryDirectory(prefix='bench-pipeline-') as workdir:
+        documents = []
+        for name, data in corpus:
+            path = Path(workdir) / name
+            path.write_bytes(data)
+            documents.append((str(path), name))
+        settings = setup_django(str(Path(workdir) / 'bench.sqlite3'), server, args)
+        pipeline = Pipeline()
+        # Warm up at full concurrency: start every PDF worker process and compile the requirement index.
+        warmup_size = min(len(documents), max(args.concurrency))
+        warmup = run_level(pipeline, documents[:warmup_size], warmup_size, server, 0)
+        if warmup['failures']:
+            print(f"Warm-up failed: {'; '.join(warmup['errors'])}")
+            return 2
+
+        results = {
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            'git_commit': git_commit(),
+            'python': platform.python_version(),
+            'documents': len(documents),
+            'corpus_mb': round(sum(len(data) for _, data in corpus) / (1024 * 1024), 3),
+            'config': {
+                'llm_latency': args.llm_latency,
+                'email_latency': args.email_latency,
+                'jitter': args.jitter,
+                'output_format': settings.RAG_OUTPUT_FORMAT,
+                'prescreen': settings.PRESCREEN_ENABLED,
+                'pdf_workers': settings.PDF_EXTRACTION_WORKERS,
+                'email_batch_size': pipeline.email_outbox.batch_size,
+            },
+            'levels': [],
+        }
+        print(f"{len(documents)} documents, {results['corpus_mb']:.2f} MB, commit {results['git_commit']}")
+        offset = warmup_size
+        for concurrency in args.concurrency:
+            level = run_level(pipeline, documents, concurrency, server, offset)
+            offset += len(documents)
+            results['levels'].append(level)
+            print_level(level)
+    server.stop()
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = {level['concurrency']: level for level in json.load(f)['levels']}
+        regressed = False
+        for level in results['levels']:
+            previous = baseline.get(level['concurrency'])
+            if previous is None:
+                continue
+            floor = previous['docs_per_second'] * (1 - args.tolerance)
+            if level['docs_per_second'] < floor:
+                regressed = True
+                print(f"REGRESSION at concurrency {level['concurrency']}: {level['docs_per_second']:.2f} docs/s "
+                      f"is below {floor:.2f} (baseline {previous['docs_per_second']:.2f}, "
+                      f"tolerance {args.tolerance:.0%})")
+        if regressed:
+            return 1
+        print(f"OK: within {args.tolerance:.0%} of baseline")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,184 @@
+"""
+Recruiter shortlist benchmark: page latency by depth, keyset versus offset pagination.
+
+    python -m benchmarks.bench_shortlist [--rows 50000] [--depths 1 100 500] [--repeat 5]
+                                         [--output results.json] [--baseline previous.json --tolerance 0.15]
+
+A throwaway SQLite database is filled with --rows assessments of one position (plus their
+resumes, with --text-bytes of resume and assessment text each, so skipping the blobs
+matters). For every depth (in pages of SHORTLIST_PAGE_SIZE) it times:
+
+- keyset: ShortlistService.page() from the cursor of the previous page, as the view runs it;
+- offset: the same rows as an OFFSET slice of full Assessment rows with their resume, as a
+  paginated admin changelist loads them;
+- requirement: a keyset page filtered on one requirement's status.
+
+Exits with status 1 when --baseline is given and the median keyset time at the deepest
+common depth grew by more than --tolerance.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+MODES = ['keyset', 'offset', 'requirement']
+
+
+def setup_django(database, page_size):
+    """Point Django at a fresh database; must run before any service is created."""
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'smart_hiring_assistant.settings')
+    os.environ.setdefault('OPENAI_API_KEY', 'benchmark')
+    import django
+    from django.conf import settings
+
+    settings.DATABASES['default']['NAME'] = database
+    settings.SHORTLIST_PAGE_SIZE = page_size
+    django.setup()
+    from django.core.management import call_command
+    call_command('migrate', verbosity=0)
+    return settings
+
+
+def populate(position, rows, text_bytes, seed=0):
+    """rows resumes with one stored assessment each, in chunks; returns the requirement names."""
+    from Screener.models import Assessment, Resume
+
+    rng = random.Random(seed)
+    names = list(position.requirements.values_list('name', flat=True))
+    text = ('experience python machine learning ' * (text_bytes // 35 + 1))[:text_bytes]
+    started = datetime.now(timezone.utc) - timedelta(days=90)
+    chunk = 5000
+    for first in range(0, rows, chunk):
+        count = min(chunk, rows - first)
+        resumes = Resume.objects.bulk_create([
+            Resume(name=f"Applicant {first + i}", email=f"applicant{first + i}@example.com", resume_text=text,
+                   resume_file='resumes/benchmark.pdf', position=position)
+            for i in range(count)
+        ])
+        assessments = []
+        for i, resume in enumerate(resumes):
+            llm_score = rng.choice([None, rng.randint(0, 100)])
+            score = round(rng.random(), 4)
+            assessments.append(Assessment(
+                resume=resume, position=position, email=resume.email,
+                decision=rng.choice([Assessment.DECISION_QUALIFIED, Assessment.DECISION_NOT_QUALIFIED]),
+                detailed_assessment=text, raw_response=text, score=score, llm_score=llm_score,
+                rank_score=Assessment.rank_score_for(llm_score),
+                requirement_scores={name: {'similarity': rng.random(), 'keywords': ['python'],
+                                           'status': rng.choice(['met', 'partial', 'unmet']), 'evidence': text[:200]}
+                                    for name in names},
+                timings={'llm': 1.0}, model_name='benchmark',
+            ))
+        Assessment.objects.bulk_create(assessments)
+        # auto_now_add ignores the value given; spread the chunk over the last 90 days instead.
+        Assessment.objects.filter(pk__gte=assessments[0].pk, pk__lte=assessments[-1].pk).update(
+            created_at=started + timedelta(days=90 * first / rows))
+    return names
+
+
+def timed(function, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        samples.append(time.perf_counter() - started)
+    return round(statistics.median(samples) * 1000, 3)
+
+
+def run_depth(position, depth, page_size, requirement, repeat):
+    from Screener.models import Assessment
+    from Screener.services.service_registry import ServiceRegistry
+
+    shortlist = ServiceRegistry.get('shortlist')
+    ranked = Assessment.objects.for_position(position).qualified().order_by(shortlist.ordering('rank_score'), '-pk')
+    offset = (depth - 1) * page_size
+    cursor = None
+    if offset:
+        last = ranked.values_list('rank_score', 'pk')[offset - 1]
+        cursor = shortlist.encode_cursor(*last)
+    keyset_rows = shortlist.page(position, after=cursor)[0]
+    offset_rows = list(ranked.select_related('resume')[offset:offset + page_size])
+    assert [row.pk for row in keyset_rows] == [row.pk for row in offset_rows], f"pages differ at depth {depth}"
+    return {
+        'depth': depth,
+        'keyset': timed(lambda: shortlist.page(position, after=cursor), repeat),
+        'offset': timed(lambda: list(ranked.select_related('resume')[offset:offset + page_size]), repeat),
+        'requirement': timed(lambda: shortlist.page(position, requirements={requirement: 'met'}, after=cursor),
+                             repeat),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True, cwd=Path(__file__).resolve().parent).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=50000, help='Assessments to generate (default: 50000).')
+    parser.add_argument('--text-bytes', type=int, default=2000,
+                        help='Size of each resume text and assessment text (default: 2000).')
+    parser.add_argument('--page-size', type=int, default=50, help='SHORTLIST_PAGE_SIZE (default: 50).')
+    parser.add_argument('--depths', type=int, nargs='+', default=[1, 100, 400],
+                        help='Page numbers to time (default: 1 100 400).')
+    parser.add_argument('--repeat', type=int, default=5, help='Timed runs per measurement (median reported).')
+    parser.add_argument('--output', help='Write results as JSON to this path.')
+    parser.add_argument('--baseline', help='JSON results from an earlier run to compare against.')
+    parser.add_argument('--tolerance', type=float, default=0.15,
+                        help='Allowed fractional growth of the deepest keyset page time (default: 0.15).')
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix='bench-shortlist-') as workdir:
+        setup_django(str(Path(workdir) / 'bench.sqlite3'), args.page_size)
+        from Screener.models import Assessment, JobPosition
+
+        position = JobPosition.objects.get(slug='ml-engineer')
+        started = time.perf_counter()
+        names = populate(position, args.rows, args.text_bytes)
+        print(f"{args.rows} assessments in {time.perf_counter() - started:.1f}s, commit {git_commit()}")
+        qualified = Assessment.objects.for_position(position).qualified().count()
+        depths = [depth for depth in args.depths if (depth - 1) * args.page_size < qualified]
+        results = {
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            'git_commit': git_commit(),
+            'python': platform.python_version(),
+            'config': {'rows': args.rows, 'text_bytes': args.text_bytes, 'page_size': args.page_size,
+                       'qualified': qualified},
+            'depths': [run_depth(position, depth, args.page_size, names[0], args.repeat) for depth in depths],
+        }
+    print(f"  {'page':>6}" + ''.join(f"{mode + ' ms':>16}" for mode in MODES))
+    for row in results['depths']:
+        print(f"  {row['depth']:>6}" + ''.join(f"{row[mode]:>16.2f}" for mode in MODES))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = {row['depth']: row for row in json.load(f)['depths']}
+        common = [row for row in results['depths'] if row['depth'] in baseline]
+        if common:
+            row = common[-1]
+            ceiling = baseline[row['depth']]['keyset'] * (1 + args.tolerance)
+            if row['keyset'] > ceiling:
+                print(f"REGRESSION at page {row['depth']}: keyset {row['keyset']:.2f} ms is above {ceiling:.2f} ms "
+                      f"(baseline {baseline[row['depth']]['keyset']:.2f}, tolerance {args.tolerance:.0%})")
+                return 1
+            print(f"OK: within {args.tolerance:.0%} of baseline")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
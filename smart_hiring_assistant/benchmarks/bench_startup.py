@@ -0,0 +1,227 @@
+"""
+Start-up benchmark: import time and time to the first successful request of a fresh process.
+
+    python -m benchmarks.bench_startup [--repeat 5] [--llm-latency 0.0] [--output results.json]
+                                       [--baseline previous.json --tolerance 0.15]
+
+Every sample is a new Python process against a copy of a migrated throwaway SQLite database
+and the local OpenAI/SendGrid stub (benchmarks.stub_server). It times, from the start of
+the process:
+
+- setup: loading the WSGI application as a web worker does: django.setup() and, when
+  enabled, the service warm-up;
+- urls: importing the URLconf, i.e. Screener.views and what it pulls in;
+- first_request: the first resume upload POST (streamed upload, text extraction, enqueue);
+- first_screening: screening the queued job through the shared services (LLM call to the stub).
+
+Each is run cold (services built on first use) and warm (SCREENER_WARM_UP=true), and the
+heavy modules already imported when the URLconf has loaded are listed. Exits with status 1
+when --baseline is given and the median time to the first screening of either mode grew
+by more than --tolerance.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+STARTED = time.perf_counter()
+
+from benchmarks.corpus import load_pdf_corpus  # noqa: E402
+from benchmarks.stub_server import StubServer  # noqa: E402
+
+PHASES = ['setup', 'urls', 'first_request', 'first_screening']
+HEAVY_MODULES = ['openai', 'numpy', 'pdfminer', 'httpx']
+MODES = {'cold': 'false', 'warm': 'true'}
+
+
+def configure(workdir, openai_base_url, sendgrid_host):
+    """Point settings at the benchmark database, media directory and stub APIs (before django.setup())."""
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'smart_hiring_assistant.settings')
+    os.environ.setdefault('OPENAI_API_KEY', 'benchmark')
+    os.environ.setdefault('SENDGRID_API_KEY', 'benchmark')
+    os.environ.setdefault('FROM_EMAIL', 'benchmark@example.com')
+    os.environ.setdefault('RECRUITER_EMAIL', 'recruiter@example.com')
+    from django.conf import settings
+
+    settings.DATABASES['default']['NAME'] = str(Path(workdir) / 'bench.sqlite3')
+    settings.MEDIA_ROOT = str(Path(workdir) / 'media')
+    settings.OPENAI_BASE_URL = openai_base_url
+    settings.OPENAI_REQUESTS_PER_MINUTE = 0
+    settings.SENDGRID_API_HOST = sendgrid_host
+    settings.ASSESSMENT_CACHE_ENABLED = False  # the first screening should reach the LLM
+    settings.ALLOWED_HOSTS = ['*']
+    settings.SCREENER_STREAM_CLAIM_GRACE = 0  # no streaming page here; the job is claimed right away
+    return settings
+
+
+def child(args):
+    """One sample: runs in its own process and prints its phase timings as JSON."""
+    timings = {}
+    configure(args.workdir, args.openai_base_url, args.sendgrid_host)
+    import smart_hiring_assistant.wsgi  # noqa: F401
+
+    timings['setup'] = time.perf_counter() - STARTED
+    from importlib import import_module
+
+    from django.conf import settings
+
+    import_module(settings.ROOT_URLCONF)
+    timings['urls'] = time.perf_counter() - STARTED
+    loaded = [name for name in HEAVY_MODULES if name in sys.modules]
+
+    from django.test import Client
+
+    with open(args.pdf, 'rb') as resume_file:
+        response = Client().post('/', {'name': 'Startup Benchmark', 'email': 'startup@example.com',
+                                       'resume_file': resume_file})
+    if response.status_code != 302 or 'job=' not in response.get('Location', ''):
+        raise SystemExit(f"Upload failed with status {response.status_code}")
+    timings['first_request'] = time.perf_counter() - STARTED
+
+    from Screener.models import ScreeningJob
+    from Screener.services.service_registry import ServiceRegistry
+    from Screener.views import process_screening_job
+
+    job_queue = ServiceRegistry.get('job_queue')
+    job = job_queue.claim('bench-startup')
+    if job is None:
+        raise SystemExit('The uploaded resume was not queued')
+    result = process_screening_job(job, ServiceRegistry.get('rag'), ServiceRegistry.get('email_outbox'), job_queue)
+    job.refresh_from_db()
+    if job.status != ScreeningJob.STATUS_DONE:
+        raise SystemExit(f"Screening failed: {(result or {}).get('error') or job.last_error}")
+    timings['first_screening'] = time.perf_counter() - STARTED
+    print(json.dumps({'timings': timings, 'loaded_at_urls': loaded}))
+
+
+def prepare(workdir, server):
+    """Migrate a template database once; every sample starts from a copy of it."""
+    env = dict(os.environ, PYTHONPATH=str(Path(__file__).resolve().parent.parent))
+    code = ('import sys; from benchmarks.bench_startup import configure; configure(*sys.argv[1:]); '
+            'import django; django.setup(); from django.core.management import call_command; '
+            "call_command('migrate', verbosity=0)")
+    subprocess.run([sys.executable, '-c', code, workdir, server.openai_base_url, server.sendgrid_host],
+                   check=True, env=env)
+
+
+def sample(template, pdf, server, mode):
+    with tempfile.TemporaryDirectory(prefix='bench-startup-run-') as workdir:
+        shutil.copy(Path(template) / 'bench.sqlite3', Path(workdir) / 'bench.sqlite3')
+        env = dict(os.environ, SCREENER_WARM_UP=MODES[mode],
+                   PYTHONPATH=str(Path(__file__).resolve().parent.parent))
+        started = time.perf_counter()
+        completed = subprocess.run(
+            [sys.executable, '-m', 'benchmarks.bench_startup', '--child', '--workdir', workdir, '--pdf', pdf,
+             '--openai-base-url', server.openai_base_url, '--sendgrid-host', server.sendgrid_host],
+            capture_output=True, text=True, env=env, cwd=Path(__file__).resolve().parent.parent,
+        )
+        wall = time.perf_counter() - started
+    if completed.returncode != 0:
+        raise RuntimeError(f"{mode} sample failed: {(completed.stderr or completed.stdout).strip()[-500:]}")
+    outcome = json.loads(completed.stdout.strip().splitlines()[-1])
+    outcome['process_seconds'] = wall
+    return outcome
+
+
+def summarize(outcomes):
+    phases = {phase: round(statistics.median(outcome['timings'][phase] for outcome in outcomes) * 1000, 1)
+              for phase in PHASES}
+    # Time spent in each phase, e.g. how long the first request itself took once the app was loaded.
+    durations = {phase: round(statistics.median(
+        outcome['timings'][phase] - (outcome['timings'][PHASES[n - 1]] if n else 0) for outcome in outcomes) * 1000, 1)
+        for n, phase in enumerate(PHASES)}
+    return {
+        'samples': len(outcomes),
+        'median_ms': phases,
+        'median_phase_ms': durations,
+        'min_first_screening_ms': round(min(outcome['timings']['first_screening'] for outcome in outcomes) * 1000, 1),
+        'median_process_ms': round(statistics.median(outcome['process_seconds'] for outcome in outcomes) * 1000, 1),
+        'loaded_at_urls': outcomes[0]['loaded_at_urls'],
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True, cwd=Path(__file__).resolve().parent).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5, help='Processes started per mode (default: 5).')
+    parser.add_argument('--llm-latency', type=float, default=0.0, help='Stub LLM response time in seconds.')
+    parser.add_argument('--output', help='Write results as JSON to this path.')
+    parser.add_argument('--baseline', help='JSON results from an earlier run to compare against.')
+    parser.add_argument('--tolerance', type=float, default=0.15,
+                        help='Allowed fractional growth of time to first screening versus --baseline (default: 0.15).')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--workdir', help=argparse.SUPPRESS)
+    parser.add_argument('--pdf', help=argparse.SUPPRESS)
+    parser.add_argument('--openai-base-url', help=argparse.SUPPRESS)
+    parser.add_argument('--sendgrid-host', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if args.child:
+        child(args)
+        return 0
+
+    server = StubServer(llm_latency=args.llm_latency, email_latency=0.0, jitter=0.0).start()
+    with tempfile.TemporaryDirectory(prefix='bench-startup-') as template:
+        name, data = load_pdf_corpus(size=1)[0]
+        pdf = Path(template) / name
+        pdf.write_bytes(data)
+        prepare(template, server)
+        results = {
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            'git_commit': git_commit(),
+            'python': platform.python_version(),
+            'config': {'repeat': args.repeat, 'llm_latency': args.llm_latency},
+            'modes': {},
+        }
+        print(f"{args.repeat} processes per mode, commit {results['git_commit']}")
+        print('  median ms since process start (ms spent in the phase)')
+        print(f"  {'mode':<8}" + ''.join(f"{phase:>22}" for phase in PHASES) + f"{'process':>10}")
+        for mode in MODES:
+            summary = summarize([sample(template, str(pdf), server, mode) for _ in range(args.repeat)])
+            results['modes'][mode] = summary
+            print(f"  {mode:<8}" + ''.join(
+                f"{summary['median_ms'][phase]:>13.0f} ({summary['median_phase_ms'][phase]:>5.0f})" for phase in PHASES
+            ) + f"{summary['median_process_ms']:>10.0f}")
+            print(f"  {'':<8}modules loaded with the URLconf: {', '.join(summary['loaded_at_urls']) or 'none'}")
+    server.stop()
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['modes']
+        regressed = False
+        for mode, summary in results['modes'].items():
+            previous = baseline.get(mode)
+            if previous is None:
+                continue
+            ceiling = previous['median_ms']['first_screening'] * (1 + args.tolerance)
+            if summary['median_ms']['first_screening'] > ceiling:
+                regressed = True
+                print(f"REGRESSION in {mode} start-up: first screening after {summary['median_ms']['first_screening']:.0f}ms "
+                      f"is above {ceiling:.0f}ms (baseline {previous['median_ms']['first_screening']:.0f}ms, "
+                      f"tolerance {args.tolerance:.0%})")
+        if regressed:
+            return 1
+        print(f"OK: within {args.tolerance:.0%} of baseline")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
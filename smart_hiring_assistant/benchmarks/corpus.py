@@ -0,0 +1,97 @@
+import random
+from pathlib import Path
+
+_FIRST_NAMES = ['Alex', 'Priya', 'Chen', 'Maria', 'Olu', 'Sam', 'Fatima', 'Jonas', 'Aiko', 'Diego']
+_LAST_NAMES = ['Rivera', 'Okafor', 'Nguyen', 'Schmidt', 'Kowalski', 'Haddad', 'Tanaka', 'Silva', 'Novak', 'Patel']
+_DEGREES = ["B.Sc. Computer Science", "M.S. Electrical Engineering", "BA Mathematics",
+            "MEng Software Engineering", "B.Sc. Physics", "Diploma in Graphic Design"]
+_SKILLS = ['Python', 'PyTorch', 'TensorFlow', 'scikit-learn', 'Git', 'Docker', 'Kubernetes', 'SQL', 'R',
+           'Java', 'Go', 'Spark', 'Airflow', 'AWS SageMaker', 'Agile/Scrum', 'Figma', 'Excel', 'Photoshop']
+_ROLES = ['Machine Learning Engineer', 'Data Scientist', 'Software Engineer', 'Research Assistant',
+          'Backend Developer', 'Barista', 'Marketing Coordinator', 'MLOps Engineer']
+_ACHIEVEMENTS = [
+    'Deployed a recommendation model serving {n}M requests/day with p99 latency under {m}ms',
+    'Reduced training time by {n}% by migrating feature pipelines to Spark',
+    'Led a cross-functional team of {n} engineers through an Agile release cycle',
+    'Published {n} papers on representation learning at workshop venues',
+    'Won {n}nd place at a regional hackathon building a computer-vision triage tool',
+    'Maintained open-source library with {n}k GitHub stars',
+    'Managed social media calendar for {n} brands',
+]
+# Characters pdfminer commonly emits: bullets, smart punctuation, ligatures, NBSP, form feeds.
+_NOISE = ['•', '●', '■', '▪', '–', '—', '’', '“', '”', 'ﬁ', '\xa0', '\x0c', '|', '★']
+
+
+def synthetic_resume(rng):
+    """One resume as pdfminer would return it: multi-line, bullets, unicode noise, glued words."""
+    name = f"{rng.choice(_FIRST_NAMES)} {rng.choice(_LAST_NAMES)}"
+    lines = [name.upper(), f"{name.split()[0].lower()}@example.com | +1 555 {rng.randint(100, 999)} {rng.randint(1000, 9999)}", '']
+    lines += ['SUMMARY', f"{rng.choice(_ROLES)} with {rng.randint(1, 12)} years of experience.", '']
+    lines += ['EXPERIENCE']
+    for _ in range(rng.randint(2, 6)):
+        lines.append(f"{rng.choice(_ROLES)} — Company{rng.randint(1, 99)}   {rng.randint(2010, 2020)} – {rng.randint(2020, 2025)}")
+        for _ in range(rng.randint(2, 6)):
+            bullet = rng.choice(['•', '●', '▪', '-', '■'])
+            text = rng.choice(_ACHIEVEMENTS).format(n=rng.randint(2, 90), m=rng.randint(5, 200))
+            lines.append(f"{bullet}  {text}")
+    lines += ['', 'EDUCATION', f"{rng.choice(_DEGREES)}, University of Somewhere  {rng.randint(2005, 2022)}", '']
+    lines += ['SKILLS', ', '.join(rng.sample(_SKILLS, rng.randint(4, 10)))]
+    lines += ['', 'PROJECTS']
+    for _ in range(rng.randint(1, 4)):
+        lines.append(f"• {rng.choice(['churnPredictor', 'imageTagger', 'ragChatbot', 'budgetTracker'])}: "
+                     f"{rng.choice(_ACHIEVEMENTS).format(n=rng.randint(2, 90), m=rng.randint(5, 200))}")
+    text = '\n'.join(lines)
+    # Sprinkle extraction noise and irregular whitespace.
+    chars = list(text)
+    for _ in range(len(chars) // 60):
+        chars.insert(rng.randrange(len(chars)), rng.choice(_NOISE))
+    return ''.join(chars).replace('  ', ' \t ', 3) + '\x0c'
+
+
+def load_corpus(size=500, seed=1234, corpus_dir=None):
+    """Return resume texts: *.txt files from corpus_dir if given, otherwise a deterministic synthetic set."""
+    if corpus_dir:
+        return [path.read_text(encoding='utf-8', errors='replace') for path in sorted(Path(corpus_dir).glob('*.txt'))]
+    rng = random.Random(seed)
+    return [synthetic_resume(rng) for _ in range(size)]
+
+
+def _pdf_string(line):
+    line = line.encode('latin-1', 'ignore').decode('latin-1')  # the standard fonts cover Latin-1 only
+    return '(' + line.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)') + ')'
+
+
+def synthetic_pdf(text, lines_per_page=60):
+    """A minimal text-only PDF (Helvetica, one text object per page) containing text."""
+    lines = [line.replace('\t', ' ') for line in text.replace('\x0c', '').splitlines()] or ['']
+    pages = [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)]
+    font_id = 3 + 2 * len(pages)
+    objects = ['<< /Type /Catalog /Pages 2 0 R >>',
+               f"<< /Type /Pages /Kids [{' '.join(f'{3 + 2 * i} 0 R' for i in range(len(pages)))}] /Count {len(pages)} >>"]
+    for i, page in enumerate(pages):
+        content = 'BT /F1 10 Tf 50 780 Td 12 TL ' + ' '.join(f"{_pdf_string(line)} Tj T*" for line in page) + ' ET'
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents {4 + 2 * i} 0 R "
+                       f"/Resources << /Font << /F1 {font_id} 0 R >> >> >>")
+        objects.append(f"<< /Length {len(content.encode('latin-1'))} >>\nstream\n{content}\nendstream")
+    objects.append('<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>')
+    out = b'%PDF-1.4\n'
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n".encode('latin-1')
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode('latin-1')
+    out += b''.join(f"{offset:010d} 00000 n \n".encode('latin-1') for offset in offsets)
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode('latin-1')
+    return out
+
+
+def load_pdf_corpus(size=50, seed=1234, corpus_dir=None):
+    """
+    Return [(name, pdf bytes)]: *.pdf files from corpus_dir (e.g. anonymized real resumes)
+    if given, otherwise synthetic resumes rendered to PDF.
+    """
+    if corpus_dir:
+        return [(path.name, path.read_bytes()) for path in sorted(Path(corpus_dir).glob('*.pdf'))]
+    rng = random.Random(seed)
+    return [(f"synthetic-{n:04d}.pdf", synthetic_pdf(synthetic_resume(rng))) for n in range(size)]
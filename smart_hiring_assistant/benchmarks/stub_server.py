@@ -0,0 +1,137 @@
+"""
+Local stand-in for the OpenAI chat completions and SendGrid mail/send APIs, for benchmarks.
+
+    server = StubServer(llm_latency=0.5, email_latency=0.1).start()
+    # OPENAI_BASE_URL = server.openai_base_url, SENDGRID_API_HOST = server.sendgrid_host
+
+Responses are deterministic: a resume mentioning machine learning is qualified. Latency is
+simulated per request (uniform jitter of +/- jitter * latency) and every request is counted.
+"""
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+_QUALIFYING_TERMS = ('machine learning', 'pytorch', 'tensorflow')
+
+
+def _is_qualified(messages):
+    text = ' '.join(str(message.get('content', '')) for message in messages).lower()
+    resume = text.rsplit("applicant's resume", 1)[-1]
+    return any(term in resume for term in _QUALIFYING_TERMS)
+
+
+def _structured_assessment(schema, qualified):
+    names = (schema.get('properties', {}).get('requirements', {}).get('items', {})
+             .get('properties', {}).get('name', {}).get('enum')) or ['Requirements']
+    status = 'met' if qualified else 'unmet'
+    return json.dumps({
+        'requirements': [{'name': name, 'status': status, 'evidence': 'Stub evidence.'} for name in names],
+        'score': 80 if qualified else 20,
+        'summary': 'Stub assessment.',
+        'decision': 'qualified' if qualified else 'not_qualified',
+    })
+
+
+def chat_completion(request):
+    """An OpenAI chat.completion body answering request in the format it asked for."""
+    messages = request.get('messages', [])
+    qualified = _is_qualified(messages)
+    message = {'role': 'assistant', 'content': None}
+    if request.get('tools'):
+        arguments = _structured_assessment(request['tools'][0]['function']['parameters'], qualified)
+        message['tool_calls'] = [{
+            'id': 'call_stub', 'type': 'function',
+            'function': {'name': request['tools'][0]['function']['name'], 'arguments': arguments},
+        }]
+    elif (request.get('response_format') or {}).get('type') == 'json_schema':
+        message['content'] = _structured_assessment(request['response_format']['json_schema']['schema'], qualified)
+    else:
+        decision = 'qualified' if qualified else 'not_qualified'
+        message['content'] = f"Stub assessment of each requirement.\nOVERALL_DECISION: {decision}"
+    prompt_tokens = sum(len(str(m.get('content', ''))) for m in messages) // 4
+    completion_tokens = len(message['content'] or message.get('tool_calls', [{}])[0]['function']['arguments']) // 4
+    return {
+        'id': 'chatcmpl-stub',
+        'object': 'chat.completion',
+        'created': int(time.time()),
+        'model': request.get('model', 'stub'),
+        'choices': [{'index': 0, 'message': message, 'finish_reason': 'stop'}],
+        'usage': {'prompt_tokens': prompt_tokens, 'completion_tokens': completion_tokens,
+                  'total_tokens': prompt_tokens + completion_tokens},
+    }
+
+
+class StubServer:
+    def __init__(self, llm_latency=0.5, email_latency=0.1, jitter=0.2, seed=1234):
+        self.llm_latency = llm_latency
+        self.email_latency = email_latency
+        self.jitter = jitter
+        self.requests = {'chat': 0, 'mail': 0}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = None
+
+    def _sleep(self, latency):
+        with self._lock:
+            delay = latency * (1 + self._rng.uniform(-self.jitter, self.jitter))
+        if delay > 0:
+            time.sleep(delay)
+
+    def _count(self, kind):
+        with self._lock:
+            self.requests[kind] += 1
+
+    def start(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+                if self.path.endswith('/chat/completions'):
+                    stub._count('chat')
+                    stub._sleep(stub.llm_latency)
+                    self._reply(200, chat_completion(body))
+                elif self.path == '/v3/mail/send':
+                    stub._count('mail')
+                    stub._sleep(stub.email_latency)
+                    self._reply(202, None)
+                else:
+                    self._reply(404, {'error': f"unknown path {self.path}"})
+
+            def _reply(self, status, payload):
+                data = json.dumps(payload).encode('utf-8') if payload is not None else b''
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name='benchmark-stub-server', daemon=True).start()
+        return self
+
+    @property
+    def port(self):
+        return self._server.server_address[1]
+
+    @property
+    def openai_base_url(self):
+        return f"http://127.0.0.1:{self.port}/v1"
+
+    @property
+    def sendgrid_host(self):
+        return f"http://127.0.0.1:{self.port}"
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
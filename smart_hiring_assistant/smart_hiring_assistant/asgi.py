@@ -2,6 +2,8 @@
 ASGI config for smart_hiring_assistant project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Serve it with an ASGI server (e.g. ``uvicorn smart_hiring_assistant.asgi:application``)
+so Screener's server-sent event stream does not hold a worker thread per client.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
@@ -14,3 +16,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'smart_hiring_assistant.settings')
 
 application = get_asgi_application()
+
+# Web workers only: build the shared services before the first request when SCREENER_WARM_UP is set.
+from Screener.services.service_registry import ServiceRegistry  # noqa: E402
+
+ServiceRegistry.warm_up_from_settings()
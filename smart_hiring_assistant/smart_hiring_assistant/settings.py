@@ -53,6 +53,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'Screener.tracing.TraceIDMiddleware',
 ]
 
 ROOT_URLCONF = 'smart_hiring_assistant.urls'
@@ -83,6 +84,8 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Screening workers write concurrently; wait for SQLite's lock instead of failing fast.
+        'OPTIONS': {'timeout': 20},
     }
 }
 
@@ -127,3 +130,168 @@ STATIC_URL = 'static/'
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Background screening queue (see Screener.services.job_queue_service)
+SCREENER_JOB_MAX_ATTEMPTS = int(os.getenv('SCREENER_JOB_MAX_ATTEMPTS', 3))
+SCREENER_JOB_RETRY_BACKOFF = int(os.getenv('SCREENER_JOB_RETRY_BACKOFF', 30))  # seconds, doubled per attempt
+SCREENER_JOB_LEASE_SECONDS = int(os.getenv('SCREENER_JOB_LEASE_SECONDS', 600))
+# Seconds a new job is held back from workers so the upload page can stream it over SSE.
+SCREENER_STREAM_CLAIM_GRACE = int(os.getenv('SCREENER_STREAM_CLAIM_GRACE', 5))
+
+# OpenAI client (see Screener.services.openai_service)
+OPENAI_MODEL = os.getenv('OPENAI_MODEL', 'gpt-4')
+OPENAI_BASE_URL = os.getenv('OPENAI_BASE_URL')  # None uses the public API
+OPENAI_TIMEOUT = float(os.getenv('OPENAI_TIMEOUT', 60))  # seconds per request
+OPENAI_MAX_RETRIES = int(os.getenv('OPENAI_MAX_RETRIES', 4))
+OPENAI_RETRY_BASE_DELAY = float(os.getenv('OPENAI_RETRY_BASE_DELAY', 1.0))
+OPENAI_RETRY_MAX_DELAY = float(os.getenv('OPENAI_RETRY_MAX_DELAY', 30.0))
+OPENAI_MAX_CONCURRENCY = int(os.getenv('OPENAI_MAX_CONCURRENCY', 8))
+OPENAI_REQUESTS_PER_MINUTE = int(os.getenv('OPENAI_REQUESTS_PER_MINUTE', 0))  # 0 disables rate limiting
+
+# Persistent LLM assessment cache (see Screener.services.assessment_cache_service)
+ASSESSMENT_CACHE_ENABLED = os.getenv('ASSESSMENT_CACHE_ENABLED', 'true').lower() == 'true'
+ASSESSMENT_CACHE_TTL = int(os.getenv('ASSESSMENT_CACHE_TTL', 30 * 24 * 3600))  # seconds
+ASSESSMENT_CACHE_MAX_ENTRIES = int(os.getenv('ASSESSMENT_CACHE_MAX_ENTRIES', 10000))
+ASSESSMENT_CACHE_EVICT_EVERY = int(os.getenv('ASSESSMENT_CACHE_EVICT_EVERY', 100))  # sets between evictions
+
+# PDF extraction pool (see Screener.services.pdf_parser_service)
+PDF_EXTRACTION_WORKERS = int(os.getenv('PDF_EXTRACTION_WORKERS', 2))
+PDF_EXTRACTION_TIMEOUT = float(os.getenv('PDF_EXTRACTION_TIMEOUT', 30))  # seconds per document
+PDF_EXTRACTION_MAX_RSS_MB = int(os.getenv('PDF_EXTRACTION_MAX_RSS_MB', 512))
+PDF_EXTRACTION_MAX_PAGES = int(os.getenv('PDF_EXTRACTION_MAX_PAGES', 0))  # 0 extracts every page; cuts are logged
+PDF_EXTRACTION_MAX_TASKS_PER_WORKER = int(os.getenv('PDF_EXTRACTION_MAX_TASKS_PER_WORKER', 50))
+PDF_EXTRACTION_START_METHOD = os.getenv('PDF_EXTRACTION_START_METHOD', 'spawn')
+
+# Local pre-screen before the LLM (see Screener.services.prescreen_service)
+PRESCREEN_ENABLED = os.getenv('PRESCREEN_ENABLED', 'true').lower() == 'true'
+# Both thresholds are off by default, so every applicant is 'borderline' and reaches the LLM.
+# Scores depend on the requirements' wording and the applicant pool, so calibrate before enabling
+# either: run with them unset until a few hundred assessments per decision are stored, then
+# `manage.py calibrate_prescreen [--position slug]` reports the score distribution of qualified
+# and not-qualified applicants and suggests values for a target miss rate and precision.
+PRESCREEN_REJECT_THRESHOLD = os.getenv('PRESCREEN_REJECT_THRESHOLD')  # below: rejected without an LLM call
+PRESCREEN_STRONG_THRESHOLD = os.getenv('PRESCREEN_STRONG_THRESHOLD')  # at or above: flagged as strong
+PRESCREEN_FEATURES = 2 ** 14
+
+# Section-aware resume retrieval for the LLM prompt (see Screener.services.resume_retriever)
+RAG_RETRIEVAL_ENABLED = os.getenv('RAG_RETRIEVAL_ENABLED', 'true').lower() == 'true'
+RAG_CONTEXT_MAX_TOKENS = int(os.getenv('RAG_CONTEXT_MAX_TOKENS', 1500))  # resume tokens the retriever selects per prompt
+# Hard cap on the resume part of a prompt, e.g. with retrieval off; counted with tiktoken when installed
+RAG_RESUME_MAX_TOKENS = int(os.getenv('RAG_RESUME_MAX_TOKENS', 4000))
+RAG_CHUNK_CHARS = int(os.getenv('RAG_CHUNK_CHARS', 600))
+# 'tool' (forced function call) or 'json_schema' for structured assessments; 'text' for the OVERALL_DECISION format
+RAG_OUTPUT_FORMAT = os.getenv('RAG_OUTPUT_FORMAT', 'tool')
+
+# Position used when a resume has none (e.g. bulk screening); seeded by migration 0005
+SCREENER_DEFAULT_POSITION = os.getenv('SCREENER_DEFAULT_POSITION', 'ml-engineer')
+
+# Near-duplicate resumes (SimHash Hamming distance, at most 3) reuse the earlier assessment
+DUPLICATE_MAX_DISTANCE = int(os.getenv('DUPLICATE_MAX_DISTANCE', 3))
+
+# Email outbox drained by `manage.py dispatch_emails`
+EMAIL_OUTBOX_BACKEND = os.getenv('EMAIL_OUTBOX_BACKEND', 'sendgrid')  # 'sendgrid' or 'fake'
+EMAIL_OUTBOX_BATCH_SIZE = int(os.getenv('EMAIL_OUTBOX_BATCH_SIZE', 500))  # recipients per SendGrid request (max 1000)
+EMAIL_OUTBOX_MAX_ATTEMPTS = int(os.getenv('EMAIL_OUTBOX_MAX_ATTEMPTS', 5))
+EMAIL_OUTBOX_RETRY_BACKOFF = int(os.getenv('EMAIL_OUTBOX_RETRY_BACKOFF', 60))  # seconds, doubled per attempt
+EMAIL_OUTBOX_LEASE_SECONDS = int(os.getenv('EMAIL_OUTBOX_LEASE_SECONDS', 300))
+EMAIL_FAKE_OUTPUT = os.getenv('EMAIL_FAKE_OUTPUT')  # JSONL file written by the fake backend
+SENDGRID_API_HOST = os.getenv('SENDGRID_API_HOST', 'api.sendgrid.com')
+SENDGRID_TIMEOUT = float(os.getenv('SENDGRID_TIMEOUT', 30))
+
+# Recruiter digests for positions in digest mode (queued by dispatch_emails / send_recruiter_digests)
+RECRUITER_DIGEST_MAX_CANDIDATES = int(os.getenv('RECRUITER_DIGEST_MAX_CANDIDATES', 50))  # applicants listed per email
+SCREENER_BASE_URL = os.getenv('SCREENER_BASE_URL', 'http://localhost:8000')  # for resume and assessment links
+
+# Metrics at /metrics (Prometheus text format) and request trace IDs in logs
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'false').lower() == 'true'
+METRICS_TOKEN = os.getenv('METRICS_TOKEN')  # scrapers send "Authorization: Bearer <token>"; required unless DEBUG
+TRACE_ID_HEADER = os.getenv('TRACE_ID_HEADER', 'X-Request-ID')
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'filters': {'trace_id': {'()': 'Screener.tracing.TraceIDFilter'}},
+    'formatters': {
+        'traced': {'format': '%(asctime)s %(levelname)s [%(trace_id)s] %(name)s: %(message)s'},
+    },
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler', 'filters': ['trace_id'], 'formatter': 'traced'},
+    },
+    'root': {'handlers': ['console'], 'level': os.getenv('LOG_LEVEL', 'INFO')},
+    'loggers': {'httpx': {'level': 'WARNING'}},  # one INFO line per OpenAI request otherwise
+}
+
+# Resume uploads stream through ResumeUploadHandler: PDF header, size and page checks on the first
+# chunks, written beside media/resumes/ with a SHA-256 computed on the fly
+FILE_UPLOAD_HANDLERS = [
+    'Screener.upload_handlers.ResumeUploadHandler',
+    'django.core.files.uploadhandler.MemoryFileUploadHandler',
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+RESUME_UPLOAD_FIELD = 'resume_file'
+RESUME_UPLOAD_MAX_BYTES = int(os.getenv('RESUME_UPLOAD_MAX_BYTES', 2 * 1024 * 1024))
+RESUME_UPLOAD_MAX_PAGES = int(os.getenv('RESUME_UPLOAD_MAX_PAGES', 50))  # 0 disables the page check
+RESUME_UPLOAD_TEMP_DIR = os.getenv('RESUME_UPLOAD_TEMP_DIR')  # default: media/resumes/.partial
+
+# Resume files are stored once per distinct content, as resumes/blobs/<sha256[:2]>/<sha256>.pdf, with
+# the extracted text cached beside each blob (Screener.storage); `manage.py gc_resume_blobs` removes
+# blobs no resume references
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+    'resumes': {
+        'BACKEND': 'Screener.storage.ContentAddressedStorage',
+        'OPTIONS': {'prefix': 'resumes/blobs'},
+    },
+}
+RESUME_TEXT_CACHE_ENABLED = os.getenv('RESUME_TEXT_CACHE_ENABLED', 'true').lower() == 'true'
+RESUME_BLOB_GC_GRACE_SECONDS = int(os.getenv('RESUME_BLOB_GC_GRACE_SECONDS', 3600))  # never collect newer files
+
+# Re-screening stored applicants after a requirements edit (`manage.py rescreen_applicants`)
+RESCREEN_RATE_PER_MINUTE = float(os.getenv('RESCREEN_RATE_PER_MINUTE', 60))  # LLM re-assessments; 0 disables the throttle
+RESCREEN_CONCURRENCY = int(os.getenv('RESCREEN_CONCURRENCY', 2))
+RESCREEN_BATCH_SIZE = int(os.getenv('RESCREEN_BATCH_SIZE', 50))  # assessments per progress checkpoint
+
+# Chat completion backends (see Screener.services.llm_backends); positions can pick one for the
+# assessment and another for a cheaper triage pass in the admin
+LLM_BACKENDS = {
+    'openai': {'BACKEND': 'Screener.services.openai_service.OpenAIService'},
+    'openai-mini': {
+        'BACKEND': 'Screener.services.openai_service.OpenAIService',
+        'OPTIONS': {'MODEL': os.getenv('OPENAI_TRIAGE_MODEL', 'gpt-4o-mini')},
+    },
+    'local': {  # OpenAI-compatible local server, e.g. llama.cpp's llama-server
+        'BACKEND': 'Screener.services.llm_backends.LocalLLMBackend',
+        'OPTIONS': {
+            'BASE_URL': os.getenv('LOCAL_LLM_BASE_URL', 'http://127.0.0.1:8080/v1'),
+            'MODEL': os.getenv('LOCAL_LLM_MODEL', 'local'),
+            'MAX_CONCURRENCY': int(os.getenv('LOCAL_LLM_MAX_CONCURRENCY', 2)),
+            'TIMEOUT': float(os.getenv('LOCAL_LLM_TIMEOUT', 120)),
+            'SUPPORTS_TOOLS': os.getenv('LOCAL_LLM_SUPPORTS_TOOLS', 'false').lower() == 'true',
+        },
+    },
+    'stub': {'BACKEND': 'Screener.services.llm_backends.StubLLMBackend'},  # deterministic, offline
+    'file-batch': {  # local stand-in for the batch API, answered by the stub
+        'BACKEND': 'Screener.services.llm_backends.FileBatchBackend',
+        'OPTIONS': {'BACKEND': 'stub', 'DELAY': float(os.getenv('FILE_BATCH_DELAY', 0))},
+    },
+}
+LLM_DEFAULT_BACKEND = os.getenv('LLM_DEFAULT_BACKEND', 'openai')
+# Backends for pipeline stages when the position does not name one; no triage unless set
+LLM_STAGE_BACKENDS = {'triage': os.getenv('LLM_TRIAGE_BACKEND', '')}
+
+# Batch screening for positions with batch_screening (`manage.py run_llm_batches`)
+LLM_BATCH_MAX_REQUESTS = int(os.getenv('LLM_BATCH_MAX_REQUESTS', 1000))  # jobs per submitted batch
+LLM_BATCH_MAX_WAIT = int(os.getenv('LLM_BATCH_MAX_WAIT', 900))  # seconds a job waits for a batch to fill
+LLM_BATCH_COMPLETION_WINDOW = os.getenv('LLM_BATCH_COMPLETION_WINDOW', '24h')
+LLM_BATCH_POLL_INTERVAL = float(os.getenv('LLM_BATCH_POLL_INTERVAL', 60))
+LLM_BATCH_LEASE_SECONDS = int(os.getenv('LLM_BATCH_LEASE_SECONDS', 26 * 3600))  # completion window plus margin
+LLM_BATCH_DIR = os.getenv('LLM_BATCH_DIR', str(BASE_DIR / 'llm_batches'))  # submitted JSONL files
+
+# Warm-up of the shared services (Screener.services.service_registry) when a web worker loads
+# smart_hiring_assistant.wsgi or .asgi; management commands and workers build services on first use
+SCREENER_WARM_UP = os.getenv('SCREENER_WARM_UP', 'false').lower() == 'true'
+SCREENER_WARM_UP_SERVICES = [name for name in os.getenv('SCREENER_WARM_UP_SERVICES', '').split(',') if name]  # empty: all
+SCREENER_WARM_UP_PDF_WORKERS = os.getenv('SCREENER_WARM_UP_PDF_WORKERS', 'true').lower() == 'true'
+
+# Recruiter shortlist (positions/<slug>/shortlist/, staff only)
+SHORTLIST_PAGE_SIZE = int(os.getenv('SHORTLIST_PAGE_SIZE', 50))
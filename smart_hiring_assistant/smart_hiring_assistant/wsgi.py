@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'smart_hiring_assistant.settings')
 
 application = get_wsgi_application()
+
+# Web workers only: build the shared services before the first request when SCREENER_WARM_UP is set.
+from Screener.services.service_registry import ServiceRegistry  # noqa: E402
+
+ServiceRegistry.warm_up_from_settings()